@@ -1,9 +1,29 @@
+from functools import lru_cache
+
 import numpy as np
 from scipy.signal import welch, iirnotch, lfilter, butter
 
 SFREQ = 250
 ARTIFACT_THRESHOLD = 15000 
 SMOOTHING_FACTOR = 0.3       # 0.0 - brak wygładzania, 0.9 - bardzo wolne zmiany
+WELCH_NPERSEG = 256          # domyślna długość segmentu w welch
+# Pasma (Hz, krawędzie włącznie): alpha, beta, high beta
+BANDS = ((8, 12), (13, 30), (20, 30))
+
+
+@lru_cache(maxsize=8)
+def _band_weights(nperseg, fs, bands=BANDS):
+    """Macierz wag (n_freqs, n_bands) liczących średnią PSD w każdym paśmie.
+
+    Częstotliwości welch zależą tylko od długości segmentu i fs, więc
+    maski liczymy raz i trzymamy w cache zamiast w każdym oknie.
+    """
+    freqs = np.fft.rfftfreq(nperseg, 1 / fs)
+    weights = np.zeros((len(freqs), len(bands)))
+    for idx, (low, high) in enumerate(bands):
+        mask = (freqs >= low) & (freqs <= high)
+        weights[mask, idx] = 1 / max(mask.sum(), 1)
+    return weights
 
 class EEGProcessor:
     def __init__(self):
@@ -16,7 +36,7 @@ class EEGProcessor:
         # Ostatnie poprawne wartości (do wygładzania)
         self.last_focus_raw = 0
         self.last_stress_raw = 0
-        
+
     def _filter_data(self, data, fs=SFREQ):
         """Notch 50Hz i bandpass 1-40Hz"""
         # Notch (wycięcie sieci elektrycznej)
@@ -57,9 +77,13 @@ class EEGProcessor:
         
         return np.clip(percent, 0, 100), min_val, max_val
 
-    def process_window(self, window_data):
-        """Główna funkcja przetwarzająca okno danych"""
-        
+    def process_window(self, window_data, filtered=None):
+        """Główna funkcja przetwarzająca okno danych
+
+        filtered: to samo okno już przefiltrowane (np. StreamingFilterBank
+        z filtrami ze stanem). Gdy brak, filtrowane jest całe okno.
+        """
+
         # 1. Detekcja artefaktów (zanim zaczniemy liczyć FFT)
         # Jeśli którykolwiek kanał ma artefakt, odrzucamy całe okno
         # Zakładamy input shape: (n_channels, n_samples)
@@ -69,16 +93,16 @@ class EEGProcessor:
                 return None # Zwracamy None, żeby serwer wiedział, że nie ma nowych danych
 
         # 2. Filtracja i uśrednienie kanałów
-        filtered = np.array([self._filter_data(ch) for ch in window_data])
+        if filtered is None:
+            filtered = np.array([self._filter_data(ch) for ch in window_data])
         avg_data = np.mean(filtered, axis=0)
 
         # 3. Analiza widmowa (Welch)
-        freqs, psd = welch(avg_data, SFREQ)
+        nperseg = min(WELCH_NPERSEG, avg_data.shape[-1])
+        freqs, psd = welch(avg_data, SFREQ, nperseg=nperseg)
         
-        # Wyciągnięcie pasm
-        alpha = np.mean(psd[(freqs >= 8) & (freqs <= 12)])
-        beta  = np.mean(psd[(freqs >= 13) & (freqs <= 30)])
-        high_beta = np.mean(psd[(freqs >= 20) & (freqs <= 30)])
+        # Wyciągnięcie pasm (jedno mnożenie macierzy z wagami z cache)
+        alpha, beta, high_beta = psd @ _band_weights(nperseg, SFREQ)
         
         # Zabezpieczenie przed dzieleniem przez zero
         if alpha == 0: alpha = 1e-10
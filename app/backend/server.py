@@ -1,6 +1,7 @@
 import asyncio
 import websockets
 import json
+import os
 import time
 import numpy as np
 
@@ -11,11 +12,20 @@ DEVICE_NAME = "BA MINI 047"
 SFREQ = 250
 WINDOW_SIZE = SFREQ * 5
 ELECTRODES = {0: "Fp1", 1: "Fp2"}
+# plik .fif odtwarzany zamiast opaski (testy bez urządzenia)
+REPLAY_FILE = os.environ.get("BRAIN_REPLAY_FILE")
+# dane z działającego brokera (python -m brainaccess.utils.broker) zamiast
+# własnego połączenia z opaską: "1" lub "host:port"
+BROKER = os.environ.get("BRAIN_BROKER")
 
 BRAINACCESS_AVAILABLE = False
 try:
     from brainaccess.utils import acquisition
     from brainaccess.core.eeg_manager import EEGManager
+    from brainaccess.utils.virtual_device import ReplayManager
+    from brainaccess.utils.streaming import StreamingFilterBank
+    from brainaccess.utils.broker import BrokerClient
+    from brainaccess.utils.exceptions import BrainAccessException
     BRAINACCESS_AVAILABLE = True
 except ImportError:
     print("[!] Nie znaleziono bibliotek BrainAccess. Dostępna tylko symulacja.")
@@ -46,24 +56,37 @@ async def stream_real_eeg(websocket, eeg):
     
     processor = EEGProcessor()
     
-    try:
-        while True:
-            eeg.get_mne()
-            
-            if not hasattr(eeg.data, 'mne_raw') or eeg.data.mne_raw is None:
-                await asyncio.sleep(0.1)
-                continue
+    # notch 50 Hz i bandpass 1-40 Hz ze stanem (zi) przenoszonym między oknami
+    channels = list(ELECTRODES.values())
+    bank = StreamingFilterBank.design(
+        SFREQ, len(channels), WINDOW_SIZE, band=(1, 40), notch=50
+    )
+    # nowe okno co ok. 0.5 s, wyzwalane przyjściem danych zamiast timera;
+    # okna wypadają na granicach paczek, więc nowych próbek bywa więcej niż hop
+    hop = SFREQ // 2
+    stream = eeg.astream(
+        hop=hop, window=WINDOW_SIZE, channels=channels, max_pending=2
+    )
+    dropped = 0
 
-            mne_raw = eeg.data.mne_raw
-            data, times = mne_raw.get_data(return_times=True)
+    try:
+        async for window, new_samples in stream:
+            if stream.dropped != dropped:
+                # pominięte okna - stan filtrów nie pasuje do nowych danych
+                dropped = stream.dropped
+                bank.reset()
+
+            if bank.total == 0:
+                # pierwsze okno (lub po przerwie): filtrujemy całość
+                bank.process(window)
+            else:
+                # filtrowane są tylko nowe próbki, nie całe 5 s okno
+                bank.process(window, new_samples)
 
-            if data.shape[1] < WINDOW_SIZE:
-                await asyncio.sleep(0.5)
+            if window.shape[1] < WINDOW_SIZE or bank.total < WINDOW_SIZE:
                 continue
 
-            window = data[:, -WINDOW_SIZE:]
-
-            metrics = processor.process_window(window)
+            metrics = processor.process_window(window, filtered=bank.latest(WINDOW_SIZE))
 
             if metrics:
                 result = {
@@ -79,14 +102,62 @@ async def stream_real_eeg(websocket, eeg):
             else:
                 print("[!] Ignorowanie okna (artefakty/ruch)")
 
-            await asyncio.sleep(0.5)
-
     except websockets.exceptions.ConnectionClosed:
         print("Klient rozłączony (EEG)")
     except Exception as e:
         print(f"Błąd w pętli EEG: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        stream.close()
+
+async def stream_broker(websocket, client):
+    print("Klient połączony (TRYB BROKER)")
+
+    processor = EEGProcessor()
+    channels = list(ELECTRODES.values())
+    bank = StreamingFilterBank.design(
+        SFREQ, len(channels), WINDOW_SIZE, band=(1, 40), notch=50
+    )
+    rows = [client.ch_names.index(name) for name in channels]
+    since = None
+
+    try:
+        while True:
+            await asyncio.sleep(0.5)
+            # błąd, jeśli broker stracił połączenie z opaską
+            client.status()
+            new, total = client.reader.read(since=since)
+            if since is not None and total - since > new.shape[1]:
+                # część próbek nadpisana w buforze - stan filtrów nieaktualny
+                bank.reset()
+            since = total
+            if new.shape[1] == 0:
+                continue
+            bank.process(new[rows])
+            if bank.total < WINDOW_SIZE:
+                continue
+
+            window = client.get_window(WINDOW_SIZE, channels)
+            metrics = processor.process_window(window, filtered=bank.latest(WINDOW_SIZE))
+
+            if metrics:
+                result = {
+                    "focus": metrics["focus"],
+                    "stress": metrics["stress"],
+                    "alert": metrics["alert"],
+                    "mode": "real"
+                }
+                await websocket.send(json.dumps(result))
+                print(f"BROKER -> F: {metrics['focus']:05.2f}% | S: {metrics['stress']:05.2f}%")
+            else:
+                print("[!] Ignorowanie okna (artefakty/ruch)")
+
+    except websockets.exceptions.ConnectionClosed:
+        print("Klient rozłączony (BROKER)")
+    except BrainAccessException as e:
+        print(f"[!] Broker: {e}")
+        await websocket.close()
 
 async def main():
     print("--- START SERWERA MÓZGU ---")
@@ -94,12 +165,28 @@ async def main():
     use_simulation = True
     eeg_instance = None
     manager = None
+    broker_client = None
 
-    if BRAINACCESS_AVAILABLE:
+    if BRAINACCESS_AVAILABLE and BROKER:
+        try:
+            address = BROKER.split(":") if ":" in BROKER else []
+            if address:
+                broker_client = BrokerClient(address[0], int(address[1]))
+            else:
+                broker_client = BrokerClient()
+            print(f"SUKCES: Połączono z brokerem ({', '.join(broker_client.ch_names)}).")
+        except (OSError, BrainAccessException) as e:
+            print(f"[!] Nie udało się połączyć z brokerem: {e}")
+            print("[i] Przechodzę w tryb SYMULACJI.")
+    elif BRAINACCESS_AVAILABLE:
         try:
             print(f"Szukanie urządzenia...")
-            manager = EEGManager()
-            eeg_instance = acquisition.EEG()
+            if REPLAY_FILE:
+                print(f"Odtwarzanie nagrania {REPLAY_FILE}")
+                manager = ReplayManager(REPLAY_FILE, loop=True)
+            else:
+                manager = EEGManager()
+            eeg_instance = acquisition.EEG(dispatch_queue=64)
             
             manager.__enter__() 
             
@@ -121,10 +208,16 @@ async def main():
         print("[i] Brak bibliotek - tryb SYMULACJI wymuszony.")
 
     print(f"\n>> Serwer WebSocket nasłuchuje na ws://localhost:{PORT}")
-    print(f">> Tryb pracy: {'SYMULACJA (dane losowe)' if use_simulation else 'REAL TIME EEG'}")
+    if broker_client:
+        print(">> Tryb pracy: BROKER")
+    else:
+        print(f">> Tryb pracy: {'SYMULACJA (dane losowe)' if use_simulation else 'REAL TIME EEG'}")
 
     try:
-        if use_simulation:
+        if broker_client:
+            async with websockets.serve(lambda ws: stream_broker(ws, broker_client), "localhost", PORT):
+                await asyncio.get_running_loop().create_future()
+        elif use_simulation:
             async with websockets.serve(stream_simulation, "localhost", PORT):
                 await asyncio.get_running_loop().create_future() 
         else:
@@ -132,6 +225,9 @@ async def main():
                 await asyncio.get_running_loop().create_future()
     
     finally:
+        if broker_client:
+            # opaska zostaje połączona z brokerem
+            broker_client.close()
         if not use_simulation and manager:
             print("Zamykanie połączenia z EEG...")
             try:
@@ -2,6 +2,7 @@ import ctypes
 import time
 import warnings
 import threading
+import traceback
 import numpy as np
 import copy
 from multimethod import multimethod
@@ -169,8 +170,27 @@ _dll.ba_eeg_manager_set_data_stream_rate.argtypes = [
 ]
 _dll.ba_eeg_manager_set_data_stream_rate.restype = ctypes.c_uint8
 
-_managers_mtx = threading.Lock()
-_managers: dict = dict()
+class _CallbackContext:
+    """Native callback user data of one `EEGManager`.
+
+    A pointer to the context is passed as the C ``void*`` user data, so
+    callbacks reach their manager directly instead of through a shared,
+    locked registry. Callbacks of different devices therefore never contend
+    on a common lock.
+    """
+
+    __slots__ = ("manager",)
+
+    def __init__(self, manager: "EEGManager") -> None:
+        self.manager: Optional["EEGManager"] = manager
+
+
+def _context_manager(data: Optional[int]) -> Optional["EEGManager"]:
+    """Returns the manager of a callback context passed as user data."""
+    if not data:
+        return None
+    context = ctypes.cast(data, ctypes.POINTER(ctypes.py_object)).contents.value
+    return context.manager
 
 _types_map = [
     ctypes.c_float,  # 0
@@ -180,101 +200,218 @@ _types_map = [
 ]
 
 
+class _ChunkDispatcher:
+    """Hands chunks from the device thread over to a Python worker thread.
+
+    The device thread only copies each chunk into the next free slot of a
+    preallocated single-producer single-consumer ring and returns. A worker
+    thread drains the ring and runs the user callback, so slow callbacks no
+    longer block communication with the device. When the ring is full the
+    newest chunk is dropped and counted.
+
+    The producer only advances `_head` and the consumer only advances
+    `_tail`, so no lock is shared between the two threads.
+    """
+
+    def __init__(self, callback: Callable, slots: int) -> None:
+        """Creates the ring and starts the worker thread.
+
+        Parameters
+        ----------
+        callback : callable
+            Called on the worker thread with a chunk record and chunk size.
+        slots : int
+            Number of chunks the ring can hold.
+        """
+        self._callback = callback
+        self._n_slots = slots
+        self._slots: Optional[np.ndarray] = None
+        self._layout: list = []
+        self._chunk_size = 0
+        self._stream_types: Optional[list] = None
+        self._head = 0
+        self._tail = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.max_pending = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="brainaccess-dispatch", daemon=True
+        )
+        self._thread.start()
+
+    def _allocate(self, chunk_size: int, stream_types: list) -> None:
+        """Allocates the ring slots for a chunk size and channel layout."""
+        dtype = np.dtype(
+            [
+                (str(i), np.dtype(ctype), (chunk_size,))
+                for i, ctype in enumerate(stream_types)
+            ]
+        )
+        self._slots = np.zeros(self._n_slots, dtype=dtype)
+        self._layout = [
+            (dtype.fields[name][1], dtype.fields[name][0].itemsize)
+            for name in dtype.names
+        ]
+        self._chunk_size = chunk_size
+        self._stream_types = stream_types
+
+    def put(self, chunk_data: Any, chunk_size: int, stream_types: list) -> None:
+        """Copies a chunk into the ring, called on the device thread.
+
+        Parameters
+        ----------
+        chunk_data
+            Native pointers to the channel data.
+        chunk_size : int
+            Number of samples in the chunk.
+        stream_types : list
+            ctypes type of every channel.
+        """
+        pending = self._head - self._tail
+        if chunk_size != self._chunk_size or stream_types is not self._stream_types:
+            if pending:
+                # slots still hold chunks with the old layout
+                self.dropped += 1
+                return
+            self._allocate(chunk_size, stream_types)
+        elif pending >= self._n_slots:
+            self.dropped += 1
+            return
+        slots = self._slots
+        base = slots.ctypes.data + (self._head % self._n_slots) * slots.itemsize
+        for i, (offset, nbytes) in enumerate(self._layout):
+            ctypes.memmove(base + offset, chunk_data[i], nbytes)
+        self._head += 1
+        self.max_pending = max(self.max_pending, pending + 1)
+        self._wake.set()
+
+    def _run(self) -> None:
+        """Worker thread, runs the callback for every queued chunk."""
+        while not self._stop.is_set():
+            self._wake.wait(0.1)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self) -> None:
+        """Delivers queued chunks. A slot is released after its callback."""
+        while self._tail < self._head:
+            index = self._tail % self._n_slots
+            # a 0-d record view, like the contiguous callback record
+            slot = self._slots[index:index + 1].reshape(())
+            try:
+                self._callback(slot, self._chunk_size)
+            except Exception:
+                traceback.print_exc()
+            self._tail += 1
+            self.delivered += 1
+
+    def stop(self) -> None:
+        """Delivers the remaining chunks and stops the worker thread."""
+        self._stop.set()
+        self._wake.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def stats(self) -> dict:
+        """Returns the dispatch counters."""
+        return {
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "pending": self._head - self._tail,
+            "max_pending": self.max_pending,
+            "capacity": self._n_slots,
+        }
+
+
 @ctypes.CFUNCTYPE(None, ctypes.c_void_p)
 def _callback_stop_stream(data: ctypes.c_void_p) -> None:
-    with _managers_mtx:
-        mgr = _managers.get(data)
-        if mgr is not None:
-            with mgr._callback_stop_stream_mix:
-                cbk = mgr._callback_stop_stream
-                if cbk is not None:
-                    cbk()
+    mgr = _context_manager(data)
+    if mgr is not None:
+        with mgr._callback_stop_stream_mtx:
+            cbk = mgr._callback_stop_stream
+            if cbk is not None:
+                cbk()
 
 
 @ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t)
 def _callback_ota_update(data: ctypes.c_void_p, progress: int, total: int) -> None:
-    with _managers_mtx:
-        mgr = _managers.get(data)
-        if mgr is not None:
-            with mgr._callback_ota_update_mtx:
-                cbk = mgr._callback_ota_update
-                if cbk is not None:
-                    cbk(progress, total)
+    mgr = _context_manager(data)
+    if mgr is not None:
+        with mgr._callback_ota_update_mtx:
+            cbk = mgr._callback_ota_update
+            if cbk is not None:
+                cbk(progress, total)
 
 
 @ctypes.CFUNCTYPE(None, ctypes.c_void_p)
 def _callback_start_stream(data: ctypes.c_void_p) -> None:
-    with _managers_mtx:
-        mgr = _managers.get(data)
-        if mgr is not None:
-            with mgr._callback_start_stream_mix:
-                cbk = mgr._callback_start_stream
-                if cbk is not None:
-                    cbk()
+    mgr = _context_manager(data)
+    if mgr is not None:
+        with mgr._callback_start_stream_mtx:
+            cbk = mgr._callback_start_stream
+            if cbk is not None:
+                cbk()
 
 
 @ctypes.CFUNCTYPE(
     None, ctypes.POINTER(ctypes.c_void_p), ctypes.c_size_t, ctypes.c_void_p
 )
 def _callback_chunk(chunk_data: list, chunk_size: int, data: Any) -> None:
-    with _managers_mtx:
-        mgr = _managers.get(data)
-        if mgr is not None:
-            with mgr._callback_chunk_mtx:
-                cbk = mgr._callback_chunk
-                if cbk is not None:
-                    # Get channel sizes and type information
-                    types_ptr = ctypes.POINTER(ctypes.c_uint8)()
-                    types_size = ctypes.c_size_t()
-                    _dll.ba_eeg_manager_get_stream_channel_data_types(
-                        data, ctypes.byref(types_ptr), ctypes.byref(types_size)
+    mgr = _context_manager(data)
+    if mgr is not None:
+        with mgr._callback_chunk_mtx:
+            cbk = mgr._callback_chunk
+            if cbk is not None and mgr._dispatcher is not None:
+                mgr._dispatcher.put(chunk_data, chunk_size, mgr._get_stream_types())
+            elif cbk is not None and mgr._callback_chunk_contiguous:
+                record, layout = mgr._chunk_record(chunk_size)
+                for i, (address, nbytes) in enumerate(layout):
+                    ctypes.memmove(address, chunk_data[i], nbytes)
+                cbk(record, chunk_size)
+            elif cbk is not None:
+                pointer_types = mgr._chunk_pointer_types(chunk_size)
+                chunk_arrays = []
+                for i, pointer_type in enumerate(pointer_types):
+                    data_pointer = ctypes.cast(chunk_data[i], pointer_type)
+                    np_array = np.ctypeslib.as_array(
+                        data_pointer.contents, shape=(chunk_size,)
                     )
-                    types = [_types_map[types_ptr[i]] for i in range(types_size.value)]
+                    chunk_arrays.append(np_array)
 
-                    chunk_arrays = []
-                    for i, ctype in enumerate(types):
-                        data_pointer = ctypes.cast(
-                            chunk_data[i], ctypes.POINTER(ctype * chunk_size)
-                        )
-                        np_array = np.ctypeslib.as_array(
-                            data_pointer.contents, shape=(chunk_size,)
-                        )
-                        chunk_arrays.append(np_array)
-
-                    cbk(chunk_arrays, chunk_size)
+                cbk(chunk_arrays, chunk_size)
 
 
 @ctypes.CFUNCTYPE(None, ctypes.POINTER(BatteryInfo), ctypes.c_void_p)
 def _callback_battery(b_info, data) -> None:
-    with _managers_mtx:
-        mgr = _managers.get(data)
-        if mgr is not None:
-            with mgr._callback_battery_mtx:
-                cbk = mgr._callback_battery
-                if cbk is not None:
-                    cbk(copy.copy(b_info[0]))
+    mgr = _context_manager(data)
+    if mgr is not None:
+        with mgr._callback_battery_mtx:
+            cbk = mgr._callback_battery
+            if cbk is not None:
+                cbk(copy.copy(b_info[0]))
 
 
 @ctypes.CFUNCTYPE(None, ctypes.c_void_p)
 def _callback_load_config(data) -> None:
-    with _managers_mtx:
-        mgr = _managers.get(data)
-        if mgr is not None:
-            with mgr._callback_load_config_mtx:
-                cbk = mgr._callback_load_config
-                if cbk is not None:
-                    cbk()
+    mgr = _context_manager(data)
+    if mgr is not None:
+        with mgr._callback_load_config_mtx:
+            cbk = mgr._callback_load_config
+            if cbk is not None:
+                cbk()
 
 
 @ctypes.CFUNCTYPE(None, ctypes.c_void_p)
 def _callback_disconnect(data) -> None:
-    with _managers_mtx:
-        mgr = _managers.get(data)
-        if mgr is not None:
-            with mgr._callback_disconnect_mtx:
-                cbk = mgr._callback_disconnect
-                if cbk is not None:
-                    cbk()
+    mgr = _context_manager(data)
+    if mgr is not None:
+        with mgr._callback_disconnect_mtx:
+            cbk = mgr._callback_disconnect
+            if cbk is not None:
+                cbk()
 
 
 class EEGManager:
@@ -302,13 +439,28 @@ class EEGManager:
         self._callback_stop_stream_mtx = threading.Lock()
         self._callback_load_config_mtx = threading.Lock()
         self._callback_ota_update_mtx = threading.Lock()
+        # stream channel layout, cached while the configuration is unchanged
+        self._stream_types: Optional[list] = None
+        self._pointer_types: dict = {}
+        self._chunk_records: dict = {}
+        self._callback_chunk = None
+        self._callback_chunk_contiguous = False
+        self._dispatcher: Optional[_ChunkDispatcher] = None
+        self._callback_start_stream: Optional[Callable] = None
+        self._callback_stop_stream: Optional[Callable] = None
+        self._callback_load_config: Optional[Callable] = None
+        self._callback_battery: Optional[Callable] = None
+        self._callback_ota_update: Optional[Callable] = None
         self._manager = _dll.ba_eeg_manager_new()
-        with _managers_mtx:
-            _managers[self._manager] = self
+        # the py_object keeps the context alive while its pointer is in use
+        self._context = ctypes.py_object(_CallbackContext(self))
+        self._user_data = ctypes.cast(
+            ctypes.pointer(self._context), ctypes.c_void_p
+        )
 
         self._callback_disconnect = lambda: None
         _dll.ba_eeg_manager_set_callback_disconnect(
-            self._manager, _callback_disconnect, self._manager
+            self._manager, _callback_disconnect, self._user_data
         )
 
     def __enter__(self) -> "EEGManager":
@@ -317,6 +469,101 @@ class EEGManager:
     def __exit__(self, exc_type, exc_value, traceback) -> None:
         self.destroy()
 
+    def _invalidate_stream_types(self) -> None:
+        """Drops the cached stream channel layout after a configuration change."""
+        with self._callback_chunk_mtx:
+            self._stream_types = None
+            self._pointer_types = {}
+            self._chunk_records = {}
+
+    def _get_stream_types(self) -> list:
+        """Returns the cached ctypes type of every streamed channel.
+
+        The channel data types are queried from the device only when the
+        cache was invalidated. Must be called with `_callback_chunk_mtx`
+        held.
+
+        Returns
+        -------
+        list
+            One ctypes type per channel, in chunk order.
+        """
+        if self._stream_types is None:
+            types_ptr = ctypes.POINTER(ctypes.c_uint8)()
+            types_size = ctypes.c_size_t()
+            _dll.ba_eeg_manager_get_stream_channel_data_types(
+                self._manager, ctypes.byref(types_ptr), ctypes.byref(types_size)
+            )
+            self._stream_types = [
+                _types_map[types_ptr[i]] for i in range(types_size.value)
+            ]
+            self._pointer_types = {}
+            self._chunk_records = {}
+        return self._stream_types
+
+    def _chunk_record(self, chunk_size: int) -> tuple:
+        """Returns the reusable record filled by the contiguous chunk callback.
+
+        The record is a 0-d structured array with one field per channel,
+        named by the channel position in the chunk (``"0"``, ``"1"``, ...),
+        holding `chunk_size` samples in the channel's native type. All
+        channels share one contiguous block of memory. Must be called with
+        `_callback_chunk_mtx` held.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of samples in the chunk.
+
+        Returns
+        -------
+        tuple
+            The record and a list of ``(address, nbytes)`` destinations, one
+            per channel.
+        """
+        entry = self._chunk_records.get(chunk_size)
+        if entry is None:
+            dtype = np.dtype(
+                [
+                    (str(i), np.dtype(ctype), (chunk_size,))
+                    for i, ctype in enumerate(self._get_stream_types())
+                ]
+            )
+            record = np.zeros((), dtype=dtype)
+            layout = [
+                (
+                    record.ctypes.data + dtype.fields[name][1],
+                    dtype.fields[name][0].itemsize,
+                )
+                for name in dtype.names
+            ]
+            entry = (record, layout)
+            self._chunk_records[chunk_size] = entry
+        return entry
+
+    def _chunk_pointer_types(self, chunk_size: int) -> list:
+        """Returns the ctypes pointer type of every channel in a chunk.
+
+        Pointer types are built once per chunk size. Must be called with
+        `_callback_chunk_mtx` held.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of samples in the chunk.
+
+        Returns
+        -------
+        list
+            One ``POINTER(ctype * chunk_size)`` type per channel.
+        """
+        pointer_types = self._pointer_types.get(chunk_size)
+        if pointer_types is None:
+            types = self._get_stream_types()
+            pointer_types = [ctypes.POINTER(ctype * chunk_size) for ctype in types]
+            self._pointer_types[chunk_size] = pointer_types
+        return pointer_types
+
     def destroy(self) -> None:
         """Releases all resources associated with the EEG manager.
 
@@ -328,9 +575,10 @@ class EEGManager:
         This method must be called exactly once.
         """
         self.disconnect()  # prevent callback deadlock by disconnecting first.
-        with _managers_mtx:
-            _dll.ba_eeg_manager_free(self._manager)
-            del _managers[self._manager]
+        self.set_callback_chunk(None)
+        _dll.ba_eeg_manager_free(self._manager)
+        # late callbacks still holding the user data find no manager
+        self._context.value.manager = None
 
     def disconnect(self) -> None:
         """Disconnects from the device, if a connection is active."""
@@ -364,6 +612,7 @@ class EEGManager:
             If the connection could not be established.
         """
         cbk, _ = _callback()
+        self._invalidate_stream_types()
         self.connection_success = _dll.ba_eeg_manager_connect(
             self._manager, ctypes.c_char_p(bt_device_name.encode("ascii")), cbk, None)
         if self.connection_success == 2:
@@ -411,9 +660,10 @@ class EEGManager:
 
         if self.is_streaming():
             raise BrainAccessException("Stream already running")
+        self._invalidate_stream_types()
         return _handle_error(
             _dll.ba_eeg_manager_start_stream(
-                self._manager, _callback_start_stream, self._manager
+                self._manager, _callback_start_stream, self._user_data
             )
         )
 
@@ -447,7 +697,9 @@ class EEGManager:
         if not self.is_streaming():
             raise BrainAccessException("Stream not running")
         return _handle_error(
-            _dll.ba_eeg_manager_stop_stream(self._manager, _callback_stop_stream, None)
+            _dll.ba_eeg_manager_stop_stream(
+                self._manager, _callback_stop_stream, self._user_data
+            )
         )
 
     def is_streaming(self) -> bool:
@@ -476,9 +728,10 @@ class EEGManager:
             with self._callback_load_config_mtx:
                 self._callback_load_config = lambda: None
 
+        self._invalidate_stream_types()
         _handle_error(
             _dll.ba_eeg_manager_load_config(
-                self._manager, _callback_load_config, self._manager
+                self._manager, _callback_load_config, self._user_data
             )
         )
 
@@ -518,6 +771,7 @@ class EEGManager:
         _dll.ba_eeg_manager_set_channel_enabled(
             self._manager, ctypes.c_uint16(channel), ctypes.c_bool(state)
         )
+        self._invalidate_stream_types()
 
     def set_channel_gain(self, channel: int, gain: GainMode) -> None:
         """Sets the gain mode for a specific channel.
@@ -700,7 +954,9 @@ class EEGManager:
         rate_value = StreamRate(_dll.ba_eeg_manager_get_sample_frequency(self._manager))
         return rate_value.to_hz
 
-    def set_callback_chunk(self, f: Callable) -> None:
+    def set_callback_chunk(
+        self, f: Optional[Callable], contiguous: bool = False, queue_size: int = 0
+    ) -> None:
         """Sets a callback function to be executed when a new data chunk is available.
 
         Warning
@@ -709,18 +965,66 @@ class EEGManager:
         shared data is properly synchronized and that the callback executes
         quickly to avoid blocking communication with the device.
 
+        The chunk passed to the callback is only valid while the callback
+        runs. In the default mode the arrays are views of device memory; in
+        contiguous and queued modes the record is reused for later chunks.
+        Copy the data if it must outlive the callback.
+
         Parameters
         ----------
         f : callable
             The function to be called. It should accept a list of NumPy arrays
             (one for each channel) and the chunk size as arguments.
             Set to `None` to disable the callback.
+        contiguous : bool, optional
+            Instead of a list of views, pass a single preallocated structured
+            record with one field per channel (``record["0"]``,
+            ``record["1"]``, ...), each holding the chunk samples in the
+            channel's native type. The channels are copied into one block of
+            memory with `ctypes.memmove`, by default False.
+        queue_size : int, optional
+            If positive, the device thread only copies chunks into a ring of
+            `queue_size` contiguous records and `f` runs on a dedicated
+            worker thread. When the ring is full new chunks are dropped, see
+            `get_dispatch_stats`. Implies `contiguous`. By default 0, `f`
+            runs on the device thread.
         """
+        dispatcher = _ChunkDispatcher(f, queue_size) if f and queue_size > 0 else None
         with self._callback_chunk_mtx:
+            previous = self._dispatcher
             self._callback_chunk = f
+            self._callback_chunk_contiguous = contiguous
+            self._dispatcher = dispatcher
             _dll.ba_eeg_manager_set_callback_chunk(
-                self._manager, _callback_chunk if f is not None else None, self._manager
+                self._manager,
+                _callback_chunk if f is not None else None,
+                self._user_data,
             )
+        if previous is not None:
+            previous.stop()
+
+    def get_dispatch_stats(self) -> dict:
+        """Retrieves the counters of the queued chunk dispatch.
+
+        Returns
+        -------
+        dict
+            A dictionary with the keys:
+            - "delivered": Chunks passed to the callback.
+            - "dropped": Chunks dropped because the queue was full.
+            - "pending": Chunks waiting in the queue.
+            - "max_pending": Highest number of chunks waiting at once.
+            - "capacity": Size of the queue.
+
+        Raises
+        ------
+        BrainAccessException
+            If the chunk callback was not set with a `queue_size`.
+        """
+        dispatcher = self._dispatcher
+        if dispatcher is None:
+            raise BrainAccessException("Queued chunk dispatch is not enabled")
+        return dispatcher.stats()
 
     def set_callback_battery(self, callback: Union[Callable, None] = None) -> None:
         """Sets a callback function to be executed when the battery status is updated.
@@ -750,7 +1054,7 @@ class EEGManager:
         _dll.ba_eeg_manager_set_callback_battery(
             self._manager,
             _callback_battery,
-            self._manager,
+            self._user_data,
         )
 
     def set_callback_disconnect(self, callback: Optional[Callable] = None) -> None:
@@ -774,7 +1078,7 @@ class EEGManager:
             with self._callback_disconnect_mtx:
                 self._callback_disconnect = callback
         _dll.ba_eeg_manager_set_callback_disconnect(
-            self._manager, _callback_disconnect, self._manager
+            self._manager, _callback_disconnect, self._user_data
         )
 
     def annotate(self, annotation: str) -> None:
@@ -868,7 +1172,7 @@ class EEGManager:
 
         _handle_error(
             _dll.ba_eeg_manager_start_update(
-                self._manager, _callback_ota_update, self._manager
+                self._manager, _callback_ota_update, self._user_data
             )
         )
 
@@ -915,6 +1219,7 @@ class EEGManager:
                 raise BrainAccessException(
                     f"{device_model.name} supports sample rates up to 500Hz."
                 )
+        self._invalidate_stream_types()
         return _handle_error(
             _dll.ba_eeg_manager_set_data_stream_rate(
                 self._manager, ctypes.c_uint8(_sample_rate.value)
@@ -1,3 +1,4 @@
+import asyncio
 import typing
 import time
 import threading
@@ -10,8 +11,21 @@ import brainaccess.core.eeg_channel as eeg_channel
 from brainaccess.core.gain_mode import GainMode, multiplier_to_gain_mode
 from brainaccess.core.eeg_manager import EEGManager
 from brainaccess.core.impedance_measurement_mode import ImpedanceMeasurementMode
-from brainaccess.core.device_features import DeviceFeatures
+from brainaccess.utils.buffers import (
+    GrowableBuffer,
+    RingBuffer,
+    SpillBuffer,
+    TypedBuffer,
+    chunk_rows,
+)
+from brainaccess.utils.async_stream import AsyncChunkStream
+from brainaccess.utils.chunk_index import ChunkIndex
 from brainaccess.utils.exceptions import BrainAccessException
+from brainaccess.utils.gaps import GapIndex
+from brainaccess.utils.recorder import StreamRecorder
+from brainaccess.utils.shared_ring import SharedRingWriter
+from brainaccess.utils.streaming import StreamingDecimator
+from brainaccess.utils.subscription import Subscription
 
 
 
@@ -23,17 +37,50 @@ class EEG:
     def __init__(
         self,
         mode: str = "accumulate",
+        spill_path: typing.Optional[str] = None,
+        spill_hot_seconds: float = 10.0,
+        dispatch_queue: int = 0,
+        decimation: int = 1,
+        keep_full_rate: bool = False,
     ) -> None:
         """Creates EEG object and initializes device with default parameters.
 
         Parameters
         ------------
         mode: str
-            Data storage modes accumulate (all data is accumulated in array)
+            Data storage modes accumulate (all data is accumulated in array),
+            spill (all data is accumulated in a memory-mapped file)
             or roll (only last x seconds preserved)
+        spill_path: str, optional
+            File used by the spill mode. Every channel data type is spilled
+            to its own file, named by inserting the type before the suffix.
+            Defaults to a timestamped file in the working directory.
+        spill_hot_seconds: float
+            Seconds of data kept in memory before spilling to the file.
+        dispatch_queue: int
+            Number of chunks queued between the device thread and the thread
+            storing them, see `EEGManager.set_callback_chunk`. By default 0,
+            chunks are stored directly on the device thread. A queue keeps
+            slow subscribers from stalling the device, at the cost of
+            dropping chunks when it fills up.
+        decimation: int
+            Keep every `decimation`-th sample after anti-alias filtering, so
+            the stored data, MNE structures and subscribers run at the
+            device rate / `decimation`. 1 disables decimation.
+        keep_full_rate: bool
+            When decimating, also store the undecimated data in `full_data`.
 
         """
         self.directory = pathlib.Path.cwd()
+        self.spill_path = spill_path
+        self.spill_hot_seconds = spill_hot_seconds
+        self.dispatch_queue = dispatch_queue
+        if decimation < 1:
+            raise BrainAccessException("Decimation factor must be at least 1")
+        self.decimation = decimation
+        self.keep_full_rate = keep_full_rate
+        self.decimator: typing.Optional[StreamingDecimator] = None
+        self.full_data: typing.Optional[typing.Union[EEGData, EEGData_roll]] = None
         self.wait_max: int = 2
         self.time_step: float = 0.5
         self.impedances: dict = {}
@@ -41,6 +88,13 @@ class EEG:
         self.bias_channels: typing.Optional[list] = None
         self.mode: str = mode
         self.gain: GainMode = GainMode.X8
+        self.recorder: typing.Optional[StreamRecorder] = None
+        # called after every stored chunk; replaced, never mutated, so the
+        # acquisition thread iterates it without a lock
+        self._listeners: list = []
+        self._listeners_lock = threading.Lock()
+        self.shared: typing.Optional[SharedRingWriter] = None
+        self._shared_subscription: typing.Optional[Subscription] = None
         bacore.init()
 
     def setup(
@@ -61,6 +115,7 @@ class EEG:
         bias: typing.Optional[list] = None,
         gain: int = 8,
         sfreq: int = 250,
+        streaming_flag: bool = False,
     ) -> None:
         """Connects to device and sets channels
 
@@ -78,6 +133,11 @@ class EEG:
             A list of channels to use for bias.
         gain: int
             The gain to use for the EEG channels.
+        sfreq: int
+            The sampling frequency to stream with.
+        streaming_flag: bool
+            Also acquire the streaming channel, which is 0 for samples the
+            device zero-filled after a Bluetooth loss, so `gaps` marks them.
 
         Raises
         ------
@@ -86,9 +146,11 @@ class EEG:
         """
         self.mgr = mgr
         self.sfreq = sfreq
-        devices = bacore.scan()
-        if len(devices) == 0:
-            self._error("No devices found")
+        if isinstance(mgr, EEGManager):
+            # virtual devices need no Bluetooth scan
+            devices = bacore.scan()
+            if len(devices) == 0:
+                self._error("No devices found")
         self.zeros_at_start = zeros_at_start
         if bias:
             self.bias_channels = bias
@@ -122,8 +184,7 @@ class EEG:
             self.channels_type[eeg_channel.ELECTRODE_MEASUREMENT + electrode] = "EEG"
             self.channels_indexes[eeg_channel.ELECTRODE_MEASUREMENT + electrode] = 0
         if self.mgr.is_connected():
-            info = self.mgr.get_device_info()
-            features = DeviceFeatures(info)
+            features = self.mgr.get_device_features()
             if features.has_accel():
                 self.eeg_channels[eeg_channel.ACCELEROMETER + 0] = "Accel_x"
                 self.eeg_channels[eeg_channel.ACCELEROMETER + 1] = "Accel_y"
@@ -137,19 +198,96 @@ class EEG:
         self.eeg_channels[eeg_channel.SAMPLE_NUMBER] = "Sample"
         self.channels_type[eeg_channel.SAMPLE_NUMBER] = "Sample"
         self.channels_indexes[eeg_channel.SAMPLE_NUMBER] = 0
-        eeg_info = self._create_info()
+        if streaming_flag:
+            self.eeg_channels[eeg_channel.STREAMING] = "Streaming"
+            self.channels_type[eeg_channel.STREAMING] = "Streaming"
+            self.channels_indexes[eeg_channel.STREAMING] = 0
+        device_sfreq = self.mgr.get_sample_frequency()
+        eeg_info = self._create_info(device_sfreq / self.decimation)
         self.info = eeg_info
         self.chans = len(self.info.ch_names)
+        self.lock = threading.Lock()
+        if self.mode == "spill" and self.spill_path is None:
+            self.spill_path = str(
+                self.directory / f'{time.strftime("%Y%m%d_%H%M%S")}-spill.dat'
+            )
+        self.data: typing.Union[EEGData, EEGData_roll] = self._create_data(
+            eeg_info, self.lock, self.spill_path, self.decimation
+        )
+        self.gaps = GapIndex(offset=zeros_at_start, step=self.decimation)
+        self.chunk_index = ChunkIndex(
+            eeg_info["sfreq"],
+            offset=zeros_at_start,
+            step=self.decimation,
+            # roll mode only keeps the last zeros_at_start samples
+            capacity=zeros_at_start if self.mode == "roll" else None,
+        )
+        self.decimator = None
+        self.full_data = None
+        if self.decimation > 1:
+            self.decimator = StreamingDecimator(self.decimation)
+            if self.keep_full_rate:
+                spill_path = None
+                if self.spill_path is not None:
+                    path = pathlib.Path(self.spill_path)
+                    spill_path = str(path.with_name(f"{path.stem}.full{path.suffix}"))
+                self.full_data = self._create_data(
+                    self._create_info(device_sfreq),
+                    threading.Lock(),
+                    spill_path,
+                    1,
+                    zeros_at_start=zeros_at_start * self.decimation,
+                )
+
+    def _create_data(
+        self,
+        info: mne.Info,
+        lock: threading.Lock,
+        spill_path: typing.Optional[str],
+        sample_step: int,
+        zeros_at_start: typing.Optional[int] = None,
+    ) -> typing.Union["EEGData", "EEGData_roll"]:
+        """Creates the data storage of the acquisition mode.
+
+        Parameters
+        ----------
+        info: mne.Info
+            Info of the stored data.
+        lock: threading.Lock
+            Lock shared with the acquisition callback.
+        spill_path: str, optional
+            File used by the spill mode.
+        sample_step: int
+            Device samples per stored sample.
+        zeros_at_start: int, optional
+            Number of zeros to add at the beginning, by default the setup value.
+
+        Returns
+        -------
+        EEGData or EEGData_roll
+            The data storage.
+        """
+        if zeros_at_start is None:
+            zeros_at_start = self.zeros_at_start
         if self.mode == "accumulate":
-            self.lock = threading.Lock()
-            self.data: typing.Union[EEGData, EEGData_roll] = EEGData(
-                eeg_info, lock=self.lock, zeros_at_start=zeros_at_start
+            return EEGData(
+                info,
+                lock=lock,
+                zeros_at_start=zeros_at_start,
+                sample_step=sample_step,
             )
-        else:
-            self.lock = threading.Lock()
-            self.data = EEGData_roll(
-                eeg_info, lock=self.lock, zeros_at_start=zeros_at_start
+        elif self.mode == "spill":
+            return EEGData(
+                info,
+                lock=lock,
+                zeros_at_start=zeros_at_start,
+                spill_path=spill_path,
+                hot_samples=int(self.spill_hot_seconds * info["sfreq"]),
+                sample_step=sample_step,
             )
+        return EEGData_roll(
+            info, lock=lock, zeros_at_start=zeros_at_start, sample_step=sample_step
+        )
 
     def _set_channels(self):
         """Set the channels to be enabled."""
@@ -172,6 +310,12 @@ class EEG:
 
     def close(self):
         """Close device connection."""
+        if self.shared is not None:
+            self.stop_sharing()
+        if self.mode == "spill":
+            self.data.close()
+            if self.full_data is not None:
+                self.full_data.close()
         bacore.close()
 
     def _start_acquisition(self):
@@ -182,10 +326,10 @@ class EEG:
         for idx, value in enumerate(list(self.eeg_channels.keys())):
             if self.channels_type[value] == "EEG":
                 self.mgr.set_channel_gain(value, self.gain)
-        if self.mode == "accumulate":
-            self.mgr.set_callback_chunk(self._acq)
-        else:
-            self.mgr.set_callback_chunk(self._acq_roll)
+        # every mode stores chunks the same way, the storage differs
+        self.mgr.set_callback_chunk(
+            self._acq, contiguous=True, queue_size=self.dispatch_queue
+        )
         self.mgr.set_sample_rate(self.sfreq)
         self.mgr.load_config()
         try:
@@ -194,6 +338,11 @@ class EEG:
             raise BrainAccessException("Could not start stream")
         for key in self.channels_indexes.keys():
             self.channels_indexes[key] = self.mgr.get_channel_index(key)
+        # rows of subscriptions made before the stream started were
+        # resolved with the placeholder indexes
+        for listener in self._listeners:
+            if isinstance(listener, Subscription):
+                listener.rows = self._channel_rows(listener.channels)
 
     def start_acquisition(self):
         """Starts streaming and collecting data."""
@@ -202,6 +351,8 @@ class EEG:
     def _stop_acquisition(self):
         """Stops the data acquisition stream."""
         self.mgr.stop_stream()
+        # stores the chunks still queued for dispatch
+        self.mgr.set_callback_chunk(None)
 
     def stop_acquisition(self):
         """Stops the data acquisition stream."""
@@ -210,6 +361,8 @@ class EEG:
     def get_annotations(self) -> dict:
         """Returns annotations from the data stream."""
         self.data.annotations = self.mgr.get_annotations()
+        if self.full_data is not None:
+            self.full_data.annotations = self.data.annotations
         return self.data.annotations
 
     def annotate(self, msg: str) -> None:
@@ -222,11 +375,66 @@ class EEG:
         """
         self.mgr.annotate(msg)
 
+    def start_recording(
+        self, fname: str, flush_interval: float = 1.0
+    ) -> StreamRecorder:
+        """Starts streaming acquired chunks to disk.
+
+        Chunks are appended to ``fname + ".part"`` on a background thread
+        while they arrive, and converted to a FIF file by `stop_recording`.
+
+        Parameters
+        ----------
+        fname: str
+            FIF file to write.
+        flush_interval: float
+            Seconds between batched writes.
+
+        Returns
+        -------
+        StreamRecorder
+            The active recorder.
+
+        Raises
+        ------
+        BrainAccessException
+            If a recording is already running.
+        """
+        if self.recorder is not None:
+            raise BrainAccessException("Recording already running")
+        self.recorder = StreamRecorder(fname, flush_interval=flush_interval)
+        return self.recorder
+
+    def stop_recording(self) -> pathlib.Path:
+        """Stops the recording and writes the FIF file.
+
+        Returns
+        -------
+        pathlib.Path
+            Path of the written FIF file.
+
+        Raises
+        ------
+        BrainAccessException
+            If no recording is running.
+        """
+        if self.recorder is None:
+            raise BrainAccessException("No recording running")
+        recorder, self.recorder = self.recorder, None
+        return recorder.finalize(
+            self.info,
+            channels_indexes=list(self.channels_indexes.values()),
+            annotations=self.mgr.get_annotations(),
+            sample_row=self.channels_indexes[eeg_channel.SAMPLE_NUMBER],
+            sample_step=self.decimation,
+        )
+
     def get_mne(
         self,
         tim: typing.Optional[float] = None,
         samples: typing.Optional[int] = None,
         annotations: bool = True,
+        copy: bool = True,
     ) -> mne.io.BaseRaw:
         """Return MNE structure.
         If tim is None, returns all data; otherwise, returns the last `tim` seconds.
@@ -239,6 +447,10 @@ class EEG:
             Number of samples.
         annotations: bool
             Whether to include annotations.
+        copy: bool
+            Whether to copy the data. In accumulate mode, False returns a
+            structure sharing memory with the cached history, which must not
+            be modified in place.
 
         Returns
         -------
@@ -252,43 +464,422 @@ class EEG:
             tim=tim,
             samples=samples,
             channels_indexes=list(self.channels_indexes.values()),
+            copy=copy,
         )
         return self.data.mne_raw
 
+    def get_window(
+        self,
+        samples: int,
+        channels: typing.Optional[list] = None,
+    ) -> np.ndarray:
+        """Return the most recent samples as an array, without MNE.
+
+        Fewer samples are returned if the acquisition has not collected
+        `samples` yet.
+
+        Parameters
+        ----------
+        samples: int
+            Number of samples to return.
+        channels: list, optional
+            Channel names to return, in the given order. If None, all
+            channels are returned in the `channels_indexes` order.
+
+        Returns
+        -------
+        np.ndarray
+            Data array, shape (channels, samples).
+
+        Raises
+        ------
+        BrainAccessException
+            If a requested channel is not acquired.
+        """
+        return self.data.get_latest(samples, rows=self._channel_rows(channels))
+
+    def get_range(
+        self,
+        t_start: float,
+        t_end: float,
+        channels: typing.Optional[list] = None,
+    ) -> np.ndarray:
+        """Return the samples acquired between two host times.
+
+        Times are located with a binary search over the times the chunks
+        were stored at, e.g. to get the data before an alert fired. With a
+        dispatch queue a chunk is stored after its queue delay, which
+        shifts the located samples by that delay. In roll mode only samples
+        still in the buffer are returned.
+
+        Parameters
+        ----------
+        t_start: float
+            Host time of the first sample, as returned by `time.time`.
+        t_end: float
+            Host time after the last sample.
+        channels: list, optional
+            Channel names to return, in the given order. If None, all
+            channels are returned in the `channels_indexes` order.
+
+        Returns
+        -------
+        np.ndarray
+            Data array, shape (channels, samples).
+        """
+        return self.data.get_range(
+            self.chunk_index.position_of_time(t_start),
+            self.chunk_index.position_of_time(t_end),
+            rows=self._channel_rows(channels),
+        )
+
+    def get_range_by_sample(
+        self,
+        n0: int,
+        n1: int,
+        channels: typing.Optional[list] = None,
+    ) -> np.ndarray:
+        """Return the samples between two device sample numbers.
+
+        Sample numbers are those of the ``Sample`` channel and of the
+        annotation timestamps, so e.g. the 10 s around an annotation are
+        ``get_range_by_sample(ts - 5 * sfreq, ts + 5 * sfreq)`` with the device
+        sampling rate. In roll mode only samples still in the buffer are
+        returned.
+
+        Parameters
+        ----------
+        n0: int
+            Sample number of the first sample.
+        n1: int
+            Sample number after the last sample.
+        channels: list, optional
+            Channel names to return, in the given order. If None, all
+            channels are returned in the `channels_indexes` order.
+
+        Returns
+        -------
+        np.ndarray
+            Data array, shape (channels, samples).
+        """
+        return self.data.get_range(
+            self.chunk_index.position_of_sample(n0),
+            self.chunk_index.position_of_sample(n1),
+            rows=self._channel_rows(channels),
+        )
+
+    def is_window_intact(self, samples: int) -> bool:
+        """Checks that no samples were lost in the most recent samples.
+
+        The check is a binary search in the gap index built while chunks
+        arrive, so corrupted windows can be skipped before any processing.
+
+        Parameters
+        ----------
+        samples: int
+            Window length.
+
+        Returns
+        -------
+        bool
+            True if the last `samples` samples contain no packet loss.
+        """
+        return self.gaps.is_latest_intact(samples)
+
+    def astream(
+        self,
+        loop: typing.Optional[asyncio.AbstractEventLoop] = None,
+        hop: typing.Optional[int] = None,
+        window: typing.Optional[int] = None,
+        channels: typing.Optional[list] = None,
+        max_pending: int = 16,
+        drop: str = "oldest",
+    ) -> AsyncChunkStream:
+        """Returns an async iterator over the acquired data.
+
+        Without `hop` every stored chunk is yielded as an array of the new
+        samples. With `hop` the latest `window` samples are yielded every
+        time `hop` new samples arrive. Hops are chunk-aligned, see
+        `subscribe`, so every item is a ``(data, new_samples)`` tuple, where
+        `new_samples` counts the samples stored since the previous item.
+        Close the stream when done, or use it as an async context manager.
+
+        Parameters
+        ----------
+        loop: asyncio.AbstractEventLoop, optional
+            Event loop of the consumer. Defaults to the running loop.
+        hop: int, optional
+            Number of new samples between windows.
+        window: int, optional
+            Window length in samples, by default the new samples.
+        channels: list, optional
+            Channel names to yield, in the given order. If None, all
+            channels are yielded in the `channels_indexes` order.
+        max_pending: int
+            Maximum number of items waiting for the consumer.
+        drop: str
+            Item dropped when the consumer falls behind, "oldest" or
+            "newest".
+
+        Returns
+        -------
+        AsyncChunkStream
+            Async iterator of ``(data, new_samples)`` tuples, `data` with
+            shape (channels, samples).
+        """
+        stream = AsyncChunkStream(
+            loop if loop is not None else asyncio.get_running_loop(),
+            max_pending=max_pending,
+            drop=drop,
+        )
+        subscription = self.subscribe(
+            lambda data, new_samples: stream.put((data, new_samples)),
+            hop_samples=hop,
+            window_samples=window,
+            channels=channels,
+        )
+        stream.on_close = subscription.cancel
+        return stream
+
+    def subscribe(
+        self,
+        callback: typing.Callable[[np.ndarray, int], None],
+        hop_samples: typing.Optional[int] = None,
+        window_samples: typing.Optional[int] = None,
+        channels: typing.Optional[list] = None,
+    ) -> Subscription:
+        """Registers a consumer of the acquired data.
+
+        The callback runs on the acquisition thread and receives the latest
+        `window_samples` samples every time `hop_samples` new samples have
+        been stored, together with the number of samples stored since its
+        previous call. Hops are chunk-aligned: the call happens on the
+        chunk completing the hop, so the count is usually larger than
+        `hop_samples`, and a chunk completing several hops triggers one
+        call. Use the count, not `hop_samples`, to find the new data at the
+        end of the window. All consumers read from the one acquisition buffer, and
+        consumers asking for the same window and channels at the same time
+        receive the same array, which must therefore not be modified.
+        Arrays that share memory with the buffer stay valid only in
+        accumulate mode; copy the data to keep it in roll mode.
+
+        Parameters
+        ----------
+        callback: callable
+            Function called with an array of shape (channels, samples) and
+            the number of new samples. It should return quickly.
+        hop_samples: int, optional
+            Number of new samples between calls. If None, the callback is
+            called for every chunk.
+        window_samples: int, optional
+            Number of samples passed to the callback. Defaults to the
+            samples stored since the previous call. A fixed window must be
+            at least the longest chunk plus `hop_samples` to hold them all.
+        channels: list, optional
+            Channel names to pass, in the given order. If None, all channels
+            are passed in the `channels_indexes` order.
+
+        Returns
+        -------
+        Subscription
+            Handle to pass to `unsubscribe`.
+
+        Raises
+        ------
+        BrainAccessException
+            If a requested channel is not acquired.
+        """
+        subscription = Subscription(
+            callback,
+            self._channel_rows(channels),
+            hop=hop_samples,
+            window=window_samples,
+            on_cancel=self._remove_listener,
+            channels=channels,
+        )
+        self._add_listener(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Removes a consumer registered with `subscribe`.
+
+        Parameters
+        ----------
+        subscription: Subscription
+            Handle returned by `subscribe`.
+        """
+        subscription.cancel()
+
+    def share(
+        self,
+        name: typing.Optional[str] = None,
+        seconds: float = 10.0,
+        dtype: typing.Any = np.float64,
+    ) -> SharedRingWriter:
+        """Mirrors the acquired data into a shared memory ring buffer.
+
+        Other processes attach with
+        `brainaccess.utils.shared_ring.SharedRingReader` using the returned
+        writer's `name`, and read windows without going through this
+        process. Channels are stored in the `channels_indexes` order.
+
+        Parameters
+        ----------
+        name: str, optional
+            Name of the shared memory block. Generated if None.
+        seconds: float
+            Length of the ring buffer.
+        dtype: numpy dtype
+            Type samples are stored with.
+
+        Returns
+        -------
+        SharedRingWriter
+            The writer, its `name` identifies the buffer.
+
+        Raises
+        ------
+        BrainAccessException
+            If the data is already shared.
+        """
+        if self.shared is not None:
+            raise BrainAccessException("Data is already shared")
+        self.shared = SharedRingWriter(
+            self.info.ch_names,
+            self.info["sfreq"],
+            int(seconds * self.info["sfreq"]),
+            name=name,
+            dtype=dtype,
+        )
+        writer = self.shared
+        self._shared_subscription = self.subscribe(
+            lambda chunk, new_samples: writer.write(chunk)
+        )
+        return self.shared
+
+    def stop_sharing(self) -> None:
+        """Stops mirroring data and removes the shared memory block.
+
+        Raises
+        ------
+        BrainAccessException
+            If the data is not shared.
+        """
+        if self.shared is None or self._shared_subscription is None:
+            raise BrainAccessException("Data is not shared")
+        self.unsubscribe(self._shared_subscription)
+        self.shared.close()
+        self.shared = None
+        self._shared_subscription = None
+
+    def _add_listener(self, listener: typing.Callable) -> None:
+        """Registers a function called after every stored chunk."""
+        with self._listeners_lock:
+            self._listeners = self._listeners + [listener]
+
+    def _remove_listener(self, listener: typing.Callable) -> None:
+        """Unregisters a chunk listener."""
+        with self._listeners_lock:
+            self._listeners = [x for x in self._listeners if x is not listener]
+
+    def _notify(self, chunk_size: int) -> None:
+        """Calls the chunk listeners after a chunk was stored.
+
+        Listeners get the chunk size and a reader. Identical reads are done
+        once per chunk and shared between the listeners.
+        """
+        listeners = self._listeners
+        if not listeners:
+            return
+        reads: dict = {}
+
+        def read(samples: int, rows: list) -> np.ndarray:
+            key = (samples, tuple(rows))
+            if key not in reads:
+                reads[key] = self.data.get_latest(samples, rows=rows)
+            return reads[key]
+
+        for listener in listeners:
+            listener(chunk_size, read)
+
+    def _channel_rows(self, channels: typing.Optional[list] = None) -> list:
+        """Chunk rows of the given channel names in the `channels_indexes` order."""
+        if channels is None:
+            return list(self.channels_indexes.values())
+        names = {name: chan for chan, name in self.eeg_channels.items()}
+        try:
+            return [self.channels_indexes[names[name]] for name in channels]
+        except KeyError as e:
+            raise BrainAccessException(f"Channel {e} is not acquired")
+
     def _acq(self, chunk, chunk_size):
-        """function to acquire data with callback
+        """function to acquire data with callback, in every storage mode
         Parameters
         ----------
         chunk
-            data chunk from device
+            data chunk from device, a record reused by the manager, so it is
+            copied into the storage before returning
         chunk_size: int
             size of the chunk
         """
-        self.data.data.append(np.array(chunk))
+        if self.decimator is not None:
+            chunk, chunk_size = self._decimate(chunk)
+            if chunk_size == 0:
+                return
+        self.data.append(chunk)
+        self._index_chunk(chunk, chunk_size)
+        # stop_recording can clear the attribute while the chunk is handled
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.push(chunk)
+        self._notify(chunk_size)
+
+    def _index_chunk(self, chunk, chunk_size: int) -> None:
+        """Adds a stored chunk to `gaps` and `chunk_index`."""
+        rows = chunk_rows(chunk)
+        sample_numbers = rows[self.channels_indexes[eeg_channel.SAMPLE_NUMBER]]
+        streaming = self.channels_indexes.get(eeg_channel.STREAMING)
+        self.gaps.update(
+            sample_numbers, rows[streaming] if streaming is not None else None
+        )
+        self.chunk_index.add(chunk_size, sample_numbers[0])
+
+    def _decimate(self, chunk) -> typing.Tuple[list, int]:
+        """Stores the full rate chunk if requested and decimates it.
 
-    def _acq_roll(self, chunk, chunk_size):
-        """function to acquire fixed size data with callback
         Parameters
         ----------
         chunk
             data chunk from device
-        chunk_size: int
-            size of the chunk
+
+        Returns
+        -------
+        tuple
+            The decimated chunk and its size, which can be 0.
         """
-        self.data.data = np.roll(self.data.data, -chunk_size, axis=1)
-        self.data.data[:, -chunk_size:] = np.array(chunk)
+        if self.full_data is not None:
+            self.full_data.append(chunk)
+        chunk = self.decimator.process(chunk)  # type: ignore
+        return chunk, len(chunk[0])
+
+    def _create_info(self, sampling_freq: typing.Optional[float] = None):
+        """mne info structure creation
 
-    def _create_info(self):
-        """mne info structure creation"""
+        Parameters
+        ----------
+        sampling_freq: float, optional
+            Sampling frequency of the stored data, by default the device one.
+        """
         import brainaccess.core.eeg_channel as eeg_channel
 
-        sampling_freq = self.mgr.get_sample_frequency()
+        if sampling_freq is None:
+            sampling_freq = self.mgr.get_sample_frequency()
         ch_names = [x for x in self.eeg_channels.values()]
         sample_channels = len(
             [
                 x
                 for x in list(self.eeg_channels.keys())
-                if x == eeg_channel.SAMPLE_NUMBER
+                if x in (eeg_channel.SAMPLE_NUMBER, eeg_channel.STREAMING)
             ]
         )
         digital_channels = len(
@@ -302,7 +893,7 @@ class EEG:
             [
                 x
                 for x in list(self.eeg_channels.keys())
-                if x >= eeg_channel.ACCELEROMETER
+                if eeg_channel.ACCELEROMETER <= x < eeg_channel.STREAMING
             ]
         )
         non_eeg_channels = sample_channels + digital_channels + acc_channels
@@ -329,7 +920,7 @@ class EEG:
 class EEGData_roll:
     """Data structure to store rolling EEG data buffer"""
 
-    def __init__(self, info, lock, zeros_at_start: int = 1):
+    def __init__(self, info, lock, zeros_at_start: int = 1, sample_step: int = 1):
         """Initializes the EEGData_roll object.
 
         Parameters
@@ -340,6 +931,9 @@ class EEGData_roll:
             The threading lock.
         zeros_at_start : int, optional
             The number of zeros to add at the beginning of the data, by default 1.
+        sample_step : int, optional
+            Device samples per stored sample, e.g. the decimation factor,
+            used to place annotations. By default 1.
 
         Raises
         ------
@@ -348,15 +942,91 @@ class EEGData_roll:
         """
         if not lock:
             raise BrainAccessException("No lock passed")
+        if zeros_at_start <= 0:
+            raise BrainAccessException("Buffer capacity must be positive")
         self.eeg_info: mne.Info = info
         self.mne_raw: mne.io.BaseRaw
         self.chans = len(info.ch_names)
         self.zeros_at_start = zeros_at_start
-        self.data = np.zeros((self.chans, self.zeros_at_start))
+        self.sample_step = sample_step
+        # rows are kept in their native types, laid out on the first chunk
+        self.buffer = TypedBuffer(
+            self.chans,
+            lambda n_rows, dtype, group: RingBuffer(
+                n_rows, self.zeros_at_start, dtype=dtype, filled=True
+            ),
+        )
         self.connectivity: list = []
         self.annotations: dict = {}
         self.lock = lock
 
+    @property
+    def data(self) -> np.ndarray:
+        """Copy of the whole rolling buffer in chronological order."""
+        return self.get_latest()
+
+    def append(self, chunk) -> None:
+        """Writes a data chunk into the rolling buffer.
+
+        Parameters
+        ----------
+        chunk
+            data chunk with shape (channels, samples)
+        """
+        with self.lock:
+            self.buffer.write(chunk)
+
+    def get_latest(
+        self,
+        samples: typing.Optional[int] = None,
+        rows: typing.Optional[list] = None,
+    ) -> np.ndarray:
+        """Returns a copy of the most recent samples in chronological order.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples to return. Whole buffer if None.
+        rows : list, optional
+            Channel rows to return, in the given order. All rows if None.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        with self.lock:
+            return self.buffer.latest(samples, rows=rows, copy=True)
+
+    def get_range(
+        self, start: int, stop: int, rows: typing.Optional[list] = None
+    ) -> np.ndarray:
+        """Returns the samples between two positions.
+
+        Positions count all samples written, including the zeros at start.
+        Samples that are not stored (anymore) are left out.
+
+        Parameters
+        ----------
+        start : int
+            Position of the first sample.
+        stop : int
+            Position after the last sample.
+        rows : list, optional
+            Channel rows to return, in the given order. All rows if None.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        with self.lock:
+            total = self.buffer.total
+            start = max(start, total - len(self.buffer))
+            stop = min(stop, total)
+            start = min(start, stop)
+            return self.buffer.range(start, stop, rows=rows, copy=True)
+
     def save(self, fname: str):
         """Saves the raw data to a file.
         Parameters
@@ -364,8 +1034,9 @@ class EEGData_roll:
         fname: str
             filename to save data to
         """
-        with self.lock:
-            self.mne_raw.save(fname=fname, verbose=False, overwrite=True, fmt="double")
+        # the MNE structure is not shared with the callback, so the
+        # acquisition lock is not held during the write
+        self.mne_raw.save(fname=fname, verbose=False, overwrite=True, fmt="double")
 
     def load(self, fname: str):
         """Loads raw data from a file.
@@ -383,6 +1054,7 @@ class EEGData_roll:
         samples: typing.Optional[int] = None,
         annotations: bool = True,
         channels_indexes: typing.Optional[list] = None,
+        copy: bool = True,
     ):
         """Convert arrays to MNE.
         If tim None returns all data from acquisition start.
@@ -398,43 +1070,45 @@ class EEGData_roll:
             should annotations be included
         channels_indexes: list, optional
             A list of channel indexes to include.
+        copy: bool, default value = True
+            unused, rolling data is always copied out of the buffer
         """
         with self.lock:
-            length = len(self.data)
-        if length > 0:
+            buffered = self.buffer.latest(dtype=np.float64, copy=True)
+        if buffered.shape[1] > 0:
             if annotations:
-                timestamp_correction = np.block(self.data)[0][0]
+                timestamp_correction = buffered[0][0]
                 onset = []
                 description = []
                 for idx, annotation in enumerate(self.annotations["annotations"]):
                     description.append(annotation)
                     timestamp = self.annotations["timestamps"][idx]
                     onset.append(
-                        (timestamp + self.zeros_at_start - timestamp_correction)
+                        (
+                            (timestamp - timestamp_correction) / self.sample_step
+                            + self.zeros_at_start
+                        )
                         / self.eeg_info["sfreq"]
                     )
                 duration = np.repeat(0, len(onset))
             if tim:
                 # convert tim to samples
                 tim = int(tim * self.eeg_info["sfreq"])
-                with self.lock:
-                    data = np.array(self.data)  # .reshape(self.chans, -1)
-                    data = data[:, -tim:]
-                # fix annotations
+                data = buffered[:, -tim:]
+                # fix annotations, onsets are in seconds
                 if annotations:
-                    onset = [x - tim for x in onset]
+                    cut = (buffered.shape[1] - data.shape[1]) / self.eeg_info["sfreq"]
+                    onset = [x - cut for x in onset]
                     duration = np.repeat(0, len(onset))
             elif samples:
-                with self.lock:
-                    data = np.array(self.data)  # .reshape(self.chans, -1)
-                    data = data[:, -samples:]
-                # fix annotations
+                data = buffered[:, -samples:]
+                # fix annotations, onsets are in seconds
                 if annotations:
-                    onset = [x - samples for x in onset]
+                    cut = (buffered.shape[1] - data.shape[1]) / self.eeg_info["sfreq"]
+                    onset = [x - cut for x in onset]
                     duration = np.repeat(0, len(onset))
             else:
-                with self.lock:
-                    data = np.array(self.data)  # .reshape(self.chans, -1)
+                data = buffered
             # select right order channels
             if channels_indexes:
                 data = data[channels_indexes]
@@ -453,7 +1127,15 @@ class EEGData_roll:
 class EEGData:
     """Object to store EEG data in accumulation mode"""
 
-    def __init__(self, info, lock, zeros_at_start: int = 2):
+    def __init__(
+        self,
+        info,
+        lock,
+        zeros_at_start: int = 2,
+        spill_path: typing.Optional[str] = None,
+        hot_samples: typing.Optional[int] = None,
+        sample_step: int = 1,
+    ):
         """Initializes the EEGData object.
 
         Parameters
@@ -464,15 +1146,147 @@ class EEGData:
             The threading lock.
         zeros_at_start : int, optional
             The number of zeros to add at the beginning of the data, by default 2.
+        spill_path : str, optional
+            If given, data is spilled to memory-mapped files (one per channel
+            data type, e.g. ``name.float32.dat``) and only the last
+            `hot_samples` samples are kept in memory.
+        hot_samples : int, optional
+            Size of the in-memory tail when spilling, by default 10 seconds.
+        sample_step : int, optional
+            Device samples per stored sample, e.g. the decimation factor,
+            used to place annotations. By default 1.
         """
         self.eeg_info: mne.Info = info
         self.mne_raw: mne.io.BaseRaw
         self.lock = lock
         chans = len(info.ch_names)
         self.zeros_at_start = zeros_at_start
-        self.data: list = [np.zeros((chans, self.zeros_at_start))]
+        self.sample_step = sample_step
+        self.spill = spill_path is not None
+        self.spill_path = spill_path
+        if hot_samples is None:
+            hot_samples = int(info["sfreq"]) * 10
+        self.hot_samples = hot_samples
+        # rows are kept in their native types, laid out on the first chunk
+        self.buffer = TypedBuffer(chans, self._create_buffer)
+        # value of the first stored sample number, fixed by the first chunk
+        self._first_sample: typing.Optional[float] = None
         self.connectivity: list = []
         self.annotations: dict = {}
+        # float64 history in MNE channel order, filled up to a high-water mark
+        self._mne_lock = threading.Lock()
+        self._mne_history: typing.Optional[GrowableBuffer] = None
+        self._mne_rows: typing.Optional[list] = None
+        self._mne_hwm = 0
+        self._mne_annotations: typing.Optional[tuple] = None
+
+    def _create_buffer(
+        self, n_rows: int, dtype: np.dtype, group: int
+    ) -> typing.Union[GrowableBuffer, SpillBuffer]:
+        """Creates the storage for one data type group, padded with zeros.
+
+        Parameters
+        ----------
+        n_rows : int
+            Number of channels stored with this data type.
+        dtype : np.dtype
+            Native data type of the channels.
+        group : int
+            Index of the data type group.
+
+        Returns
+        -------
+        GrowableBuffer or SpillBuffer
+            Storage for the group.
+        """
+        buffer: typing.Union[GrowableBuffer, SpillBuffer]
+        if self.spill_path is not None:
+            path = pathlib.Path(self.spill_path)
+            path = path.with_name(f"{path.stem}.{dtype.name}{path.suffix}")
+            buffer = SpillBuffer(
+                n_rows, path, hot_capacity=self.hot_samples, dtype=dtype
+            )
+        else:
+            buffer = GrowableBuffer(
+                n_rows, capacity=int(self.eeg_info["sfreq"]) * 60, dtype=dtype
+            )
+        buffer.write(np.zeros((n_rows, self.zeros_at_start), dtype=dtype))
+        return buffer
+
+    @property
+    def data(self) -> np.ndarray:
+        """Whole accumulated history."""
+        return self.get_latest()
+
+    def append(self, chunk) -> None:
+        """Appends a data chunk to the history.
+
+        Parameters
+        ----------
+        chunk
+            data chunk with shape (channels, samples)
+        """
+        with self.lock:
+            if self._first_sample is None:
+                first = chunk_rows(chunk)[0][0]
+                self._first_sample = 0.0 if self.zeros_at_start else float(first)
+            self.buffer.write(chunk)
+
+    def get_latest(
+        self,
+        samples: typing.Optional[int] = None,
+        rows: typing.Optional[list] = None,
+    ) -> np.ndarray:
+        """Returns the most recent samples without concatenation.
+
+        Samples are returned in the common type of the requested rows.
+        When these rows share one data type and no rows are selected, the
+        result is a view into the history (or the spill file). Stored
+        samples are never modified by later appends, so the view stays valid.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples to return. Whole history if None.
+        rows : list, optional
+            Channel rows to return, in the given order. All rows if None.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        with self.lock:
+            return self.buffer.latest(samples, rows=rows)
+
+    def get_range(
+        self, start: int, stop: int, rows: typing.Optional[list] = None
+    ) -> np.ndarray:
+        """Returns the samples between two positions.
+
+        Positions count all samples written, including the zeros at start.
+        Samples that are not stored (anymore) are left out.
+
+        Parameters
+        ----------
+        start : int
+            Position of the first sample.
+        stop : int
+            Position after the last sample.
+        rows : list, optional
+            Channel rows to return, in the given order. All rows if None.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        with self.lock:
+            total = self.buffer.total
+            start = max(start, total - len(self.buffer))
+            stop = min(stop, total)
+            start = min(start, stop)
+            return self.buffer.range(start, stop, rows=rows)
 
     def save(self, fname: str):
         """Saves the raw data to a file.
@@ -481,8 +1295,9 @@ class EEGData:
         fname: str
             filename to save data to
         """
-        with self.lock:
-            self.mne_raw.save(fname=fname, verbose=False, overwrite=True, fmt="double")
+        # the MNE structure is not shared with the callback, so the
+        # acquisition lock is not held during the write
+        self.mne_raw.save(fname=fname, verbose=False, overwrite=True, fmt="double")
 
     def load(self, fname: str):
         """Loads raw data from a file.
@@ -494,17 +1309,29 @@ class EEGData:
         """
         self.mne_raw = mne.io.read_raw(fname, verbose=False)
 
+    def close(self):
+        """Closes the spill files, if any. The files themselves are kept."""
+        if self.spill:
+            with self.lock:
+                self.buffer.close()
+
     def convert_to_mne(
         self,
         tim: typing.Optional[float] = None,
         samples: typing.Optional[int] = None,
         annotations: bool = True,
         channels_indexes: typing.Optional[list] = None,
+        copy: bool = True,
     ):
         """Convert arrays to MNE.
         If tim None returns all data from acquisition start.
         Otherwise last tim seconds
 
+        The conversion is incremental: only samples that arrived since the
+        previous call are copied into the cached MNE ordered history, and
+        the annotations are rebuilt only when they change. When spilling,
+        data is read straight from the memory-mapped file instead.
+
         Parameters
         ------------
         tim: float, default value = None
@@ -515,56 +1342,119 @@ class EEGData:
             should annotations be included
         channels_indexes: list, optional
             A list of channel indexes to include.
+        copy: bool, default value = True
+            copy data into the MNE structure. If False the MNE structure
+            shares memory with the cached history and must not be modified
+            in place.
         """
         with self.lock:
-            _length = len(self.data)
+            _length = len(self.buffer)
         if _length > 0:
-            if annotations:
-                timestamp_correction = np.block(self.data)[0][0]
-                onset = []
-                description = []
-                for idx, annotation in enumerate(self.annotations["annotations"]):
-                    description.append(annotation)
-                    timestamp = self.annotations["timestamps"][idx]
-                    onset.append(
-                        (timestamp + self.zeros_at_start - timestamp_correction)
-                        / self.eeg_info["sfreq"]
-                    )
-                duration = np.repeat(0, len(onset))
-            if tim:
-                # convert tim to samples
-                tim = int(tim * self.eeg_info["sfreq"])
-                data = self._concat_data()
-                data = data[:, -tim:]
-                # fix annotations
-                if annotations:
-                    onset = [x - tim for x in onset]
-                    duration = np.repeat(0, len(onset))
-            elif samples:
-                data = self._concat_data()
-                data = data[:, -samples:]
-                # fix annotations
+            with self._mne_lock:
+                if tim:
+                    # convert tim to samples
+                    tim = int(tim * self.eeg_info["sfreq"])
+                    shift = tim
+                elif samples:
+                    shift = samples
+                else:
+                    shift = 0
+                if self.spill:
+                    rows = list(channels_indexes) if channels_indexes else None
+                    with self.lock:
+                        stored = len(self.buffer)
+                        data = self.buffer.latest(
+                            shift or None, rows=rows, dtype=np.float64, copy=copy
+                        )
+                    # the data is already copied out of the file if needed
+                    copy = False
+                else:
+                    history = self._update_mne_history(channels_indexes)
+                    stored = self._mne_hwm
+                    data = history.latest(shift or None)
+                self.mne_raw = mne.io.RawArray(
+                    data,
+                    self.eeg_info,
+                    copy="both" if copy else "info",
+                    verbose=False,
+                )
                 if annotations:
-                    onset = [x - samples for x in onset]
-                    duration = np.repeat(0, len(onset))
-            else:
-                data = self._concat_data()
-            # select right order channels
-            if channels_indexes:
-                data = data[channels_indexes]
-            self.mne_raw = mne.io.RawArray(
-                data,
-                self.eeg_info,
-                verbose=False,
-            )
-            if annotations:
-                annot = mne.Annotations(onset, duration, description)
-                self.mne_raw.set_annotations(annot, verbose=False)
+                    annot = self._get_mne_annotations(stored - data.shape[1])
+                    self.mne_raw.set_annotations(annot, verbose=False)
         else:
             print("No data to convert to MNE structure")
 
-    def _concat_data(self):
-        """Concatenates the data blocks."""
+    def _update_mne_history(
+        self, channels_indexes: typing.Optional[list] = None
+    ) -> GrowableBuffer:
+        """Copies samples that arrived since the last call into the MNE history.
+
+        Parameters
+        ----------
+        channels_indexes: list, optional
+            Channel rows in the MNE order. All rows if None.
+
+        Returns
+        -------
+        GrowableBuffer
+            float64 history with rows in the MNE order.
+        """
+        rows = list(channels_indexes) if channels_indexes else None
         with self.lock:
-            data = np.block(self.data)
-        return data
+            total = len(self.buffer)
+            if self._mne_history is None or rows != self._mne_rows:
+                n_rows = len(rows) if rows else self.buffer.n_channels
+                self._mne_history = GrowableBuffer(
+                    n_rows, capacity=max(total, int(self.eeg_info["sfreq"]) * 60)
+                )
+                self._mne_rows = rows
+                self._mne_hwm = 0
+            # native types are converted to float64 only here
+            new = self.buffer.latest(
+                total - self._mne_hwm, rows=rows, dtype=np.float64
+            )
+        self._mne_history.write(new)
+        self._mne_hwm = total
+        return self._mne_history
+
+    def _get_mne_annotations(self, shift: int) -> mne.Annotations:
+        """Returns MNE annotations of the converted data.
+
+        Onsets relative to the first stored sample are recomputed only when
+        annotations are added, annotations are only ever appended.
+
+        Parameters
+        ----------
+        shift: int
+            Number of samples cut from the beginning of the data when only
+            the end of the data is converted. Onsets are in seconds, so the
+            shift is converted with the sampling frequency.
+
+        Returns
+        -------
+        mne.Annotations
+            Annotations of the acquired data.
+        """
+        timestamp_correction = self._first_sample or 0.0
+        key = (len(self.annotations["annotations"]), timestamp_correction)
+        if self._mne_annotations is None or self._mne_annotations[0] != key:
+            timestamps = np.asarray(self.annotations["timestamps"], dtype=np.float64)
+            onset = (
+                (timestamps - timestamp_correction) / self.sample_step
+                + self.zeros_at_start
+            ) / self.eeg_info["sfreq"]
+            self._mne_annotations = (
+                key,
+                onset,
+                list(self.annotations["annotations"]),
+            )
+        _, onset, description = self._mne_annotations
+        return mne.Annotations(
+            onset - shift / self.eeg_info["sfreq"],
+            np.zeros(len(onset)),
+            description,
+        )
+
+    def _concat_data(self):
+        """Returns the whole history, already stored contiguously."""
+        return self.get_latest()
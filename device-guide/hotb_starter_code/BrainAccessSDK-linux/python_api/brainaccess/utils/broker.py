@@ -0,0 +1,345 @@
+"""Long-running broker owning the device connection.
+
+The broker connects to the device once, keeps acquiring and mirrors the
+samples into a shared memory ring buffer. Clients attach through a local
+TCP control socket: they ask for the buffer name once and then read samples
+straight from shared memory, so attaching and detaching takes milliseconds
+instead of a Bluetooth scan and connect.
+
+The control protocol is one JSON object per line. Requests have a ``cmd``
+key, responses an ``ok`` key and an ``error`` message when ``ok`` is false.
+Once the device disconnects every request fails with an error, so clients
+can poll the ``status`` command to notice that the samples stopped.
+
+Run the broker with::
+
+    python -m brainaccess.utils.broker "BA MINI 047" --cap 0:Fp1 1:Fp2
+"""
+
+import argparse
+import json
+import socket
+import socketserver
+import threading
+import typing
+
+import numpy as np
+
+from brainaccess.core.eeg_manager import EEGManager
+from brainaccess.utils.acquisition import EEG
+from brainaccess.utils.exceptions import BrainAccessException
+from brainaccess.utils.shared_ring import SharedRingReader
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """Answers the JSON requests of one client connection."""
+
+    def handle(self) -> None:
+        broker: DeviceBroker = self.server.broker  # type: ignore
+        for line in self.rfile:
+            try:
+                response = broker.handle_request(json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _ControlServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class DeviceBroker:
+    """Owns the device connection and shares its samples with clients."""
+
+    def __init__(
+        self,
+        device_name: str,
+        cap: dict,
+        sfreq: int = 250,
+        seconds: float = 10.0,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        shm_name: typing.Optional[str] = None,
+        manager: typing.Optional[EEGManager] = None,
+    ) -> None:
+        """Initializes the broker. Nothing is connected until `start`.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device to connect to.
+        cap : dict
+            A dictionary mapping electrode numbers to channel names.
+        sfreq : int, optional
+            Sampling frequency, by default 250.
+        seconds : float, optional
+            Length of the shared ring buffer, by default 10.
+        host : str, optional
+            Address of the control socket, by default localhost.
+        port : int, optional
+            Port of the control socket, by default 8766.
+        shm_name : str, optional
+            Name of the shared memory block. Generated if None.
+        manager : EEGManager, optional
+            Device manager, e.g. a virtual device from
+            `brainaccess.utils.virtual_device`. A new `EEGManager` if None.
+        """
+        self.device_name = device_name
+        self.cap = cap
+        self.sfreq = sfreq
+        self.seconds = seconds
+        self.address = (host, port)
+        self.shm_name = shm_name
+        self.mgr: typing.Optional[EEGManager] = manager
+        self.eeg: typing.Optional[EEG] = None
+        self.error: typing.Optional[str] = None
+        self._server: typing.Optional[_ControlServer] = None
+
+    def start(self) -> None:
+        """Connects to the device, starts acquiring and opens the control socket."""
+        self.eeg = EEG(mode="roll")
+        if self.mgr is None:
+            self.mgr = EEGManager()
+        self.error = None
+        try:
+            self.eeg.setup(
+                self.mgr,
+                device_name=self.device_name,
+                cap=self.cap,
+                sfreq=self.sfreq,
+                zeros_at_start=int(self.seconds * self.sfreq),
+            )
+            self.mgr.set_callback_disconnect(self._on_disconnect)
+            self.eeg.start_acquisition()
+            self.eeg.share(name=self.shm_name, seconds=self.seconds)
+            self._server = _ControlServer(self.address, _ControlHandler)
+            # the bound port when port 0 was requested
+            self.address = self._server.server_address
+        except Exception:
+            self.stop()
+            raise
+        self._server.broker = self  # type: ignore
+
+    def _on_disconnect(self) -> None:
+        """Reports the lost device to clients, called on the device thread."""
+        self.error = f"Device {self.device_name} disconnected"
+        print(self.error)
+
+    def serve_forever(self) -> None:
+        """Answers client requests until `stop` is called."""
+        if self._server is None:
+            raise BrainAccessException("Broker is not started")
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Closes the control socket and releases the device."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.eeg is not None and self.mgr is not None:
+            try:
+                if self.mgr.is_streaming():
+                    self.eeg.stop_acquisition()
+            finally:
+                self.eeg.close()
+                self.mgr.destroy()
+        self.eeg = None
+        self.mgr = None
+
+    def handle_request(self, request: dict) -> dict:
+        """Answers one control request.
+
+        Parameters
+        ----------
+        request : dict
+            Request with a ``cmd`` key: "info", "status", "annotate" (with
+            ``text``) or "battery".
+
+        Returns
+        -------
+        dict
+            Response with an ``ok`` key.
+
+        Raises
+        ------
+        BrainAccessException
+            If the broker is not started, the device disconnected or the
+            request is invalid.
+        """
+        if self.eeg is None or self.eeg.shared is None:
+            raise BrainAccessException("Broker is not started")
+        if self.error is not None:
+            raise BrainAccessException(self.error)
+        cmd = request.get("cmd")
+        if cmd == "status":
+            return {"ok": True, "total": self.eeg.shared.total}
+        if cmd == "info":
+            return {
+                "ok": True,
+                "shm": self.eeg.shared.name,
+                "ch_names": self.eeg.info.ch_names,
+                "sfreq": self.eeg.info["sfreq"],
+            }
+        if cmd == "annotate":
+            self.eeg.annotate(str(request["text"]))
+            return {"ok": True}
+        if cmd == "battery":
+            return {"ok": True, "level": self.eeg.get_battery()}
+        raise BrainAccessException(f"Unknown command {cmd}")
+
+
+class BrokerClient:
+    """Attaches to a running `DeviceBroker` and reads its samples."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """Connects to the broker control socket and its shared buffer.
+
+        Parameters
+        ----------
+        host : str, optional
+            Address of the broker, by default localhost.
+        port : int, optional
+            Port of the broker, by default 8766.
+        """
+        self._socket = socket.create_connection((host, port))
+        self._file = self._socket.makefile("rwb")
+        info = self.request("info")
+        self.ch_names: list = info["ch_names"]
+        self.sfreq: float = info["sfreq"]
+        self.reader = SharedRingReader(info["shm"])
+
+    def __enter__(self) -> "BrokerClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def request(self, cmd: str, **kwargs) -> dict:
+        """Sends a control request to the broker.
+
+        Parameters
+        ----------
+        cmd : str
+            Command name.
+        **kwargs
+            Command arguments.
+
+        Returns
+        -------
+        dict
+            The broker response.
+
+        Raises
+        ------
+        BrainAccessException
+            If the broker reports an error.
+        """
+        self._file.write(json.dumps({"cmd": cmd, **kwargs}).encode("utf-8") + b"\n")
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if not response.get("ok"):
+            raise BrainAccessException(response.get("error", "Broker request failed"))
+        return response
+
+    def get_window(
+        self, samples: int, channels: typing.Optional[list] = None
+    ) -> np.ndarray:
+        """Returns the most recent samples.
+
+        Parameters
+        ----------
+        samples : int
+            Number of samples to return.
+        channels : list, optional
+            Channel names to return, in the given order. All channels if None.
+
+        Returns
+        -------
+        np.ndarray
+            Data array, shape (channels, samples).
+        """
+        data = self.reader.latest(samples)
+        if channels is None:
+            return data
+        try:
+            return data[[self.ch_names.index(name) for name in channels]]
+        except ValueError:
+            raise BrainAccessException(f"Channel not acquired: {channels}")
+
+    def status(self) -> dict:
+        """Checks that the broker still receives samples.
+
+        Returns
+        -------
+        dict
+            The broker response, ``total`` counts the shared samples.
+
+        Raises
+        ------
+        BrainAccessException
+            If the device disconnected.
+        """
+        return self.request("status")
+
+    def annotate(self, text: str) -> None:
+        """Sends an annotation to the device.
+
+        Parameters
+        ----------
+        text : str
+            Annotation text.
+        """
+        self.request("annotate", text=text)
+
+    def close(self) -> None:
+        """Detaches from the broker. The device stays connected."""
+        self.reader.close()
+        self._file.close()
+        self._socket.close()
+
+
+def main() -> None:
+    """Runs a broker from the command line until interrupted."""
+    parser = argparse.ArgumentParser(description="BrainAccess device broker")
+    parser.add_argument("device_name", help="Bluetooth name of the device")
+    parser.add_argument(
+        "--cap",
+        nargs="+",
+        required=True,
+        help="electrode:name pairs, e.g. 0:Fp1 1:Fp2",
+    )
+    parser.add_argument("--sfreq", type=int, default=250)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--shm-name", default=None)
+    args = parser.parse_args()
+    cap = {int(k): v for k, v in (item.split(":", 1) for item in args.cap)}
+    broker = DeviceBroker(
+        args.device_name,
+        cap,
+        sfreq=args.sfreq,
+        seconds=args.seconds,
+        host=args.host,
+        port=args.port,
+        shm_name=args.shm_name,
+    )
+    broker.start()
+    print(f"Broker for {args.device_name} listening on {args.host}:{args.port}")
+    thread = threading.Thread(target=broker.serve_forever, daemon=True)
+    thread.start()
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
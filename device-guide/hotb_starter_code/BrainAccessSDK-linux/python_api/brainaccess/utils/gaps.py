@@ -0,0 +1,173 @@
+"""Index of acquisition gaps caused by lost Bluetooth packets."""
+
+import bisect
+import threading
+import typing
+
+import numpy as np
+
+
+class GapIndex:
+    """Keeps the positions of lost and zero-filled samples of a stream.
+
+    Positions count stored samples, starting with any zeros stored before the
+    stream. A gap is a half-open range ``[start, end)`` of positions:
+
+    - a jump in the device sample numbers is a gap with ``start == end``,
+      located between the samples ``start - 1`` and ``start``;
+    - samples the device zero-filled after a loss (the streaming flag is 0)
+      form a gap covering them.
+
+    Gaps are found with a vectorized scan of every chunk as it arrives and are
+    merged when they touch, so the index stays sorted and windows are checked
+    with a binary search.
+    """
+
+    def __init__(self, offset: int = 0, step: int = 1) -> None:
+        """Initializes an empty index.
+
+        Parameters
+        ----------
+        offset : int, optional
+            Number of samples stored before the stream, by default 0.
+        step : int, optional
+            Expected increment of the sample number between stored samples,
+            e.g. the decimation factor, by default 1.
+        """
+        self.step = step
+        self.total = offset
+        self.lost = 0
+        self._starts: list = []
+        self._ends: list = []
+        self._missing: list = []
+        self._last_sample: typing.Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def update(
+        self,
+        sample_numbers: np.ndarray,
+        streaming: typing.Optional[np.ndarray] = None,
+    ) -> None:
+        """Adds a chunk to the index.
+
+        Parameters
+        ----------
+        sample_numbers : np.ndarray
+            Device sample numbers of the chunk.
+        streaming : np.ndarray, optional
+            Streaming flag of the chunk, 0 for zero-filled samples.
+        """
+        sample_numbers = np.asarray(sample_numbers, dtype=np.int64)
+        n = len(sample_numbers)
+        if n == 0:
+            return
+        if self._last_sample is None:
+            previous = sample_numbers[:1] - self.step
+        else:
+            previous = np.array([self._last_sample], dtype=np.int64)
+        jumps = np.diff(sample_numbers, prepend=previous) - self.step
+        breaks = np.flatnonzero(jumps)
+        starts = [breaks]
+        ends = [breaks]
+        missing = [jumps[breaks]]
+        if streaming is not None:
+            # edges of the runs of zero-filled samples
+            lost = np.asarray(streaming) == 0
+            edges = np.flatnonzero(np.diff(lost.astype(np.int8), prepend=0, append=0))
+            starts.append(edges[::2])
+            ends.append(edges[1::2])
+            missing.append(edges[1::2] - edges[::2])
+        gap_starts = np.concatenate(starts)
+        order = np.argsort(gap_starts, kind="stable")
+        gap_starts = gap_starts[order] + self.total
+        gap_ends = np.concatenate(ends)[order] + self.total
+        gap_missing = np.concatenate(missing)[order]
+        with self._lock:
+            for start, end, count in zip(
+                gap_starts.tolist(), gap_ends.tolist(), gap_missing.tolist()
+            ):
+                self._add(start, end, count)
+            self._last_sample = int(sample_numbers[-1])
+            self.total += n
+
+    def _add(self, start: int, end: int, missing: int) -> None:
+        """Appends a gap, merging it with the last one if they touch."""
+        self.lost += missing
+        if self._ends and start <= self._ends[-1]:
+            self._ends[-1] = max(self._ends[-1], end)
+            self._missing[-1] += missing
+            return
+        self._starts.append(start)
+        self._ends.append(end)
+        self._missing.append(missing)
+
+    def is_intact(self, start: int, stop: int) -> bool:
+        """Checks a window for gaps in O(log n).
+
+        Parameters
+        ----------
+        start : int
+            Position of the first sample of the window.
+        stop : int
+            Position after the last sample of the window.
+
+        Returns
+        -------
+        bool
+            True if no samples are missing or zero-filled in the window.
+        """
+        with self._lock:
+            # first gap ending after the window start
+            i = bisect.bisect_right(self._ends, start)
+            return i == len(self._starts) or self._starts[i] >= stop
+
+    def is_latest_intact(self, samples: int) -> bool:
+        """Checks the most recent samples for gaps.
+
+        Parameters
+        ----------
+        samples : int
+            Window length.
+
+        Returns
+        -------
+        bool
+            True if no samples are missing or zero-filled in the window.
+        """
+        with self._lock:
+            total = self.total
+        return self.is_intact(total - samples, total)
+
+    def gaps(
+        self, start: int = 0, stop: typing.Optional[int] = None
+    ) -> typing.List[typing.Tuple[int, int, int]]:
+        """Returns the gaps touching a window.
+
+        Parameters
+        ----------
+        start : int, optional
+            Position of the first sample of the window, by default 0.
+        stop : int, optional
+            Position after the last sample of the window, by default the end.
+
+        Returns
+        -------
+        list
+            ``(start, end, missing)`` tuples, where `missing` counts lost or
+            zero-filled device samples.
+        """
+        with self._lock:
+            if stop is None:
+                stop = self.total + 1
+            first = bisect.bisect_right(self._ends, start)
+            last = bisect.bisect_left(self._starts, stop, lo=first)
+            return list(
+                zip(
+                    self._starts[first:last],
+                    self._ends[first:last],
+                    self._missing[first:last],
+                )
+            )
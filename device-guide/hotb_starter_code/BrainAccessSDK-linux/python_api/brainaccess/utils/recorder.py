@@ -0,0 +1,234 @@
+"""Streaming recorder writing acquired chunks to disk as they arrive.
+
+Chunks are appended on a background thread to a raw ``.part`` file, stored
+as float64 samples time-major with shape (samples, channels). Finalizing the
+recording converts the part file into a FIF file. If the process crashes the
+part file stays on disk and can still be converted with `part_to_fif`.
+"""
+
+import pathlib
+import queue
+import threading
+import typing
+
+import numpy as np
+import mne  # type: ignore
+
+from brainaccess.utils.buffers import chunk_rows
+from brainaccess.utils.exceptions import BrainAccessException
+
+
+def part_to_fif(
+    part_path: typing.Union[str, pathlib.Path],
+    info: mne.Info,
+    fname: typing.Union[str, pathlib.Path],
+    channels_indexes: typing.Optional[list] = None,
+    annotations: typing.Optional[dict] = None,
+    sample_row: typing.Optional[int] = None,
+    n_channels: typing.Optional[int] = None,
+    sample_step: int = 1,
+) -> pathlib.Path:
+    """Converts a raw part file written by `StreamRecorder` into a FIF file.
+
+    Parameters
+    ----------
+    part_path : str or pathlib.Path
+        Raw part file.
+    info : mne.Info
+        MNE info describing the channels in the `channels_indexes` order.
+    fname : str or pathlib.Path
+        FIF file to write.
+    channels_indexes : list, optional
+        Rows of the part file in the MNE channel order. If None, the rows
+        are used in the stored order and must match `info`.
+    annotations : dict, optional
+        Annotations as returned by `EEGManager.get_annotations`.
+    sample_row : int, optional
+        Row holding the device sample number, used to place annotations.
+    n_channels : int, optional
+        Number of rows stored in the part file. Defaults to the number of
+        channels in `info`.
+    sample_step : int, optional
+        Device samples per stored sample, e.g. the decimation factor, by
+        default 1.
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the written FIF file.
+
+    Raises
+    ------
+    BrainAccessException
+        If the part file is empty or does not match the channel count.
+    """
+    part_path = pathlib.Path(part_path)
+    if n_channels is None:
+        n_channels = len(info.ch_names)
+    row_bytes = n_channels * np.dtype(np.float64).itemsize
+    # a crash can leave a partially written last sample, ignore it
+    samples = part_path.stat().st_size // row_bytes
+    if samples == 0:
+        raise BrainAccessException("Recording is empty")
+    mapped = np.memmap(
+        part_path, dtype=np.float64, mode="r", shape=(samples, n_channels)
+    )
+    data = mapped.T[channels_indexes] if channels_indexes else np.array(mapped.T)
+    if data.shape[0] != len(info.ch_names):
+        raise BrainAccessException("Recording does not match the channel info")
+    raw = mne.io.RawArray(data, info, copy="info", verbose=False)
+    if annotations and annotations["annotations"]:
+        first_sample = mapped[0, sample_row] if sample_row is not None else 0
+        onset = (
+            np.asarray(annotations["timestamps"], dtype=np.float64) - first_sample
+        ) / (info["sfreq"] * sample_step)
+        raw.set_annotations(
+            mne.Annotations(
+                onset, np.zeros(len(onset)), list(annotations["annotations"])
+            ),
+            verbose=False,
+        )
+    fname = pathlib.Path(fname)
+    raw.save(fname=fname, verbose=False, overwrite=True, fmt="double")
+    return fname
+
+
+class StreamRecorder:
+    """Appends acquired chunks to disk on a background writer thread.
+
+    `push` only queues a copy of the chunk, so it is cheap enough to call
+    from the device callback. The writer thread wakes up every
+    `flush_interval` seconds and writes everything queued since in a single
+    batch. Once stopped the recorder ignores further pushes, so a chunk
+    racing with `stop` is either written or dropped, never left queued.
+    """
+
+    def __init__(
+        self,
+        fname: typing.Union[str, pathlib.Path],
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Creates the part file and starts the writer thread.
+
+        Parameters
+        ----------
+        fname : str or pathlib.Path
+            FIF file written by `finalize`. Data is streamed to the same path
+            with a ``.part`` suffix appended.
+        flush_interval : float, optional
+            Seconds between batched writes, by default 1.0.
+        """
+        self.fname = pathlib.Path(fname)
+        self.part_path = self.fname.with_name(self.fname.name + ".part")
+        self.flush_interval = flush_interval
+        self.n_channels: typing.Optional[int] = None
+        self.samples = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._file = open(self.part_path, "wb")
+        self._error: typing.Optional[Exception] = None
+        self._thread = threading.Thread(
+            target=self._run, name="brainaccess-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def push(self, chunk) -> None:
+        """Queues a data chunk for writing.
+
+        Parameters
+        ----------
+        chunk
+            data chunk with shape (channels, samples) or a structured record
+            with one field per channel
+        """
+        rows = np.array(chunk_rows(chunk), dtype=np.float64)
+        with self._lock:
+            if not self._closed:
+                self._queue.put(rows)
+
+    def _run(self) -> None:
+        """Writer thread, writes queued chunks in batches."""
+        while not self._stop.wait(self.flush_interval):
+            self._write_pending()
+        self._write_pending()
+
+    def _write_pending(self) -> None:
+        """Writes all queued chunks with a single file write."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch or self._error is not None:
+            return
+        try:
+            data = np.concatenate(batch, axis=1)
+            if self.n_channels is None:
+                self.n_channels = data.shape[0]
+            elif data.shape[0] != self.n_channels:
+                raise BrainAccessException("Chunk channel count changed")
+            self._file.write(np.ascontiguousarray(data.T).tobytes())
+            self._file.flush()
+            self.samples += data.shape[1]
+        except Exception as e:
+            self._error = e
+
+    def stop(self) -> None:
+        """Writes the remaining chunks and closes the part file."""
+        with self._lock:
+            self._closed = True
+        if self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+            self._file.close()
+        if self._error is not None:
+            raise BrainAccessException(f"Recording failed: {self._error}")
+
+    def finalize(
+        self,
+        info: mne.Info,
+        channels_indexes: typing.Optional[list] = None,
+        annotations: typing.Optional[dict] = None,
+        sample_row: typing.Optional[int] = None,
+        keep_part: bool = False,
+        sample_step: int = 1,
+    ) -> pathlib.Path:
+        """Stops recording and converts the part file into a FIF file.
+
+        Parameters
+        ----------
+        info : mne.Info
+            MNE info describing the channels in the `channels_indexes` order.
+        channels_indexes : list, optional
+            Chunk rows in the MNE channel order.
+        annotations : dict, optional
+            Annotations as returned by `EEGManager.get_annotations`.
+        sample_row : int, optional
+            Row holding the device sample number, used to place annotations.
+        keep_part : bool, optional
+            Keep the raw part file after conversion, by default False.
+        sample_step : int, optional
+            Device samples per stored sample, e.g. the decimation factor.
+
+        Returns
+        -------
+        pathlib.Path
+            Path of the written FIF file.
+        """
+        self.stop()
+        fname = part_to_fif(
+            self.part_path,
+            info,
+            self.fname,
+            channels_indexes=channels_indexes,
+            annotations=annotations,
+            sample_row=sample_row,
+            n_channels=self.n_channels,
+            sample_step=sample_step,
+        )
+        if not keep_part:
+            self.part_path.unlink()
+        return fname
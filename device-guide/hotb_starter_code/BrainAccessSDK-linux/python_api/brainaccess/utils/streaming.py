@@ -0,0 +1,292 @@
+"""Stateful signal processing stages applied to chunks as they arrive."""
+
+import typing
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal  # type: ignore
+
+from brainaccess.utils.buffers import RingBuffer, chunk_rows
+from brainaccess.utils.exceptions import BrainAccessException
+
+
+class StreamingDecimator:
+    """Anti-alias filters and downsamples chunks, keeping state across chunks.
+
+    Floating point rows are filtered with a linear-phase FIR low-pass (the
+    same design as `scipy.signal.decimate` with ``ftype="fir"``) that is
+    evaluated only at the kept output samples, i.e. in polyphase form.
+    Integer rows (sample numbers, digital inputs) are not filtered; they are
+    subsampled at the center of each filter window, so they stay aligned
+    with the delayed filter output.
+
+    The last ``numtaps - 1`` input samples are kept between chunks, so the
+    output does not depend on how the input is split into chunks. Output
+    samples are centered on input samples ``0, factor, 2 * factor, ...``, so
+    each output lags the input by ``(numtaps - 1) / 2`` samples.
+    """
+
+    def __init__(self, factor: int, numtaps: typing.Optional[int] = None) -> None:
+        """Designs the anti-alias filter.
+
+        Parameters
+        ----------
+        factor : int
+            Decimation factor, the output rate is the input rate / `factor`.
+        numtaps : int, optional
+            Filter length, by default ``20 * factor + 1``. Must be odd.
+
+        Raises
+        ------
+        BrainAccessException
+            If the factor or the filter length is invalid.
+        """
+        if factor < 1:
+            raise BrainAccessException("Decimation factor must be at least 1")
+        if numtaps is None:
+            numtaps = 20 * factor + 1
+        if numtaps % 2 == 0:
+            raise BrainAccessException("Filter length must be odd")
+        self.factor = factor
+        self.numtaps = numtaps
+        self.delay = (numtaps - 1) // 2
+        # reversed taps, windows are multiplied in time order
+        self._taps = signal.firwin(numtaps, 1.0 / factor, window="hamming")[::-1]
+        self._float_rows: typing.Optional[list] = None
+        self._history: list = []
+        self._offset = 0
+
+    def reset(self) -> None:
+        """Drops the filter state, the next chunk starts a new stream."""
+        self._float_rows = None
+        self._history = []
+        self._offset = 0
+
+    def process(self, chunk: typing.Any) -> list:
+        """Decimates a chunk.
+
+        Parameters
+        ----------
+        chunk : list or np.ndarray
+            One array per channel, a 2D array with shape (channels, samples)
+            or a structured record with one field per channel.
+
+        Returns
+        -------
+        list
+            One decimated array per channel, in the input data types. May be
+            empty arrays if the chunk is shorter than the factor.
+        """
+        rows = chunk_rows(chunk)
+        if self._float_rows is None:
+            self._float_rows = [
+                i for i, row in enumerate(rows) if np.asarray(row).dtype.kind == "f"
+            ]
+            # the stream is extended backwards with its first value and the
+            # first output is centered on the first input sample
+            self._history = [
+                np.full(self.numtaps - 1, row[0], dtype=np.asarray(row).dtype)
+                for row in rows
+            ]
+            self._offset = self.delay
+        n = len(rows[0])
+        positions = np.arange(self._offset, n, self.factor)
+        self._offset += self.factor * len(positions) - n
+        out: list = [None] * len(rows)
+        if self._float_rows:
+            history = [self._history[i] for i in self._float_rows]
+            new = [rows[i] for i in self._float_rows]
+            ext = np.concatenate(
+                (np.asarray(history, np.float64), np.asarray(new, np.float64)), axis=1
+            )
+            windows = sliding_window_view(ext, self.numtaps, axis=1)[:, positions]
+            filtered = windows @ self._taps
+            for pos, i in enumerate(self._float_rows):
+                out[i] = filtered[pos].astype(self._history[i].dtype)
+                self._history[i] = ext[pos, -(self.numtaps - 1):].astype(
+                    self._history[i].dtype
+                )
+        for i, row in enumerate(rows):
+            if out[i] is not None:
+                continue
+            ext = np.concatenate((self._history[i], np.asarray(row)))
+            out[i] = ext[positions + self.delay]
+            self._history[i] = ext[-(self.numtaps - 1):]
+        return out
+
+
+class StreamingFilterBank:
+    """Causal IIR filters applied to chunks, with state kept per channel.
+
+    Every channel is filtered with the same second-order sections. The
+    filter state (``zi``) is carried from one chunk to the next, so only new
+    samples are filtered and the output is the same as filtering the whole
+    stream at once, without start-up transients at chunk or window borders.
+    The filtered samples are kept in a ring buffer for window reads.
+
+    The bank can be fed directly by `EEG.subscribe`, e.g.
+    ``eeg.subscribe(bank.process, channels=["Fp1", "Fp2"])``. With a hop
+    and a window, only the new samples at the end of every window are
+    filtered. Hops are chunk-aligned, so the window must be at least the
+    longest chunk plus the hop, or new samples do not fit into it.
+    """
+
+    def __init__(self, sos: np.ndarray, n_channels: int, capacity: int) -> None:
+        """Initializes the filter bank.
+
+        Parameters
+        ----------
+        sos : np.ndarray
+            Second-order sections, shape (n_sections, 6).
+        n_channels : int
+            Number of filtered channels.
+        capacity : int
+            Number of filtered samples kept per channel.
+
+        Raises
+        ------
+        BrainAccessException
+            If the sections or the capacity are invalid.
+        """
+        sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        if sos.ndim != 2 or sos.shape[1] != 6:
+            raise BrainAccessException("Filter sections must have shape (n, 6)")
+        self.sos = sos
+        self.n_channels = n_channels
+        self.buffer = RingBuffer(n_channels, capacity)
+        self._zi: typing.Optional[np.ndarray] = None
+
+    @classmethod
+    def design(
+        cls,
+        sfreq: float,
+        n_channels: int,
+        capacity: int,
+        band: typing.Optional[typing.Tuple[float, float]] = None,
+        notch: typing.Optional[float] = None,
+        order: int = 4,
+        notch_quality: float = 30.0,
+    ) -> "StreamingFilterBank":
+        """Creates a bank with a Butterworth band-pass and/or a notch filter.
+
+        Parameters
+        ----------
+        sfreq : float
+            Sampling frequency.
+        n_channels : int
+            Number of filtered channels.
+        capacity : int
+            Number of filtered samples kept per channel.
+        band : tuple, optional
+            Low and high edge of the band-pass, in Hz. A None edge makes it a
+            high-pass or low-pass filter.
+        notch : float, optional
+            Frequency removed by the notch filter, e.g. 50 Hz mains.
+        order : int, optional
+            Order of the Butterworth filter, by default 4.
+        notch_quality : float, optional
+            Quality factor of the notch filter, by default 30.
+
+        Returns
+        -------
+        StreamingFilterBank
+            The filter bank.
+
+        Raises
+        ------
+        BrainAccessException
+            If no filter is requested.
+        """
+        sections = []
+        if notch is not None:
+            b, a = signal.iirnotch(notch, notch_quality, sfreq)
+            sections.append(signal.tf2sos(b, a))
+        if band is not None:
+            low, high = band
+            if low is not None and high is not None:
+                sections.append(
+                    signal.butter(
+                        order, [low, high], btype="bandpass", fs=sfreq, output="sos"
+                    )
+                )
+            elif low is not None:
+                sections.append(
+                    signal.butter(order, low, btype="highpass", fs=sfreq, output="sos")
+                )
+            elif high is not None:
+                sections.append(
+                    signal.butter(order, high, btype="lowpass", fs=sfreq, output="sos")
+                )
+        if not sections:
+            raise BrainAccessException("No filter requested")
+        return cls(np.vstack(sections), n_channels, capacity)
+
+    @property
+    def total(self) -> int:
+        """Number of samples filtered since creation or `reset`."""
+        return self.buffer.total
+
+    def reset(self) -> None:
+        """Drops the filter state and the filtered samples, e.g. after a gap."""
+        self._zi = None
+        self.buffer = RingBuffer(self.n_channels, self.buffer.capacity)
+
+    def process(
+        self, chunk: typing.Any, new_samples: typing.Optional[int] = None
+    ) -> np.ndarray:
+        """Filters newly arrived samples.
+
+        Parameters
+        ----------
+        chunk : np.ndarray
+            Samples, shape (channels, samples).
+        new_samples : int, optional
+            Number of new samples at the end of `chunk`, as passed by
+            `EEG.subscribe`. Older samples were filtered before and are
+            skipped. By default all samples are new.
+
+        Returns
+        -------
+        np.ndarray
+            Filtered samples, shape (channels, samples). They are also
+            appended to the ring buffer.
+
+        Raises
+        ------
+        BrainAccessException
+            If `new_samples` is larger than the chunk, i.e. samples were
+            lost and the filter state would run across the gap.
+        """
+        x = np.asarray(chunk, dtype=np.float64)
+        if new_samples is not None:
+            if new_samples > x.shape[1]:
+                raise BrainAccessException(
+                    f"{new_samples} new samples do not fit into a window of "
+                    f"{x.shape[1]}, use a longer window"
+                )
+            x = x[:, x.shape[1] - new_samples:]
+        if x.shape[1] == 0:
+            return x
+        if self._zi is None:
+            # steady state for the first sample, so a DC offset does not
+            # start with a step response
+            zi = signal.sosfilt_zi(self.sos)
+            self._zi = zi[:, None, :] * x[None, :, :1]
+        filtered, self._zi = signal.sosfilt(self.sos, x, axis=-1, zi=self._zi)
+        self.buffer.write(filtered)
+        return filtered
+
+    def latest(self, samples: typing.Optional[int] = None) -> np.ndarray:
+        """Returns a copy of the most recent filtered samples.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples. Whole buffer if None.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        return self.buffer.latest(samples, copy=True)
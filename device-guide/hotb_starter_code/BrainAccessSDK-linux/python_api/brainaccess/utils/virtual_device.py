@@ -0,0 +1,632 @@
+"""Virtual devices standing in for `EEGManager` without a headset.
+
+Virtual managers implement the part of the `EEGManager` interface used by
+`brainaccess.utils.acquisition.EEG` and deliver chunks from a Python thread
+through the same `set_callback_chunk` contract, including contiguous
+records and native channel types. They allow running and benchmarking the
+whole acquisition and processing pipeline without Bluetooth.
+"""
+
+import ctypes
+import threading
+import time
+import typing
+
+import numpy as np
+import mne  # type: ignore
+from scipy import signal  # type: ignore
+
+import brainaccess.core.eeg_channel as eeg_channel
+from brainaccess.core.battery_info import BatteryInfo
+from brainaccess.core.eeg_manager import _ChunkDispatcher
+from brainaccess.core.stream_rate import StreamRate
+from brainaccess.utils.exceptions import BrainAccessException
+
+
+def _channel_dtype(channel: int) -> np.dtype:
+    """Native data type the device streams a channel with."""
+    if channel == eeg_channel.SAMPLE_NUMBER:
+        return np.dtype(np.uint64)
+    if (
+        eeg_channel.ELECTRODE_CONTACT_P <= channel < eeg_channel.GYROSCOPE
+        or channel >= eeg_channel.STREAMING
+    ):
+        # contact status, digital inputs and streaming flags
+        return np.dtype(np.uint8)
+    return np.dtype(np.float32)
+
+
+class VirtualDeviceFeatures:
+    """Features of a virtual device, mirrors `DeviceFeatures`."""
+
+    def __init__(
+        self,
+        electrodes: int,
+        accel: bool = True,
+        gyro: bool = False,
+        bipolar: bool = False,
+    ) -> None:
+        self._electrodes = electrodes
+        self._accel = accel
+        self._gyro = gyro
+        self._bipolar = bipolar
+
+    def has_gyro(self) -> bool:
+        """Checks if the device is equipped with a gyroscope."""
+        return self._gyro
+
+    def has_accel(self) -> bool:
+        """Checks if the device is equipped with an accelerometer."""
+        return self._accel
+
+    def is_bipolar(self) -> bool:
+        """Checks if the device uses bipolar electrodes."""
+        return self._bipolar
+
+    def electrode_count(self) -> int:
+        """Gets the total number of electrodes on the device."""
+        return self._electrodes
+
+
+class VirtualEEGManager:
+    """Base class of virtual devices.
+
+    Subclasses provide the samples by implementing `_read`. The base class
+    handles configuration, the channel layout, pacing, sample numbers,
+    annotations and chunk delivery.
+    """
+
+    def __init__(
+        self,
+        sfreq: int = 250,
+        features: typing.Optional[VirtualDeviceFeatures] = None,
+        chunk_size: typing.Optional[int] = None,
+        speed: typing.Optional[float] = 1.0,
+    ) -> None:
+        """Initializes the virtual device.
+
+        Parameters
+        ----------
+        sfreq : int, optional
+            Initial sampling frequency, by default 250.
+        features : VirtualDeviceFeatures, optional
+            Features reported to `EEG.setup`, by default 8 electrodes with an
+            accelerometer.
+        chunk_size : int, optional
+            Samples per chunk, by default about 40 ms of data.
+        speed : float, optional
+            Playback speed relative to real time. None delivers chunks as
+            fast as the consumer takes them. By default 1.0.
+        """
+        if features is None:
+            features = VirtualDeviceFeatures(8)
+        self.features = features
+        self.speed = speed
+        self._sfreq = sfreq
+        self._chunk_size = chunk_size
+        self._enabled: set = {eeg_channel.SAMPLE_NUMBER}
+        self._layout: list = []
+        self._connected = False
+        self._streaming = False
+        # the data ran out and the stream ended by itself
+        self._ended = False
+        self._sample = 0
+        self._annotations: list = []
+        self._callback_chunk: typing.Optional[typing.Callable] = None
+        self._contiguous = False
+        self._dispatcher: typing.Optional[_ChunkDispatcher] = None
+        self._callback_disconnect: typing.Optional[typing.Callable] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    def __enter__(self) -> "VirtualEEGManager":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.destroy()
+
+    def destroy(self) -> None:
+        """Stops streaming and disconnects."""
+        self.disconnect()
+
+    def connect(self, bt_device_name: str) -> int:
+        """Connects to the virtual device, any name is accepted."""
+        self._connected = True
+        return 0
+
+    def is_connected(self) -> bool:
+        """Checks if the virtual device is connected."""
+        return self._connected
+
+    def disconnect(self) -> None:
+        """Stops streaming and disconnects."""
+        if self._streaming:
+            self.stop_stream()
+        self._connected = False
+
+    def get_device_features(self) -> VirtualDeviceFeatures:
+        """Returns the features of the virtual device."""
+        return self.features
+
+    def get_battery_info(self) -> BatteryInfo:
+        """Returns a full battery."""
+        return BatteryInfo(level=100, is_charger_connected=False, is_charging=False)
+
+    def set_channel_enabled(self, channel: int, state: bool) -> None:
+        """Enables or disables a channel."""
+        if self._streaming:
+            raise BrainAccessException("Cannot change channel state while streaming")
+        if state:
+            self._enabled.add(channel)
+        else:
+            self._enabled.discard(channel)
+
+    def set_channel_gain(self, channel: int, gain: typing.Any) -> None:
+        """Accepted for compatibility, gain has no effect."""
+        if self._streaming:
+            raise BrainAccessException("Cannot change channel gain while streaming")
+
+    def set_channel_bias(self, channel: int, p: typing.Any) -> None:
+        """Accepted for compatibility, bias has no effect."""
+        if self._streaming:
+            raise BrainAccessException("Cannot change channel bias while streaming")
+
+    def set_impedance_mode(self, mode: typing.Any) -> None:
+        """Accepted for compatibility, impedance mode has no effect."""
+        if self._streaming:
+            raise BrainAccessException("Cannot change impedance mode while streaming")
+
+    def set_sample_rate(self, sample_rate: int) -> bool:
+        """Sets the sampling frequency, any `StreamRate` is accepted."""
+        if self._streaming:
+            raise BrainAccessException("Cannot change sample rate while streaming")
+        if StreamRate.from_hz(sample_rate) == StreamRate.UNKNOWN:
+            raise BrainAccessException("Wrong sample rate")
+        self._sfreq = sample_rate
+        return True
+
+    def get_sample_frequency(self) -> int:
+        """Gets the sampling frequency."""
+        return self._sfreq
+
+    def load_config(self, callback: typing.Optional[typing.Callable] = None) -> None:
+        """Applies the channel configuration."""
+        # the device sends the sample number first and the rest by channel id
+        self._layout = sorted(self._enabled)
+        if callback is not None:
+            callback()
+
+    def get_channel_index(self, channel: int) -> int:
+        """Gets the index of a channel within the data chunk."""
+        try:
+            return self._layout.index(channel)
+        except ValueError:
+            raise BrainAccessException(
+                "Channel does not exist or is not currently streaming"
+            )
+
+    def set_callback_chunk(
+        self,
+        f: typing.Optional[typing.Callable],
+        contiguous: bool = False,
+        queue_size: int = 0,
+    ) -> None:
+        """Sets the chunk callback, see `EEGManager.set_callback_chunk`.
+
+        Chunks are produced on a Python thread. Without a queue a slow
+        callback slows the playback down; with a positive `queue_size` the
+        chunks go through the same dispatch ring as with a real device.
+        """
+        dispatcher = _ChunkDispatcher(f, queue_size) if f and queue_size > 0 else None
+        with self._lock:
+            previous = self._dispatcher
+            self._callback_chunk = f
+            self._contiguous = contiguous
+            self._dispatcher = dispatcher
+        if previous is not None:
+            previous.stop()
+
+    def get_dispatch_stats(self) -> dict:
+        """Retrieves the counters of the queued chunk dispatch.
+
+        See `EEGManager.get_dispatch_stats`.
+        """
+        with self._lock:
+            dispatcher = self._dispatcher
+        if dispatcher is None:
+            raise BrainAccessException("Queued chunk dispatch is not enabled")
+        return dispatcher.stats()
+
+    def set_callback_disconnect(
+        self, callback: typing.Optional[typing.Callable] = None
+    ) -> None:
+        """Sets a callback called when the stream ends by itself."""
+        self._callback_disconnect = callback
+
+    def set_callback_battery(
+        self, callback: typing.Optional[typing.Callable] = None
+    ) -> None:
+        """Accepted for compatibility, the battery never changes."""
+
+    def start_stream(self, callback: typing.Optional[typing.Callable] = None) -> bool:
+        """Starts delivering chunks."""
+        if self._streaming:
+            raise BrainAccessException("Stream already running")
+        if not self._layout:
+            self.load_config()
+        self._sample = 0
+        self._stop.clear()
+        self._ended = False
+        self._streaming = True
+        self._thread = threading.Thread(
+            target=self._run, name="brainaccess-virtual-device", daemon=True
+        )
+        self._thread.start()
+        if callback is not None:
+            callback()
+        return True
+
+    def stop_stream(self, callback: typing.Optional[typing.Callable] = None) -> bool:
+        """Stops delivering chunks.
+
+        A stream that already ended because the data ran out can still be
+        stopped, so callers need not check whether a replay finished.
+        """
+        if not self._streaming and not self._ended:
+            raise BrainAccessException("Stream not running")
+        self._ended = False
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and threading.current_thread() is not thread:
+            thread.join()
+        self._streaming = False
+        if callback is not None:
+            callback()
+        return True
+
+    def is_streaming(self) -> bool:
+        """Checks if chunks are being delivered."""
+        return self._streaming
+
+    def annotate(self, annotation: str) -> None:
+        """Adds an annotation at the current sample."""
+        if not annotation:
+            raise BrainAccessException("Annotation cannot be empty")
+        self._annotations.append((self._sample, annotation))
+
+    def get_annotations(self) -> dict:
+        """Retrieves all accumulated annotations."""
+        return {
+            "annotations": [text for _, text in self._annotations],
+            "timestamps": [sample for sample, _ in self._annotations],
+        }
+
+    def clear_annotations(self) -> None:
+        """Clears all existing annotations."""
+        self._annotations = []
+
+    def _read(
+        self, first_sample: int, samples: int, channels: list
+    ) -> typing.Optional[list]:
+        """Returns the samples of the given channels.
+
+        Parameters
+        ----------
+        first_sample : int
+            Number of the first sample.
+        samples : int
+            Number of samples requested.
+        channels : list
+            Channel ids, without the sample number.
+
+        Returns
+        -------
+        list or None
+            One array per channel, possibly shorter than `samples`, or None
+            when there is no more data.
+        """
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        """Streaming thread, generates and paces the chunks."""
+        chunk_size = self._chunk_size or max(1, self._sfreq // 25)
+        layout = list(self._layout)
+        dtypes = [_channel_dtype(channel) for channel in layout]
+        # one list object, the dispatcher compares layouts by identity
+        stream_types = [np.ctypeslib.as_ctypes_type(dtype) for dtype in dtypes]
+        generated = (eeg_channel.SAMPLE_NUMBER, eeg_channel.STREAMING)
+        channels = [c for c in layout if c not in generated]
+        records: dict = {}
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            rows = self._read(self._sample, chunk_size, channels)
+            if rows is None:
+                break
+            n = len(rows[0]) if rows else chunk_size
+            data = iter(rows)
+            chunk = []
+            for channel, dtype in zip(layout, dtypes):
+                if channel == eeg_channel.SAMPLE_NUMBER:
+                    row = np.arange(self._sample, self._sample + n, dtype=dtype)
+                elif channel == eeg_channel.STREAMING:
+                    # no samples are ever lost
+                    row = np.ones(n, dtype=dtype)
+                else:
+                    row = np.asarray(next(data)[:n], dtype=dtype)
+                chunk.append(np.ascontiguousarray(row))
+            with self._lock:
+                cbk, contiguous = self._callback_chunk, self._contiguous
+                dispatcher = self._dispatcher
+            if cbk is not None and dispatcher is not None:
+                addresses = [ctypes.c_void_p(row.ctypes.data) for row in chunk]
+                dispatcher.put(addresses, n, stream_types)
+            elif cbk is not None and contiguous:
+                record = records.get(n)
+                if record is None:
+                    record = np.zeros(
+                        (),
+                        dtype=[(str(i), d, (n,)) for i, d in enumerate(dtypes)],
+                    )
+                    records[n] = record
+                for i, row in enumerate(chunk):
+                    record[str(i)] = row
+                cbk(record, n)
+            elif cbk is not None:
+                cbk(chunk, n)
+            self._sample += n
+            if self.speed:
+                delay = start + self._sample / (self._sfreq * self.speed)
+                self._stop.wait(max(0.0, delay - time.perf_counter()))
+        if not self._stop.is_set():
+            # the data ran out, report like a device that went away
+            self._ended = True
+            self._streaming = False
+            if self._callback_disconnect is not None:
+                self._callback_disconnect()
+
+
+class ReplayManager(VirtualEEGManager):
+    """Virtual device replaying a FIF file, e.g. one saved by `EEGData.save`."""
+
+    def __init__(
+        self,
+        fname: str,
+        speed: typing.Optional[float] = 1.0,
+        chunk_size: typing.Optional[int] = None,
+        loop: bool = False,
+        channel_map: typing.Optional[dict] = None,
+    ) -> None:
+        """Loads the recording.
+
+        Parameters
+        ----------
+        fname : str
+            FIF file to replay.
+        speed : float, optional
+            Playback speed relative to real time, e.g. 10 for 10x. None
+            replays as fast as possible. By default 1.0.
+        chunk_size : int, optional
+            Samples per chunk, by default about 40 ms of data.
+        loop : bool, optional
+            Start over at the end of the file instead of ending the stream,
+            by default False.
+        channel_map : dict, optional
+            Maps channel ids (see `brainaccess.core.eeg_channel`) to channel
+            names in the file. By default EEG channels are mapped to
+            electrodes 0, 1, ... in file order, ``Accel_x/y/z`` to the
+            accelerometer and stim channels to the digital inputs.
+        """
+        raw = mne.io.read_raw(fname, preload=True, verbose=False)
+        self._data = raw.get_data()
+        self.loop = loop
+        if channel_map is None:
+            channel_map = self._default_channel_map(raw)
+        self._rows = {
+            channel: raw.ch_names.index(name) for channel, name in channel_map.items()
+        }
+        electrodes = [
+            c for c in self._rows
+            if eeg_channel.ELECTRODE_MEASUREMENT <= c < eeg_channel.ELECTRODE_CONTACT_P
+        ]
+        features = VirtualDeviceFeatures(
+            len(electrodes),
+            accel=any(
+                eeg_channel.ACCELEROMETER <= c < eeg_channel.STREAMING
+                for c in self._rows
+            ),
+        )
+        super().__init__(
+            sfreq=int(raw.info["sfreq"]),
+            features=features,
+            chunk_size=chunk_size,
+            speed=speed,
+        )
+
+    @staticmethod
+    def _default_channel_map(raw: mne.io.BaseRaw) -> dict:
+        """Maps channel ids to file channels by name and type."""
+        channel_map = {}
+        types = raw.get_channel_types()
+        electrode = 0
+        digital = 0
+        for name, ch_type in zip(raw.ch_names, types):
+            if name in ("Accel_x", "Accel_y", "Accel_z"):
+                axis = "xyz".index(name[-1])
+                channel_map[eeg_channel.ACCELEROMETER + axis] = name
+            elif ch_type == "eeg":
+                channel_map[eeg_channel.ELECTRODE_MEASUREMENT + electrode] = name
+                electrode += 1
+            elif ch_type == "stim":
+                channel_map[eeg_channel.DIGITAL_INPUT + digital] = name
+                digital += 1
+        return channel_map
+
+    def set_sample_rate(self, sample_rate: int) -> bool:
+        """Checks that the requested rate matches the recording."""
+        if sample_rate != self._sfreq:
+            raise BrainAccessException(
+                f"Recording was sampled at {self._sfreq} Hz, not {sample_rate} Hz"
+            )
+        return super().set_sample_rate(sample_rate)
+
+    def _read(
+        self, first_sample: int, samples: int, channels: list
+    ) -> typing.Optional[list]:
+        n_times = self._data.shape[1]
+        if self.loop:
+            index = np.arange(first_sample, first_sample + samples) % n_times
+        elif first_sample >= n_times:
+            return None
+        else:
+            index = np.arange(first_sample, min(first_sample + samples, n_times))
+        return [
+            self._data[self._rows[channel], index]
+            if channel in self._rows
+            else np.zeros(len(index))
+            for channel in channels
+        ]
+
+
+class SyntheticManager(VirtualEEGManager):
+    """Virtual device generating synthetic EEG at any supported rate.
+
+    Every electrode carries alpha and beta oscillations with a random phase,
+    pink noise and mains interference. Blinks (strongest on the first two,
+    frontal, electrodes) and movement artifacts occur at random, movements
+    also show up on the accelerometer. Artifacts that do not fit into a
+    chunk continue in the next one. Amplitudes are in microvolts.
+    """
+
+    # pink noise filter (Kellet), 1/f spectrum from white noise
+    _PINK_B = [0.049922035, -0.095993537, 0.050612699, -0.004408786]
+    _PINK_A = [1.0, -2.494956002, 2.017265875, -0.522189400]
+
+    def __init__(
+        self,
+        electrodes: int = 8,
+        sfreq: int = 250,
+        speed: typing.Optional[float] = 1.0,
+        chunk_size: typing.Optional[int] = None,
+        alpha: typing.Tuple[float, float] = (10.0, 10.0),
+        beta: typing.Tuple[float, float] = (20.0, 3.0),
+        pink_noise: float = 5.0,
+        mains: typing.Tuple[float, float] = (50.0, 10.0),
+        blink_rate: float = 0.2,
+        blink_amplitude: float = 150.0,
+        movement_rate: float = 0.05,
+        movement_amplitude: float = 80.0,
+        seed: typing.Optional[int] = None,
+    ) -> None:
+        """Initializes the generator.
+
+        Parameters
+        ----------
+        electrodes : int, optional
+            Number of electrodes, by default 8.
+        sfreq : int, optional
+            Initial sampling frequency, changed by `set_sample_rate`.
+        speed : float, optional
+            Speed relative to real time. None generates as fast as the
+            consumer takes the chunks. By default 1.0.
+        chunk_size : int, optional
+            Samples per chunk, by default about 40 ms of data.
+        alpha : tuple, optional
+            Alpha frequency in Hz and amplitude, by default (10, 10).
+        beta : tuple, optional
+            Beta frequency in Hz and amplitude, by default (20, 3).
+        pink_noise : float, optional
+            Pink noise amplitude, by default 5.
+        mains : tuple, optional
+            Mains frequency in Hz and amplitude, by default (50, 10).
+        blink_rate : float, optional
+            Blinks per second, by default 0.2.
+        blink_amplitude : float, optional
+            Blink amplitude on the frontal electrodes, by default 150.
+        movement_rate : float, optional
+            Movement artifacts per second, by default 0.05.
+        movement_amplitude : float, optional
+            Movement artifact amplitude, by default 80.
+        seed : int, optional
+            Seed of the random generator.
+        """
+        super().__init__(
+            sfreq=sfreq,
+            features=VirtualDeviceFeatures(electrodes, accel=True),
+            chunk_size=chunk_size,
+            speed=speed,
+        )
+        self.electrodes = electrodes
+        self.alpha = alpha
+        self.beta = beta
+        self.pink_noise = pink_noise
+        self.mains = mains
+        self.blink_rate = blink_rate
+        self.blink_amplitude = blink_amplitude
+        self.movement_rate = movement_rate
+        self.movement_amplitude = movement_amplitude
+        self._rng = np.random.default_rng(seed)
+        self._phases = self._rng.uniform(0, 2 * np.pi, (2, electrodes, 1))
+        self._pink_state = np.zeros((electrodes, len(self._PINK_A) - 1))
+        # blinks are strongest on the frontal electrodes
+        self._blink_weights = np.full(electrodes, 0.2)
+        self._blink_weights[:2] = 1.0
+        self._movement_weights = self._rng.uniform(0.5, 1.0, electrodes)
+        # artifact samples spilling over into the next chunk
+        self._carry = np.zeros((electrodes + 3, 0))
+
+    def _artifact(self, seconds: float) -> np.ndarray:
+        """Smooth artifact waveform lasting `seconds`."""
+        return np.hanning(max(3, int(seconds * self._sfreq)))
+
+    def _read(
+        self, first_sample: int, samples: int, channels: list
+    ) -> typing.Optional[list]:
+        t = np.arange(first_sample, first_sample + samples) / self._sfreq
+        data = np.zeros((self.electrodes + 3, samples))
+        eeg = data[: self.electrodes]
+        for (freq, amplitude), phases in zip((self.alpha, self.beta), self._phases):
+            eeg += amplitude * np.sin(2 * np.pi * freq * t + phases)
+        eeg += self.mains[1] * np.sin(2 * np.pi * self.mains[0] * t)
+        white = self._rng.standard_normal((self.electrodes, samples))
+        pink, self._pink_state = signal.lfilter(
+            self._PINK_B, self._PINK_A, white, axis=1, zi=self._pink_state
+        )
+        eeg += self.pink_noise * pink
+        # accelerometer, gravity on z and sensor noise
+        data[-1] += 1.0
+        data[self.electrodes:] += 0.01 * self._rng.standard_normal((3, samples))
+
+        blink = self._artifact(0.3)
+        movement = self._artifact(1.0)
+        extra = np.zeros((self.electrodes + 3, samples + len(movement)))
+        extra[:, : self._carry.shape[1]] += self._carry
+        seconds = samples / self._sfreq
+        for _ in range(self._rng.poisson(self.blink_rate * seconds)):
+            start = self._rng.integers(samples)
+            extra[: self.electrodes, start:start + len(blink)] += (
+                self.blink_amplitude * self._blink_weights[:, None] * blink
+            )
+        for _ in range(self._rng.poisson(self.movement_rate * seconds)):
+            start = self._rng.integers(samples)
+            wave = movement * np.sin(np.linspace(0, 6 * np.pi, len(movement)))
+            extra[: self.electrodes, start:start + len(movement)] += (
+                self.movement_amplitude * self._movement_weights[:, None] * wave
+            )
+            extra[self.electrodes:, start:start + len(movement)] += (
+                0.5 * self._rng.uniform(-1, 1, (3, 1)) * wave
+            )
+        data += extra[:, :samples]
+        self._carry = extra[:, samples:]
+
+        rows = []
+        for channel in channels:
+            electrode = channel - eeg_channel.ELECTRODE_MEASUREMENT
+            axis = channel - eeg_channel.ACCELEROMETER
+            if 0 <= electrode < self.electrodes:
+                rows.append(data[electrode])
+            elif 0 <= axis < 3:
+                rows.append(data[self.electrodes + axis])
+            else:
+                rows.append(np.zeros(samples))
+        return rows
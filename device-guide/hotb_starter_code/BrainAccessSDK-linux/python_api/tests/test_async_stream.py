@@ -0,0 +1,78 @@
+"""Tests of the asyncio stream fed from the acquisition thread."""
+
+import asyncio
+import threading
+
+import pytest
+
+from brainaccess.utils.async_stream import AsyncChunkStream
+from brainaccess.utils.exceptions import BrainAccessException
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+def _fill(drop):
+    async def main():
+        stream = AsyncChunkStream(asyncio.get_running_loop(), 2, drop)
+        for item in range(5):
+            stream.put(item)
+        await asyncio.sleep(0)
+        stream.close()
+        return await _collect(stream), stream.dropped
+
+    return asyncio.run(main())
+
+
+def test_drop_oldest():
+    assert _fill("oldest") == ([3, 4], 3)
+
+
+def test_drop_newest():
+    assert _fill("newest") == ([0, 1], 3)
+
+
+def test_items_from_another_thread():
+    async def main():
+        stream = AsyncChunkStream(asyncio.get_running_loop(), 100)
+
+        def produce():
+            for item in range(50):
+                stream.put(item)
+            stream.close()
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        items = await _collect(stream)
+        thread.join()
+        return items, stream.dropped
+
+    assert asyncio.run(main()) == (list(range(50)), 0)
+
+
+def test_close():
+    closed = []
+
+    async def main():
+        stream = AsyncChunkStream(
+            asyncio.get_running_loop(), on_close=lambda: closed.append(1)
+        )
+        async with stream:
+            stream.put(1)
+            await asyncio.sleep(0)
+        stream.close()
+        stream.put(2)
+        await asyncio.sleep(0)
+        return await _collect(stream)
+
+    assert asyncio.run(main()) == [1]
+    assert closed == [1]
+
+
+@pytest.mark.parametrize("max_pending, drop", [(0, "oldest"), (4, "middle")])
+def test_invalid(max_pending, drop):
+    loop = asyncio.new_event_loop()
+    with pytest.raises(BrainAccessException):
+        AsyncChunkStream(loop, max_pending, drop)
+    loop.close()
@@ -0,0 +1,51 @@
+"""Tests of the device broker and its clients, using a replayed recording."""
+
+import threading
+import time
+
+import mne
+import numpy as np
+import pytest
+
+from brainaccess.utils.broker import BrokerClient, DeviceBroker
+from brainaccess.utils.exceptions import BrainAccessException
+from brainaccess.utils.virtual_device import ReplayManager
+
+SFREQ = 250
+CAP = {0: "Fp1", 1: "Fp2"}
+
+
+@pytest.fixture
+def broker(tmp_path):
+    rng = np.random.default_rng(0)
+    info = mne.create_info(list(CAP.values()), SFREQ, "eeg")
+    raw = mne.io.RawArray(rng.standard_normal((2, 4 * SFREQ)), info, verbose=False)
+    fname = tmp_path / "replay_raw.fif"
+    raw.save(fname, verbose=False)
+    broker = DeviceBroker(
+        "v", CAP, port=0, seconds=2.0, manager=ReplayManager(fname, speed=4)
+    )
+    broker.start()
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    yield broker
+    broker.stop()
+
+
+def test_client_reads_shared_samples(broker):
+    with BrokerClient(*broker.address) as client:
+        assert client.ch_names[:2] == ["Fp1", "Fp2"]
+        assert client.sfreq == SFREQ
+        time.sleep(0.2)
+        assert client.status()["total"] > 0
+        assert client.get_window(10, ["Fp2", "Fp1"]).shape == (2, 10)
+        with pytest.raises(BrainAccessException):
+            client.request("unknown")
+
+
+def test_disconnect_is_reported(broker):
+    with BrokerClient(*broker.address) as client:
+        deadline = time.time() + 10
+        while broker.error is None and time.time() < deadline:
+            time.sleep(0.05)
+        with pytest.raises(BrainAccessException, match="disconnected"):
+            client.status()
@@ -0,0 +1,125 @@
+"""Tests of the sample buffers."""
+
+import numpy as np
+import pytest
+
+from brainaccess.utils.buffers import (
+    GrowableBuffer,
+    RingBuffer,
+    SpillBuffer,
+    TypedBuffer,
+)
+
+
+def _samples(start, stop, n_channels=3):
+    return np.arange(start, stop, dtype=np.float64) + 1000 * np.arange(
+        n_channels
+    )[:, None]
+
+
+@pytest.fixture
+def spill(tmp_path):
+    buffer = SpillBuffer(3, tmp_path / "spill.dat", hot_capacity=10)
+    yield buffer
+    buffer.close()
+
+
+def test_spill_latest_spans_file_and_tail(spill):
+    for start in range(0, 25, 5):
+        spill.write(_samples(start, start + 5))
+    assert spill.total == 25
+    assert spill._spilled == 20
+    np.testing.assert_array_equal(spill.latest(3), _samples(22, 25))
+    np.testing.assert_array_equal(spill.latest(12), _samples(13, 25))
+    np.testing.assert_array_equal(spill.latest(), _samples(0, 25))
+
+
+def test_spill_reads_do_not_flush(spill):
+    spill.write(_samples(0, 10))
+    spill.write(_samples(10, 14))
+    spill.latest(14)
+    spill.latest(8)
+    # the tail keeps growing in memory, the file is only appended when full
+    assert spill._spilled == 10
+    spill.write(_samples(14, 20))
+    assert spill._spilled == 20
+    np.testing.assert_array_equal(spill.latest(20), _samples(0, 20))
+
+
+def test_spill_map_view_when_tail_is_empty(spill):
+    spill.write(_samples(0, 10))
+    out = spill.latest(10)
+    assert isinstance(out.base, np.memmap) or isinstance(out, np.memmap)
+    spill.write(_samples(10, 20))
+    np.testing.assert_array_equal(out, _samples(0, 10))
+    assert not isinstance(spill.latest(10, copy=True), np.memmap)
+
+
+def test_spill_range(spill):
+    spill.write(_samples(0, 25))
+    np.testing.assert_array_equal(spill.range(3, 8), _samples(3, 8))
+    np.testing.assert_array_equal(spill.range(18, 23), _samples(18, 23))
+    np.testing.assert_array_equal(spill.range(22, 40), _samples(22, 25))
+    assert spill.range(30, 40).shape == (3, 0)
+
+
+def test_ring_range_after_wrap():
+    ring = RingBuffer(3, 10)
+    for start in range(0, 23, 3):
+        ring.write(_samples(start, start + 3))
+    np.testing.assert_array_equal(ring.latest(), _samples(14, 24))
+    np.testing.assert_array_equal(ring.range(15, 22), _samples(15, 22))
+    np.testing.assert_array_equal(ring.range(0, 16), _samples(14, 16))
+    assert ring.range(0, 5).shape == (3, 0)
+
+
+def test_ring_oversized_and_filled():
+    ring = RingBuffer(3, 4, filled=True)
+    assert ring.total == 4
+    np.testing.assert_array_equal(ring.latest(), np.zeros((3, 4)))
+    ring.write(_samples(0, 9))
+    np.testing.assert_array_equal(ring.latest(), _samples(5, 9))
+    np.testing.assert_array_equal(ring.range(10, 12), _samples(6, 8))
+
+
+def test_growable_keeps_views_valid():
+    buffer = GrowableBuffer(3, capacity=2)
+    buffer.write(_samples(0, 3))
+    view = buffer.latest()
+    buffer.write(_samples(3, 20))
+    assert buffer.capacity >= 20
+    np.testing.assert_array_equal(view, _samples(0, 3))
+    np.testing.assert_array_equal(buffer.range(5, 9), _samples(5, 9))
+
+
+def _typed():
+    buffer = TypedBuffer(
+        3, lambda n_rows, dtype, group: GrowableBuffer(n_rows, 4, dtype)
+    )
+    for start in range(0, 12, 4):
+        samples = np.arange(start, start + 4)
+        buffer.write(
+            [
+                samples.astype(np.uint64),
+                samples.astype(np.float32) / 2,
+                (samples % 2).astype(np.uint8),
+            ]
+        )
+    return buffer
+
+
+def test_typed_groups_by_dtype():
+    buffer = _typed()
+    assert len(buffer.groups) == 3
+    assert buffer.total == 12
+    assert buffer.row_dtype(0) == np.uint64
+    assert buffer.latest(2, rows=[1]).dtype == np.float32
+    out = buffer.latest(3, rows=[1, 0], dtype=np.float64)
+    np.testing.assert_array_equal(out, [[4.5, 5, 5.5], [9, 10, 11]])
+
+
+def test_typed_range():
+    buffer = _typed()
+    out = buffer.range(2, 6, rows=[0, 2])
+    np.testing.assert_array_equal(out, [[2, 3, 4, 5], [0, 1, 0, 1]])
+    np.testing.assert_array_equal(buffer.range(10, 20, rows=[1]), [[5, 5.5]])
@@ -0,0 +1,56 @@
+"""Tests of the acquisition gap index."""
+
+import numpy as np
+
+from brainaccess.utils.gaps import GapIndex
+
+
+def test_sample_number_jump():
+    index = GapIndex()
+    index.update(np.array([0, 1, 2, 5, 6]))
+    assert index.gaps() == [(3, 3, 2)]
+    assert index.lost == 2
+    assert index.is_intact(0, 3)
+    assert index.is_intact(3, 5)
+    assert not index.is_intact(2, 4)
+
+
+def test_jump_between_chunks():
+    index = GapIndex(offset=100)
+    index.update(np.arange(0, 3))
+    index.update(np.arange(4, 6))
+    assert index.gaps() == [(103, 103, 1)]
+    assert index.total == 105
+    assert index.is_latest_intact(2)
+    assert not index.is_latest_intact(3)
+
+
+def test_zero_filled_samples():
+    index = GapIndex()
+    streaming = np.array([1, 1, 0, 0, 1, 1, 1, 0])
+    index.update(np.arange(8), streaming)
+    assert index.gaps() == [(2, 4, 2), (7, 8, 1)]
+    assert index.is_intact(4, 7)
+    assert not index.is_intact(3, 5)
+
+
+def test_touching_gaps_are_merged():
+    index = GapIndex()
+    index.update(np.array([0, 1, 2, 4, 5, 6]), np.array([1, 1, 1, 0, 0, 1]))
+    assert len(index) == 1
+    assert index.gaps() == [(3, 5, 3)]
+    assert index.lost == 3
+
+
+def test_decimated_step():
+    index = GapIndex(step=4)
+    index.update(np.array([0, 4, 8, 16, 20]))
+    assert index.gaps() == [(3, 3, 4)]
+
+
+def test_gaps_in_window():
+    index = GapIndex()
+    index.update(np.array([0, 2, 3, 5, 6, 8]))
+    assert len(index) == 3
+    assert index.gaps(2, 4) == [(3, 3, 1)]
+    assert index.gaps(4) == [(5, 5, 1)]
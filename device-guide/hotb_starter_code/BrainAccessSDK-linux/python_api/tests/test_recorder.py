@@ -0,0 +1,34 @@
+"""Tests of the streaming recorder."""
+
+import mne
+import numpy as np
+
+from brainaccess.utils.recorder import StreamRecorder
+
+SFREQ = 250
+
+
+def _chunk(start, stop):
+    samples = np.arange(start, stop, dtype=np.float64)
+    return np.vstack((samples, -samples))
+
+
+def test_finalize_writes_pushed_chunks(tmp_path):
+    recorder = StreamRecorder(tmp_path / "rec_raw.fif", flush_interval=0.01)
+    for start in range(0, 100, 7):
+        recorder.push(_chunk(start, start + 7))
+    info = mne.create_info(["a", "b"], SFREQ, "eeg")
+    fname = recorder.finalize(info)
+    raw = mne.io.read_raw(fname, verbose=False)
+    np.testing.assert_array_equal(raw.get_data(), _chunk(0, 105))
+    assert not recorder.part_path.exists()
+
+
+def test_push_after_stop_is_ignored(tmp_path):
+    recorder = StreamRecorder(tmp_path / "rec_raw.fif", flush_interval=10)
+    recorder.push(_chunk(0, 5))
+    recorder.stop()
+    recorder.push(_chunk(5, 10))
+    assert recorder._queue.empty()
+    assert recorder.samples == 5
+    recorder.stop()
@@ -0,0 +1,116 @@
+"""Tests of the stateful streaming stages."""
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from brainaccess.utils.exceptions import BrainAccessException
+from brainaccess.utils.streaming import StreamingDecimator, StreamingFilterBank
+
+SFREQ = 250
+
+
+def _offline(bank, x):
+    zi = signal.sosfilt_zi(bank.sos)[:, None, :] * x[None, :, :1]
+    return signal.sosfilt(bank.sos, x, zi=zi)[0]
+
+
+@pytest.fixture
+def stream():
+    return np.random.default_rng(0).standard_normal((2, 2000)) + 5.0
+
+
+def test_filter_bank_chunks_match_offline(stream):
+    bank = StreamingFilterBank.design(SFREQ, 2, 4000, band=(1, 40), notch=50)
+    for start in range(0, 2000, 130):
+        bank.process(stream[:, start:start + 130])
+    assert bank.total == 2000
+    np.testing.assert_allclose(bank.latest(), _offline(bank, stream), atol=1e-9)
+
+
+def test_filter_bank_windows_match_offline(stream):
+    bank = StreamingFilterBank.design(SFREQ, 2, 4000, band=(1, 40))
+    stop = 0
+    for new in (300, 130, 260, 130, 500, 130):
+        stop += new
+        bank.process(stream[:, max(stop - 500, 0):stop], new)
+    np.testing.assert_allclose(
+        bank.latest(), _offline(bank, stream[:, :stop]), atol=1e-9
+    )
+
+
+def test_filter_bank_rejects_lost_samples(stream):
+    bank = StreamingFilterBank.design(SFREQ, 2, 4000, band=(None, 40))
+    bank.process(stream[:, :125])
+    with pytest.raises(BrainAccessException):
+        bank.process(stream[:, 5:130], 130)
+    assert bank.total == 125
+
+
+def test_filter_bank_reset(stream):
+    bank = StreamingFilterBank.design(SFREQ, 2, 4000, notch=50)
+    bank.process(stream[:, :100])
+    bank.reset()
+    assert bank.total == 0
+    bank.process(stream[:, 100:300])
+    np.testing.assert_allclose(
+        bank.latest(), _offline(bank, stream[:, 100:300]), atol=1e-9
+    )
+
+
+def test_filter_bank_needs_a_filter():
+    with pytest.raises(BrainAccessException):
+        StreamingFilterBank.design(SFREQ, 2, 100)
+
+
+def _decimate(decimator, stream, sizes):
+    out = []
+    start = 0
+    for size in sizes:
+        out.append(decimator.process(stream[:, start:start + size]))
+        start += size
+    return [np.concatenate(rows) for rows in zip(*out)]
+
+
+def test_decimator_matches_offline_fir(stream):
+    decimator = StreamingDecimator(4)
+    (out,) = _decimate(decimator, stream[:1], [2000])
+    taps = signal.firwin(decimator.numtaps, 1 / 4, window="hamming")
+    padded = np.concatenate((np.full(decimator.numtaps - 1, stream[0, 0]), stream[0]))
+    expected = np.convolve(padded, taps, "valid")[decimator.delay::4]
+    np.testing.assert_allclose(out, expected[: len(out)], atol=1e-12)
+    assert len(out) == (2000 - decimator.delay + 3) // 4
+
+
+def test_decimator_chunks_do_not_matter(stream):
+    whole = _decimate(StreamingDecimator(3), stream, [2000])
+    chunked = _decimate(StreamingDecimator(3), stream, [1, 2, 130, 7, 860, 1000])
+    for row, expected in zip(chunked, whole):
+        np.testing.assert_allclose(row, expected, atol=1e-12)
+
+
+def test_decimator_keeps_integer_rows_aligned():
+    decimator = StreamingDecimator(5)
+    samples = np.arange(1000, dtype=np.uint64)
+    out = []
+    for start in range(0, 1000, 130):
+        out.append(decimator.process([samples[start:start + 130]])[0])
+    out = np.concatenate(out)
+    assert out.dtype == np.uint64
+    # outputs are centered on the input samples 0, 5, 10, ...
+    np.testing.assert_array_equal(out, np.arange(0, 5 * len(out), 5))
+
+
+def test_decimator_reset(stream):
+    decimator = StreamingDecimator(2)
+    decimator.process(stream[:, :300])
+    decimator.reset()
+    restarted = _decimate(decimator, stream[:, 300:], [1700])
+    fresh = _decimate(StreamingDecimator(2), stream[:, 300:], [1700])
+    np.testing.assert_array_equal(restarted[0], fresh[0])
+
+
+@pytest.mark.parametrize("factor, numtaps", [(0, None), (2, 40)])
+def test_decimator_invalid(factor, numtaps):
+    with pytest.raises(BrainAccessException):
+        StreamingDecimator(factor, numtaps)
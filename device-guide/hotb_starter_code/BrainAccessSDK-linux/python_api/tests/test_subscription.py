@@ -0,0 +1,82 @@
+"""Tests of the subscription hop and window bookkeeping."""
+
+import numpy as np
+import pytest
+
+from brainaccess.utils.exceptions import BrainAccessException
+from brainaccess.utils.subscription import Subscription
+
+
+class _Stream:
+    """Stored samples and the reader passed to listeners."""
+
+    def __init__(self):
+        self.data = np.zeros((1, 0))
+
+    def store(self, subscription, size):
+        start = self.data.shape[1]
+        new = np.arange(start, start + size, dtype=np.float64)[None]
+        self.data = np.concatenate((self.data, new), axis=1)
+        subscription(size, self.read)
+
+    def read(self, samples, rows):
+        return self.data[rows, -samples:]
+
+
+def _calls(hop=None, window=None, chunks=(130,) * 20):
+    calls = []
+    subscription = Subscription(
+        lambda data, new: calls.append((data, new)), [0], hop=hop, window=window
+    )
+    stream = _Stream()
+    for size in chunks:
+        stream.store(subscription, size)
+    return calls, stream
+
+
+def test_every_chunk_without_hop():
+    calls, stream = _calls(chunks=(3, 5, 2))
+    assert [new for _, new in calls] == [3, 5, 2]
+    np.testing.assert_array_equal(calls[1][0], [[3, 4, 5, 6, 7]])
+
+
+def test_new_samples_are_counted_once():
+    calls, stream = _calls(hop=125)
+    assert sum(new for _, new in calls) == stream.data.shape[1]
+
+
+def test_default_window_holds_the_new_samples():
+    calls, stream = _calls(hop=125, chunks=(100,) * 10)
+    # one call per hop boundary, 1000 samples cross 8 of them
+    assert [new for _, new in calls] == [200, 100, 100, 100, 200, 100, 100, 100]
+    data = np.concatenate([data for data, _ in calls], axis=1)
+    np.testing.assert_array_equal(data, stream.data)
+
+
+def test_hops_stay_on_the_grid():
+    # a chunk completing several hops triggers one call
+    calls, _ = _calls(hop=50, chunks=(20, 20, 130, 20, 20))
+    assert [new for _, new in calls] == [170, 40]
+
+
+def test_fixed_window():
+    calls, _ = _calls(hop=125, window=300)
+    sizes = [data.shape[1] for data, _ in calls]
+    assert sizes == [130, 260] + [300] * (len(calls) - 2)
+
+
+def test_cancel():
+    cancelled = []
+    subscription = Subscription(
+        lambda data, new: None, [0], on_cancel=cancelled.append
+    )
+    subscription.cancel()
+    subscription.cancel()
+    assert cancelled == [subscription]
+    assert not subscription.active
+
+
+@pytest.mark.parametrize("hop, window", [(0, None), (None, -1)])
+def test_invalid(hop, window):
+    with pytest.raises(BrainAccessException):
+        Subscription(lambda data, new: None, [0], hop=hop, window=window)
@@ -1,7 +1,9 @@
 import ctypes
+import functools
+import warnings
 import numpy as np
 
-from typing import Optional
+from typing import Iterator, Optional
 
 from brainaccess.utils.exceptions import BrainAccessException
 from brainaccess.connect import _dll
@@ -151,7 +153,118 @@ _dll.ba_bci_connect_minmax.argtypes = [
 _dll.ba_bci_connect_minmax.restype = None
 
 
-def get_signal_quality(x: np.ndarray) -> np.ndarray:
+_c_double_p = ctypes.POINTER(ctypes.c_double)
+
+
+def _as_input(x: np.ndarray) -> tuple:
+    """Prepares data for the native library without copying when possible.
+
+    Parameters
+    -----------
+    x: np.ndarray
+        data array, shape (..., time)
+
+    Returns
+    --------
+    tuple
+        C-contiguous float64 array (``x`` itself if it already is one), its
+        number of rows (all leading axes) and time points
+    """
+    _x = np.ascontiguousarray(x, dtype=np.float64)
+    if _x.ndim == 0:
+        raise BrainAccessException("data must have a time axis")
+    time_points = _x.shape[-1]
+    rows = _x.size // time_points if time_points else 0
+    return _x, rows, time_points
+
+
+def _output(out: Optional[np.ndarray], shape: tuple) -> np.ndarray:
+    """Returns the array native results are written to.
+
+    Parameters
+    -----------
+    out: np.ndarray, optional
+        preallocated output, must be a C-contiguous float64 array of `shape`
+    shape: tuple
+        shape of the result
+
+    Returns
+    --------
+    np.ndarray
+        `out`, or a new uninitialized array
+    """
+    if out is None:
+        return np.empty(shape, dtype=np.float64)
+    if (
+        out.shape != shape
+        or out.dtype != np.float64
+        or not out.flags.c_contiguous
+        or not out.flags.writeable
+    ):
+        raise BrainAccessException(
+            f"out must be a writeable C-contiguous float64 array of shape {shape}"
+        )
+    return out
+
+
+def _ptr(x: np.ndarray):
+    """Pointer to the data of a C-contiguous float64 array."""
+    return x.ctypes.data_as(_c_double_p)
+
+
+def _reduce(function, x: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """Calls a native function computing one value per channel."""
+    _x, rows, time_points = _as_input(x)
+    result = _output(out, _x.shape[:-1])
+    function(_ptr(_x), rows, time_points, _ptr(result))
+    return result
+
+
+def _transform(
+    function, x: np.ndarray, out: Optional[np.ndarray], *args
+) -> np.ndarray:
+    """Calls a native function writing a result of the shape of the data."""
+    _x, rows, time_points = _as_input(x)
+    result = _output(out, _x.shape)
+    if np.shares_memory(result, _x):
+        raise BrainAccessException("out must not overlap the data")
+    function(_ptr(_x), rows, time_points, *args, _ptr(result))
+    return result
+
+
+def _filter(
+    function, x: np.ndarray, out: Optional[np.ndarray], inplace: bool, *args
+) -> np.ndarray:
+    """Calls a native filter, which works in place on its buffer."""
+    if inplace:
+        if out is not None:
+            raise BrainAccessException("out cannot be used with inplace")
+        if (
+            x.dtype != np.float64
+            or not x.flags.c_contiguous
+            or not x.flags.writeable
+        ):
+            raise BrainAccessException(
+                "inplace needs a writeable C-contiguous float64 array"
+            )
+        result = x
+    else:
+        result = _output(out, np.shape(x))
+        result[...] = x
+    time_points = result.shape[-1] if result.ndim else 0
+    rows = result.size // time_points if time_points else 0
+    function(
+        _ptr(result),
+        ctypes.c_size_t(rows),
+        ctypes.c_size_t(time_points),
+        *[ctypes.c_double(arg) for arg in args],
+    )
+    return result
+
+
+def get_signal_quality(
+    x: np.ndarray, out: Optional[np.ndarray] = None
+) -> np.ndarray:
     """Calculate signal quality for each channel in the data
     This function estimates the EEG signal quality for each
     channel based on amplitude variation and 50/60Hz noise level.
@@ -166,6 +279,8 @@ def get_signal_quality(x: np.ndarray) -> np.ndarray:
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels,)
 
     Returns
     --------
@@ -175,58 +290,43 @@ def get_signal_quality(x: np.ndarray) -> np.ndarray:
         * 1 - signal passed amplitude related quality measures
         * 2 - signal also do not contain significant amounts of 50/60Hz noise
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_result = np.ctypeslib.as_ctypes(np.zeros(chans))
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_get_signal_quality(c_arr, chans, time_points, c_result)
-    return np.array(c_result[0:chans])
+    return _reduce(_dll.ba_bci_connect_get_signal_quality, x, out)
 
 
-def detrend(x: np.ndarray) -> np.ndarray:
+def detrend(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """Remove linear trend from each channel
 
     Parameters
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
 
     Returns
     -----------
     np.ndarray
         data array, shape (channels, time)
     """
-
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_result = np.ctypeslib.as_ctypes(np.zeros(chans * time_points))
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_detrend(c_arr, chans, time_points, c_result)
-    return np.array(c_result[: chans * time_points]).reshape((chans, time_points))
+    return _transform(_dll.ba_bci_connect_detrend, x, out)
 
 
-def mad(x: np.ndarray) -> np.ndarray:
+def mad(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """Calculate median absolute deviation for each channel in the data
 
     Parameters
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels,)
 
     Returns
     --------
     np.ndarray
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_result = np.ctypeslib.as_ctypes(np.zeros(chans))
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_mad(c_arr, chans, time_points, c_result)
-    return np.array(c_result)
+    return _reduce(_dll.ba_bci_connect_mad, x, out)
 
 
 def get_minmax(x: np.ndarray) -> dict[str, np.ndarray]:
@@ -242,119 +342,96 @@ def get_minmax(x: np.ndarray) -> dict[str, np.ndarray]:
     dict
         min and max for each channel in the same order as x
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    result = np.zeros(chans)
-    c_result_min = np.ctypeslib.as_ctypes(result.copy())
-    c_result_max = np.ctypeslib.as_ctypes(result.copy())
-    _dll.ba_bci_connect_minmax(c_arr, chans, time_points, c_result_min, c_result_max)
-    return {
-        "min": np.array(c_result_min[0:chans]),
-        "max": np.array(c_result_max[0:chans]),
-    }
+    _x, rows, time_points = _as_input(x)
+    result_min = np.empty(_x.shape[:-1])
+    result_max = np.empty(_x.shape[:-1])
+    _dll.ba_bci_connect_minmax(
+        _ptr(_x), rows, time_points, _ptr(result_min), _ptr(result_max)
+    )
+    return {"min": result_min, "max": result_max}
 
 
-def median(x: np.ndarray) -> np.ndarray:
+def median(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """Calculate median for each channel in the data
 
     Parameters
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels,)
 
     Returns
     --------
     np.ndarray
         medians for each channel in the same order as x
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    result = np.zeros(chans)
-    c_result = np.ctypeslib.as_ctypes(result)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_median(c_arr, chans, time_points, c_result)
-    return np.array(c_result[0:chans])
+    return _reduce(_dll.ba_bci_connect_median, x, out)
 
 
-def mean(x: np.ndarray) -> np.ndarray:
+def mean(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """Calculate mean for each channel in the data
 
     Parameters
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels,)
 
     Returns
     --------
     np.ndarray
         means for each channel in the same order as x
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    result = np.zeros(chans)
-    c_result = np.ctypeslib.as_ctypes(result)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_mean(c_arr, chans, time_points, c_result)
-    return np.array(c_result[0:chans])
+    return _reduce(_dll.ba_bci_connect_mean, x, out)
 
 
-def std(x: np.ndarray) -> np.ndarray:
+def std(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """Calculate standard deviation for each channel in the data
 
     Parameters
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels,)
 
     Returns
     --------
     np.ndarray
         standard deviation for each channel in the same order as x
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    result = np.zeros(chans)
-    c_result = np.ctypeslib.as_ctypes(result)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_std(c_arr, chans, time_points, c_result)
-    return np.array(c_result[0:chans])
+    return _reduce(_dll.ba_bci_connect_std, x, out)
 
 
-def demean(x: np.ndarray) -> np.ndarray:
+def demean(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """Subtract mean from each channel
 
     Parameters
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
 
     Returns
     -----------
     np.ndarray
         data array, shape (channels, time)
     """
+    return _transform(_dll.ba_bci_connect_demean, x, out)
 
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_result = np.ctypeslib.as_ctypes(np.zeros(chans * time_points))
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_demean(c_arr, chans, time_points, c_result)
-    return np.array(c_result[: chans * time_points]).reshape((chans, time_points))
 
-
-def standardize(x: np.ndarray) -> np.ndarray:
+def standardize(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """Data standardization
 
     Parameters
     -----------
     x: np.ndarray
         data array, shape (channels, time)
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
 
     Returns
     -----------
@@ -362,17 +439,12 @@ def standardize(x: np.ndarray) -> np.ndarray:
         data array, shape (channels, time)
 
     """
-
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_result = np.ctypeslib.as_ctypes(np.zeros(chans * time_points))
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_standartize(c_arr, chans, time_points, c_result)
-    return np.array(c_result[: chans * time_points]).reshape((chans, time_points))
+    return _transform(_dll.ba_bci_connect_standartize, x, out)
 
 
-def ewma(x: np.ndarray, alpha: float = 0.001) -> np.ndarray:
+def ewma(
+    x: np.ndarray, alpha: float = 0.001, out: Optional[np.ndarray] = None
+) -> np.ndarray:
     """Exponential weighed moving average helper_function
 
     Parameters
@@ -381,6 +453,8 @@ def ewma(x: np.ndarray, alpha: float = 0.001) -> np.ndarray:
         data array, shape (channels, time)
     alpha: float
         new factor
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
 
     Returns
     -----------
@@ -388,17 +462,14 @@ def ewma(x: np.ndarray, alpha: float = 0.001) -> np.ndarray:
         data array, shape (channels, time)
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_result = np.ctypeslib.as_ctypes(np.zeros(chans * time_points))
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_ewma(c_arr, chans, time_points, np.float64(alpha), c_result)
-    return np.array(c_result[: chans * time_points]).reshape((chans, time_points))
+    return _transform(_dll.ba_bci_connect_ewma, x, out, ctypes.c_double(alpha))
 
 
 def ewma_standardize(
-    x: np.ndarray, alpha: float = 0.001, epsilon: float = 1e-4
+    x: np.ndarray,
+    alpha: float = 0.001,
+    epsilon: float = 1e-4,
+    out: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """Exponential weighed moving average standardization
 
@@ -412,6 +483,8 @@ def ewma_standardize(
         Represents the degree of weighting decrease, a constant smoothing factor between 0 and 1. A higher alpha discounts older observations faster.
     epsilon: float
         Stabilizer for division by zero variance
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
 
     Returns
     -----------
@@ -419,19 +492,22 @@ def ewma_standardize(
         data array, shape (channels, time)
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_result = np.ctypeslib.as_ctypes(np.zeros(chans * time_points))
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_ewma_standartize(
-        c_arr, chans, time_points, np.float64(alpha), np.float64(epsilon), c_result
+    return _transform(
+        _dll.ba_bci_connect_ewma_standartize,
+        x,
+        out,
+        ctypes.c_double(alpha),
+        ctypes.c_double(epsilon),
     )
-    return np.array(c_result[: chans * time_points]).reshape((chans, time_points))
 
 
 def filter_notch(
-    x: np.ndarray, sampling_freq: float, center_freq: float, width_freq: float
+    x: np.ndarray,
+    sampling_freq: float,
+    center_freq: float,
+    width_freq: float,
+    out: Optional[np.ndarray] = None,
+    inplace: bool = False,
 ) -> np.ndarray:
     """Notch filter at desired frequency
 
@@ -447,6 +523,10 @@ def filter_notch(
         notch filter center frequency
     width_freq: float
         notch filter width
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
+    inplace: bool
+        filter `x` itself, which must be a C-contiguous float64 array
 
 
     Returns
@@ -460,23 +540,24 @@ def filter_notch(
     before applying notch filter
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_filter_notch(
-        c_arr,
-        ctypes.c_size_t(chans),
-        ctypes.c_size_t(time_points),
-        ctypes.c_double(sampling_freq),
-        ctypes.c_double(center_freq),
-        ctypes.c_double(width_freq),
+    return _filter(
+        _dll.ba_bci_connect_filter_notch,
+        x,
+        out,
+        inplace,
+        sampling_freq,
+        center_freq,
+        width_freq,
     )
-    return np.array(c_arr[: chans * time_points]).reshape((chans, time_points))
 
 
 def filter_bandpass(
-    x: np.ndarray, sampling_freq: float, freq_low: float, freq_high: float
+    x: np.ndarray,
+    sampling_freq: float,
+    freq_low: float,
+    freq_high: float,
+    out: Optional[np.ndarray] = None,
+    inplace: bool = False,
 ) -> np.ndarray:
     """Bandpass filter
 
@@ -492,6 +573,10 @@ def filter_bandpass(
         frequency to filter from
     freq_high: float
         frequency to filter to
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
+    inplace: bool
+        filter `x` itself, which must be a C-contiguous float64 array
 
 
     Returns
@@ -505,22 +590,24 @@ def filter_bandpass(
     before applying notch filter
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_filter_bandpass(
-        c_arr,
-        ctypes.c_size_t(chans),
-        ctypes.c_size_t(time_points),
-        ctypes.c_double(sampling_freq),
-        ctypes.c_double(freq_low),
-        ctypes.c_double(freq_high),
+    return _filter(
+        _dll.ba_bci_connect_filter_bandpass,
+        x,
+        out,
+        inplace,
+        sampling_freq,
+        freq_low,
+        freq_high,
     )
-    return np.array(c_arr[: chans * time_points]).reshape((chans, time_points))
 
 
-def filter_highpass(x: np.ndarray, sampling_freq: float, freq: float) -> np.ndarray:
+def filter_highpass(
+    x: np.ndarray,
+    sampling_freq: float,
+    freq: float,
+    out: Optional[np.ndarray] = None,
+    inplace: bool = False,
+) -> np.ndarray:
     """High-pass filter
 
     Butterworth 5th order zero phase high-pass filter
@@ -533,6 +620,10 @@ def filter_highpass(x: np.ndarray, sampling_freq: float, freq: float) -> np.ndar
         data sampling rate
     freq: float
         edge frequency
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
+    inplace: bool
+        filter `x` itself, which must be a C-contiguous float64 array
 
     Returns
     -----------
@@ -545,21 +636,18 @@ def filter_highpass(x: np.ndarray, sampling_freq: float, freq: float) -> np.ndar
     before applying notch filter
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_filter_highpass(
-        c_arr,
-        ctypes.c_size_t(chans),
-        ctypes.c_size_t(time_points),
-        ctypes.c_double(sampling_freq),
-        ctypes.c_double(freq),
+    return _filter(
+        _dll.ba_bci_connect_filter_highpass, x, out, inplace, sampling_freq, freq
     )
-    return np.array(c_arr[: chans * time_points]).reshape((chans, time_points))
 
 
-def filter_lowpass(x: np.ndarray, sampling_freq: float, freq: float) -> np.ndarray:
+def filter_lowpass(
+    x: np.ndarray,
+    sampling_freq: float,
+    freq: float,
+    out: Optional[np.ndarray] = None,
+    inplace: bool = False,
+) -> np.ndarray:
     """Low-pass filter
 
     Butterworth 5th order zero phase low-pass filter
@@ -572,6 +660,10 @@ def filter_lowpass(x: np.ndarray, sampling_freq: float, freq: float) -> np.ndarr
         data sampling rate
     freq: float
         edge frequency
+    out: np.ndarray, optional
+        preallocated float64 output, shape (channels, time)
+    inplace: bool
+        filter `x` itself, which must be a C-contiguous float64 array
 
     Returns
     -----------
@@ -584,18 +676,9 @@ def filter_lowpass(x: np.ndarray, sampling_freq: float, freq: float) -> np.ndarr
     before applying notch filter
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_arr = np.ctypeslib.as_ctypes(_x)
-    _dll.ba_bci_connect_filter_lowpass(
-        c_arr,
-        ctypes.c_size_t(chans),
-        ctypes.c_size_t(time_points),
-        ctypes.c_double(sampling_freq),
-        ctypes.c_double(freq),
+    return _filter(
+        _dll.ba_bci_connect_filter_lowpass, x, out, inplace, sampling_freq, freq
     )
-    return np.array(c_arr[: chans * time_points]).reshape((chans, time_points))
 
 
 def fft(x: np.ndarray, sampling_freq: float) -> dict:
@@ -617,50 +700,35 @@ def fft(x: np.ndarray, sampling_freq: float) -> dict:
         - phase: phases
 
     """
-    chans = x.shape[0]
-    time_points = x.shape[1]
-    _x = x.copy().ravel(order="C").astype(np.float64)
-    c_arr = np.ctypeslib.as_ctypes(_x)
+    _x, rows, time_points = _as_input(x)
     n_time_steps = (time_points - (time_points % 2)) // 2 + 1
-    c_result_mag = np.ctypeslib.as_ctypes(np.zeros(chans * n_time_steps))
-    c_result_phase = np.ctypeslib.as_ctypes(np.zeros(chans * n_time_steps))
+    mags = np.empty(_x.shape[:-1] + (n_time_steps,))
+    phases = np.empty(_x.shape[:-1] + (n_time_steps,))
     _dll.ba_bci_connect_fft(
-        c_arr, chans, time_points, sampling_freq, c_result_mag, c_result_phase
+        _ptr(_x), rows, time_points, sampling_freq, _ptr(mags), _ptr(phases)
     )
     freqs = np.linspace(0, sampling_freq / 2, n_time_steps)
-    mags = np.array(c_result_mag[: chans * n_time_steps]).reshape((chans, n_time_steps))
-    phases = np.array(c_result_phase[: chans * n_time_steps]).reshape(
-        (chans, n_time_steps)
-    )
-    return {"freq": freqs, "mag": mags * 2, "phase": phases}
+    mags *= 2
+    return {"freq": freqs, "mag": mags, "phase": phases}
 
 
-def cut_into_epochs(
+def _epoch_layout(
     data: np.ndarray,
     sfreq: float,
-    epoch_length: Optional[float] = None,
-    overlap: float = 0.5,
-) -> np.ndarray:
-    """Cut data into epochs
-
-    Args:
-      data: np.ndarray: (n_channels, n_times)
-      sfreq: float:
-        sampling frequency
-      epoch_len: float:  (Default value = 1.0)
-        length of epoch in seconds
-      overlap: float:  (Default value = 0.0)
-        ratio of overlap between epochs
+    epoch_length: Optional[float],
+    overlap: float,
+) -> tuple:
+    """Epoch length and start samples used by `cut_into_epochs`
 
     Returns:
-      output: np.ndarray: (n_epochs, n_channels, n_times)
+      output: tuple: 2D data, epoch length in samples, epoch starts and the
+        step between them in (possibly fractional) samples
 
     """
     if data.ndim == 1:
         data = data.reshape((1, -1))
     if data.ndim > 2:
         raise BrainAccessException("data must be 1D or 2D")
-    n_channels = data.shape[0]
     n_times = data.shape[1]
     if epoch_length is None:
         _epoch_length = n_times / sfreq
@@ -674,18 +742,111 @@ def cut_into_epochs(
     else:
         overlap = 1
     n_epochs = int(np.floor(n_times / _epoch_length / overlap))
-    epochs = np.zeros((n_epochs, n_channels, _epoch_length))
-    for idx, _ in enumerate(epochs):
-        dat = data[
-            :,
-            int(idx * _epoch_length * overlap) : int(idx * _epoch_length * overlap)
-            + _epoch_length,
-        ]
+    starts = [int(idx * _epoch_length * overlap) for idx in range(n_epochs)]
+    return data, _epoch_length, starts, _epoch_length * overlap
+
+
+def cut_into_epochs(
+    data: np.ndarray,
+    sfreq: float,
+    epoch_length: Optional[float] = None,
+    overlap: float = 0.5,
+    view: bool = False,
+) -> np.ndarray:
+    """Cut data into epochs
+
+    Args:
+      data: np.ndarray: (n_channels, n_times)
+      sfreq: float:
+        sampling frequency
+      epoch_len: float:  (Default value = 1.0)
+        length of epoch in seconds
+      overlap: float:  (Default value = 0.0)
+        ratio of overlap between epochs
+      view: bool:  (Default value = False)
+        return a read-only strided view into `data` instead of a copy, so
+        overlapping epochs share memory. Trailing epochs running past the
+        end of the data, which are zero-filled in a copy, are left out.
+        The view uses the step rounded to whole samples, so an epoch may
+        start one sample later than in a copy, where the step is truncated
+        (e.g. 0.9 overlap gives a step of 24.999... samples). If the step
+        is not a whole number of samples, e.g. 5 s epochs with 0.75
+        overlap at 250 Hz, no strided view exists and the epochs are
+        gathered into a read-only copy with a warning.
+
+    Returns:
+      output: np.ndarray: (n_epochs, n_channels, n_times)
+
+    """
+    data, _epoch_length, starts, step = _epoch_layout(
+        data, sfreq, epoch_length, overlap
+    )
+    n_channels = data.shape[0]
+    n_times = data.shape[1]
+    if view:
+        n_epochs = len([s for s in starts if s + _epoch_length <= n_times])
+        if n_epochs == 0:
+            return np.empty((0, n_channels, _epoch_length), dtype=data.dtype)
+        windows = np.lib.stride_tricks.sliding_window_view(
+            data, _epoch_length, axis=1
+        )
+        _step = max(int(round(step)), 1)
+        if n_epochs == 1 or abs(step - _step) < 1e-6:
+            # rounding keeps the last epoch inside the data
+            n_epochs = min(n_epochs, (n_times - _epoch_length) // _step + 1)
+            # (n_channels, n_epochs, n_times) -> (n_epochs, n_channels, n_times)
+            return windows[:, :n_epochs * _step:_step].transpose(1, 0, 2)
+        warnings.warn(
+            f"epoch step of {step} samples is not a whole number of samples,"
+            " returning a copy instead of a view"
+        )
+        epochs = windows[:, starts[:n_epochs]].transpose(1, 0, 2)
+        epochs.flags.writeable = False
+        return epochs
+    epochs = np.zeros((len(starts), n_channels, _epoch_length))
+    for idx, start in enumerate(starts):
+        dat = data[:, start:start + _epoch_length]
         if dat.shape[1] == _epoch_length:
             epochs[idx] = dat
     return epochs
 
 
+def iter_epochs(
+    data: np.ndarray,
+    sfreq: float,
+    epoch_length: Optional[float] = None,
+    overlap: float = 0.5,
+) -> Iterator[np.ndarray]:
+    """Lazily cut data into epochs
+
+    Yields the epochs of `cut_into_epochs` one at a time as read-only views
+    into `data`, without allocating the whole epoch array. Trailing epochs
+    running past the end of the data are not yielded.
+
+    Args:
+      data: np.ndarray: (n_channels, n_times)
+      sfreq: float:
+        sampling frequency
+      epoch_len: float:  (Default value = 1.0)
+        length of epoch in seconds
+      overlap: float:  (Default value = 0.0)
+        ratio of overlap between epochs
+
+    Yields:
+      output: np.ndarray: (n_channels, n_times)
+
+    """
+    data, _epoch_length, starts, _ = _epoch_layout(
+        data, sfreq, epoch_length, overlap
+    )
+    for start in starts:
+        if start + _epoch_length > data.shape[1]:
+            break
+        epoch = data[:, start:start + _epoch_length]
+        epoch.flags.writeable = False
+        yield epoch
+
+
 def get_bands(
     data: np.ndarray,
     sfreq: float,
@@ -719,20 +880,14 @@ def get_bands(
     """
     # cut into epochs to average out noise
     data = cut_into_epochs(data, sfreq, epoch_length=epoch_length, overlap=overlap)
-    # calculate power in each frequency band
-    _bands = []
-    for epoch in data:
-        epoch = demean(epoch)
-        _bands.append(
-            get_pow_freq_bands(
-                epoch,
-                sfreq,
-                freq_bands=np.array([0.5, 4.0, 8.0, 13.0, 30.0, 100.0]),
-                normalize=normalize,
-            )
-        )
+    # calculate power in each frequency band of all epochs at once
+    bands = get_epoch_bands(
+        data,
+        sfreq,
+        freq_bands=np.array([0.5, 4.0, 8.0, 13.0, 30.0, 100.0]),
+        normalize=normalize,
+    )
     # average over epochs
-    bands = np.array(_bands)
     bands = np.mean(bands, axis=0)
     return {
         "delta": list(bands[:, 0]),
@@ -743,6 +898,110 @@ def get_bands(
     }
 
 
+def get_epoch_bands(
+    epochs: np.ndarray,
+    sfreq: float,
+    freq_bands: np.ndarray = np.array([0.5, 4.0, 8.0, 13.0, 30.0, 100.0]),
+    normalize: bool = False,
+) -> np.ndarray:
+    """Power in frequency bands of every epoch, computed in one batch
+
+    All epochs are demeaned and transformed with single native calls, so the
+    cost does not depend on the number of epochs.
+
+    Args:
+      epochs: np.ndarray: (n_epochs, n_channels, n_times)
+      sfreq: float:
+        sampling frequency
+      freq_bands: np.ndarray:  (Default value = np.array([0.5, 4.0, 8.0, 13.0, 30.0,
+      100.0])):
+        frequency intervals defining bands: delta, theta, alpha, beta, gamma (default)
+      normalize: bool:  (Default value = False)
+        normalize power in each frequency band by total power
+
+    Returns:
+      output: ndarray, shape (n_epochs, n_channels, (len(freq_bands)- 1),)
+
+    """
+    return get_pow_freq_bands(
+        demean(epochs), sfreq, freq_bands=freq_bands, normalize=normalize
+    )
+
+
+class BandPlan:
+    """Precomputed integration of a spectrum over frequency bands
+
+    Holds, for one FFT length and sampling rate, the frequency bins of every
+    band (edges included, so adjacent bands share their edge bin) as slice
+    bounds and as a weight matrix, so band powers of any number of channels
+    and epochs are one matrix multiplication.
+    """
+
+    def __init__(self, n_times: int, sfreq: float, freq_bands: tuple) -> None:
+        """Builds the plan
+
+        Args:
+          n_times: int:
+            number of samples of the transformed data
+          sfreq: float:
+            sampling frequency
+          freq_bands: tuple:
+            frequency intervals defining the bands
+        """
+        n_freqs = (n_times - (n_times % 2)) // 2 + 1
+        self.freqs = np.linspace(0, sfreq / 2, n_freqs)
+        # first and after-last bin of every band
+        self.bounds = np.stack(
+            (
+                np.searchsorted(self.freqs, freq_bands[:-1], side="left"),
+                np.searchsorted(self.freqs, freq_bands[1:], side="right"),
+            ),
+            axis=1,
+        )
+        self.weights = np.zeros((n_freqs, len(freq_bands) - 1))
+        for band, (start, stop) in enumerate(self.bounds):
+            self.weights[start:stop, band] = 1.0
+
+    def integrate(self, psd: np.ndarray) -> np.ndarray:
+        """Sums a spectrum over the bands
+
+        Args:
+          psd: np.ndarray: (..., n_freqs)
+
+        Returns:
+          output: np.ndarray: (..., n_bands)
+
+        """
+        return psd @ self.weights
+
+
+@functools.lru_cache(maxsize=16)
+def _band_plan(n_times: int, sfreq: float, freq_bands: tuple) -> BandPlan:
+    return BandPlan(n_times, sfreq, freq_bands)
+
+
+def band_plan(n_times: int, sfreq: float, freq_bands: np.ndarray) -> BandPlan:
+    """Band plan for the given data length, sampling rate and band edges
+
+    Plans are kept in a small LRU cache, so repeated calls with the same
+    window only cost a lookup.
+
+    Args:
+      n_times: int:
+        number of samples of the transformed data
+      sfreq: float:
+        sampling frequency
+      freq_bands: np.ndarray:
+        frequency intervals defining the bands
+
+    Returns:
+      output: BandPlan
+
+    """
+    edges = tuple(float(edge) for edge in freq_bands)
+    return _band_plan(int(n_times), float(sfreq), edges)
+
+
 def get_pow_freq_bands(
     data: np.ndarray,
     sfreq: float,
@@ -752,7 +1011,7 @@ def get_pow_freq_bands(
     """Power Spectrum (computed by frequency bands).
 
     Args:
-      data: np.ndarray: (n_channels, n_times)
+      data: np.ndarray: (n_channels, n_times) or (n_epochs, n_channels, n_times)
       sfreq: float:
         sampling frequency
       freq_bands: np.ndarray:  (Default value = np.array([0.5, 4.0, 8.0, 13.0, 30.0,
@@ -762,25 +1021,16 @@ def get_pow_freq_bands(
         normalize power in each frequency band by total power
 
     Returns:
-      output: ndarray, shape (n_channels, (len(freq_bands)- 1),)
+      output: ndarray, shape (n_channels, (len(freq_bands)- 1),), with the
+      leading n_epochs axis for 3D data
 
     """
-    n_channels = data.shape[0]
-    fb = np.zeros((len(freq_bands) - 1, 2))
-    for idx, x in enumerate(freq_bands[:-1]):
-        fb[idx, 0] = x
-        fb[idx, 1] = freq_bands[idx + 1]
-    n_freq_bands = fb.shape[0]
+    plan = band_plan(np.shape(data)[-1], sfreq, freq_bands)
     # fft
     fft_data = fft(data, sfreq)
-    freqs = fft_data["freq"]
     psd = fft_data["mag"] ** 2
     # power in each frequency band
-    pow_freq_bands = np.empty((n_channels, n_freq_bands))
-    for j in range(n_freq_bands):
-        mask = np.logical_and(freqs >= fb[j, 0], freqs <= fb[j, 1])
-        psd_band = psd[:, mask]
-        pow_freq_bands[:, j] = np.sum(psd_band, axis=-1)
+    pow_freq_bands = plan.integrate(psd)
     if normalize:
-        pow_freq_bands = np.divide(pow_freq_bands, np.sum(psd, axis=-1)[:, None])
+        pow_freq_bands = np.divide(pow_freq_bands, np.sum(psd, axis=-1)[..., None])
     return pow_freq_bands
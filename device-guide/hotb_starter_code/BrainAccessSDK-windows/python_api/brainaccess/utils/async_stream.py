@@ -0,0 +1,125 @@
+"""Asyncio iterator over acquired data, fed from the acquisition thread."""
+
+import asyncio
+import collections
+import typing
+
+from brainaccess.utils.exceptions import BrainAccessException
+
+
+class AsyncChunkStream:
+    """Async iterator yielding acquired data as it arrives.
+
+    Items are put by the acquisition thread, usually through a
+    `Subscription`, and handed to the event loop with
+    `loop.call_soon_threadsafe`, so consumers wake up on data arrival
+    instead of polling.
+
+    At most `max_pending` items wait for the consumer. When the consumer
+    falls behind, either the oldest waiting item or the new item is dropped
+    and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        max_pending: int = 16,
+        drop: str = "oldest",
+        on_close: typing.Optional[typing.Callable[[], None]] = None,
+    ) -> None:
+        """Initializes the stream.
+
+        Parameters
+        ----------
+        loop : asyncio.AbstractEventLoop
+            Event loop the consumer runs in.
+        max_pending : int, optional
+            Maximum number of items waiting for the consumer, by default 16.
+        drop : str, optional
+            Item dropped when `max_pending` is reached, "oldest" (default)
+            or "newest".
+        on_close : callable, optional
+            Called when the stream is closed, e.g. to cancel its
+            subscription.
+
+        Raises
+        ------
+        BrainAccessException
+            If the parameters are invalid.
+        """
+        if drop not in ("oldest", "newest"):
+            raise BrainAccessException("Drop policy must be 'oldest' or 'newest'")
+        if max_pending <= 0:
+            raise BrainAccessException("max_pending must be positive")
+        self.loop = loop
+        self.max_pending = max_pending
+        self.drop = drop
+        self.dropped = 0
+        self.on_close = on_close
+        self._queue: collections.deque = collections.deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        # set in the event loop after the items put before `close`
+        self._done = False
+
+    def put(self, item: typing.Any) -> None:
+        """Queues an item, safe to call from any thread.
+
+        Parameters
+        ----------
+        item
+            Data to yield, e.g. an array or a ``(data, new_samples)``
+            tuple.
+        """
+        if self._closed:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._push, item)
+        except RuntimeError:
+            # the event loop is closed
+            self.close()
+
+    def _push(self, item: typing.Any) -> None:
+        """Queues an item, runs in the event loop."""
+        if len(self._queue) >= self.max_pending:
+            self.dropped += 1
+            if self.drop == "newest":
+                return
+            self._queue.popleft()
+        self._queue.append(item)
+        self._ready.set()
+
+    def __aiter__(self) -> "AsyncChunkStream":
+        return self
+
+    async def __anext__(self) -> typing.Any:
+        while not self._queue:
+            if self._done:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+
+    async def __aenter__(self) -> "AsyncChunkStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the stream. Items already put are still yielded."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.on_close is not None:
+            self.on_close()
+        try:
+            # runs after the pushes of the items put before
+            self.loop.call_soon_threadsafe(self._finish)
+        except RuntimeError:
+            self._done = True
+
+    def _finish(self) -> None:
+        """Ends the iteration once the queue is empty, runs in the event loop."""
+        self._done = True
+        self._ready.set()
@@ -0,0 +1,647 @@
+"""Sample buffers used by the acquisition utilities.
+
+The buffers store multichannel data with shape (channels, samples) and are
+written from the device callback thread, so writes cost O(chunk) and never
+reallocate or shift the data that is already stored.
+"""
+
+import pathlib
+import typing
+
+import numpy as np
+
+from brainaccess.utils.exceptions import BrainAccessException
+
+
+class RingBuffer:
+    """Fixed size circular buffer of multichannel samples.
+
+    The buffer is preallocated once. Writes copy the new samples at the write
+    index and wrap around at the end of the array, so the cost of a write only
+    depends on the chunk size and not on the buffer length.
+    """
+
+    def __init__(
+        self,
+        n_channels: int,
+        capacity: int,
+        dtype: typing.Any = np.float64,
+        filled: bool = False,
+    ) -> None:
+        """Initializes the ring buffer.
+
+        Parameters
+        ----------
+        n_channels : int
+            Number of channels (rows).
+        capacity : int
+            Number of samples the buffer can hold.
+        dtype : numpy dtype, optional
+            Data type of the stored samples, by default float64.
+        filled : bool, optional
+            If True, the buffer starts full of zeros, by default False.
+
+        Raises
+        ------
+        BrainAccessException
+            If the capacity is not positive.
+        """
+        if capacity <= 0:
+            raise BrainAccessException("Buffer capacity must be positive")
+        self.n_channels = n_channels
+        self.capacity = capacity
+        self._data = np.zeros((n_channels, capacity), dtype=dtype)
+        self._index = 0
+        self._length = capacity if filled else 0
+        self.total = self._length
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the stored samples."""
+        return self._data.dtype
+
+    def __len__(self) -> int:
+        return self._length
+
+    def write(self, chunk: typing.Any) -> None:
+        """Writes a chunk of samples at the end of the buffer.
+
+        Parameters
+        ----------
+        chunk : array_like
+            Samples with shape (channels, samples). If the chunk is longer
+            than the buffer only its last `capacity` samples are kept.
+        """
+        chunk = np.asarray(chunk)
+        size = chunk.shape[1]
+        if size == 0:
+            return
+        self.total += size
+        if size >= self.capacity:
+            self._data[:] = chunk[:, -self.capacity:]
+            self._index = 0
+            self._length = self.capacity
+            return
+        first = min(size, self.capacity - self._index)
+        self._data[:, self._index:self._index + first] = chunk[:, :first]
+        if first < size:
+            self._data[:, : size - first] = chunk[:, first:]
+        self._index = (self._index + size) % self.capacity
+        self._length = min(self._length + size, self.capacity)
+
+    def latest(
+        self, samples: typing.Optional[int] = None, copy: bool = False
+    ) -> np.ndarray:
+        """Returns the most recent samples in chronological order.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples to return. All stored samples if None.
+        copy : bool, optional
+            Always return a copy. By default a view into the buffer is
+            returned when the requested samples do not wrap around, which
+            is only valid until the next write.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        if samples is None or samples > self._length:
+            samples = self._length
+        return self.range(self.total - samples, self.total, copy=copy)
+
+    def range(self, start: int, stop: int, copy: bool = False) -> np.ndarray:
+        """Returns the samples between two positions.
+
+        Positions count all samples written since creation. Samples that
+        were overwritten or not written yet are left out.
+
+        Parameters
+        ----------
+        start : int
+            Position of the first sample.
+        stop : int
+            Position after the last sample.
+        copy : bool, optional
+            Always return a copy, see `latest`.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        stop = min(stop, self.total)
+        start = min(max(start, self.total - self._length), stop)
+        samples = stop - start
+        first = (self._index - (self.total - start)) % self.capacity
+        if samples == 0:
+            out = self._data[:, :0]
+        elif first + samples <= self.capacity:
+            out = self._data[:, first:first + samples]
+        else:
+            end = first + samples - self.capacity
+            return np.concatenate(
+                (self._data[:, first:], self._data[:, :end]), axis=1
+            )
+        return out.copy() if copy else out
+
+
+class GrowableBuffer:
+    """Contiguous multichannel buffer that grows by doubling its capacity.
+
+    Samples are stored in one (channels, capacity) array. When the array is
+    full it is reallocated with twice the capacity, so appends cost amortized
+    O(chunk). Already stored samples are never modified, which makes the
+    views returned by `latest` stay valid after later appends.
+    """
+
+    def __init__(
+        self,
+        n_channels: int,
+        capacity: int = 1024,
+        dtype: typing.Any = np.float64,
+    ) -> None:
+        """Initializes the growable buffer.
+
+        Parameters
+        ----------
+        n_channels : int
+            Number of channels (rows).
+        capacity : int, optional
+            Initial number of samples to preallocate, by default 1024.
+        dtype : numpy dtype, optional
+            Data type of the stored samples, by default float64.
+        """
+        self.n_channels = n_channels
+        self._data = np.zeros((n_channels, max(capacity, 1)), dtype=dtype)
+        self._length = 0
+
+    @property
+    def capacity(self) -> int:
+        """Number of samples that fit before the next reallocation."""
+        return self._data.shape[1]
+
+    @property
+    def total(self) -> int:
+        """Number of samples written since creation."""
+        return self._length
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the stored samples."""
+        return self._data.dtype
+
+    def __len__(self) -> int:
+        return self._length
+
+    def reserve(self, capacity: int) -> None:
+        """Makes sure at least `capacity` samples fit without reallocation.
+
+        Parameters
+        ----------
+        capacity : int
+            Required capacity in samples.
+        """
+        if capacity <= self.capacity:
+            return
+        new_capacity = self.capacity
+        while new_capacity < capacity:
+            new_capacity *= 2
+        data = np.zeros((self.n_channels, new_capacity), dtype=self._data.dtype)
+        data[:, : self._length] = self._data[:, : self._length]
+        self._data = data
+
+    def write(self, chunk: typing.Any) -> None:
+        """Appends a chunk of samples.
+
+        Parameters
+        ----------
+        chunk : array_like
+            Samples with shape (channels, samples).
+        """
+        chunk = np.asarray(chunk)
+        size = chunk.shape[1]
+        self.reserve(self._length + size)
+        self._data[:, self._length:self._length + size] = chunk
+        self._length += size
+
+    def latest(
+        self, samples: typing.Optional[int] = None, copy: bool = False
+    ) -> np.ndarray:
+        """Returns the most recent samples in chronological order.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples to return. Whole history if None.
+        copy : bool, optional
+            Return a copy instead of a view, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        if samples is None or samples > self._length:
+            samples = self._length
+        return self.range(self._length - samples, self._length, copy=copy)
+
+    def range(self, start: int, stop: int, copy: bool = False) -> np.ndarray:
+        """Returns the samples between two positions.
+
+        Parameters
+        ----------
+        start : int
+            Position of the first sample.
+        stop : int
+            Position after the last sample.
+        copy : bool, optional
+            Return a copy instead of a view, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        stop = min(stop, self._length)
+        start = min(max(start, 0), stop)
+        out = self._data[:, start:stop]
+        return out.copy() if copy else out
+
+
+class SpillBuffer:
+    """Multichannel history spilled to a memory-mapped file.
+
+    New samples are collected in a bounded in-memory hot tail. When the tail
+    is full it is appended to a file, and older samples are read back through
+    `np.memmap`, so memory use stays bounded however long the recording runs.
+    The file stores raw samples time-major, with shape (samples, channels).
+    """
+
+    def __init__(
+        self,
+        n_channels: int,
+        path: typing.Union[str, pathlib.Path],
+        hot_capacity: int = 4096,
+        dtype: typing.Any = np.float64,
+    ) -> None:
+        """Initializes the spill buffer, truncating the file if it exists.
+
+        Parameters
+        ----------
+        n_channels : int
+            Number of channels (rows).
+        path : str or pathlib.Path
+            File the samples are spilled to.
+        hot_capacity : int, optional
+            Number of samples kept in memory before spilling, by default 4096.
+        dtype : numpy dtype, optional
+            Data type of the stored samples, by default float64.
+        """
+        self.n_channels = n_channels
+        self.path = pathlib.Path(path)
+        self._file = open(self.path, "wb+")
+        self._hot = np.zeros((max(hot_capacity, 1), n_channels), dtype=dtype)
+        self._hot_length = 0
+        self._spilled = 0
+        self._map: typing.Optional[np.memmap] = None
+
+    @property
+    def total(self) -> int:
+        """Number of samples written since creation."""
+        return self._spilled + self._hot_length
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the stored samples."""
+        return self._hot.dtype
+
+    def __len__(self) -> int:
+        return self.total
+
+    def write(self, chunk: typing.Any) -> None:
+        """Appends a chunk of samples, spilling the hot tail when it is full.
+
+        Parameters
+        ----------
+        chunk : array_like
+            Samples with shape (channels, samples).
+        """
+        chunk = np.asarray(chunk)
+        size = chunk.shape[1]
+        pos = 0
+        while pos < size:
+            count = min(size - pos, self._hot.shape[0] - self._hot_length)
+            self._hot[self._hot_length:self._hot_length + count] = chunk[
+                :, pos:pos + count
+            ].T
+            self._hot_length += count
+            pos += count
+            if self._hot_length == self._hot.shape[0]:
+                self.flush()
+
+    def flush(self) -> None:
+        """Appends the in-memory hot tail to the file."""
+        if self._hot_length == 0:
+            return
+        self._file.write(self._hot[: self._hot_length].tobytes())
+        self._file.flush()
+        self._spilled += self._hot_length
+        self._hot_length = 0
+
+    def close(self) -> None:
+        """Flushes the hot tail and closes the file. The file is kept."""
+        self.flush()
+        self._file.close()
+
+    def _mapped(self) -> np.memmap:
+        """Memory map covering all spilled samples, remapped only when the
+        file has grown."""
+        if self._map is None or self._map.shape[0] != self._spilled:
+            self._map = np.memmap(
+                self.path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(self._spilled, self.n_channels),
+            )
+        return self._map
+
+    def latest(
+        self, samples: typing.Optional[int] = None, copy: bool = False
+    ) -> np.ndarray:
+        """Returns the most recent samples in chronological order.
+
+        Samples still in the hot tail are copied out of it. Longer requests
+        read the older part through the memory map, without flushing the
+        tail, so reads do not force file writes on the acquisition thread.
+        If the tail is empty a view of the map is returned, which stays
+        valid after later writes; otherwise both parts are joined in a copy.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples to return. Whole history if None.
+        copy : bool, optional
+            Always return an in-memory copy, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        if samples is None or samples > self.total:
+            samples = self.total
+        return self.range(self.total - samples, self.total, copy=copy)
+
+    def range(self, start: int, stop: int, copy: bool = False) -> np.ndarray:
+        """Returns the samples between two positions, see `latest`.
+
+        Parameters
+        ----------
+        start : int
+            Position of the first sample.
+        stop : int
+            Position after the last sample.
+        copy : bool, optional
+            Always return an in-memory copy, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        stop = min(stop, self.total)
+        start = min(max(start, 0), stop)
+        spilled = self._spilled
+        if start >= spilled:
+            return self._hot[start - spilled:stop - spilled].T.copy()
+        mapped = self._mapped()[start:min(stop, spilled)].T
+        if stop <= spilled:
+            return np.array(mapped) if copy else mapped
+        return np.concatenate((mapped, self._hot[:stop - spilled].T), axis=1)
+
+
+def chunk_rows(chunk: typing.Any) -> list:
+    """Returns the per-channel rows of a data chunk without copying.
+
+    Parameters
+    ----------
+    chunk : list or np.ndarray
+        One array per channel, a 2D array with shape (channels, samples) or
+        a structured record with one field per channel, as passed by
+        `EEGManager.set_callback_chunk` in contiguous mode. A single
+        element of a structured array (`np.void`) is accepted as well.
+
+    Returns
+    -------
+    list
+        One 1D array per channel.
+    """
+    if isinstance(chunk, np.void):
+        return [chunk[name] for name in chunk.dtype.names]
+    if isinstance(chunk, np.ndarray):
+        if chunk.dtype.names is not None:
+            return [chunk[name] for name in chunk.dtype.names]
+        return list(chunk)
+    return chunk
+
+
+class TypedBuffer:
+    """Chunk rows stored in their native data types, sharing one time index.
+
+    The device delivers channels with different types (float samples, an
+    integer sample number, uint8 flags). Instead of upcasting every chunk to
+    one float64 array, rows are grouped by data type and every group is kept
+    in its own buffer. All groups receive the same number of samples, so a
+    sample index addresses the same moment in every group. Reads convert to a
+    common type only for the requested rows.
+
+    The row layout is taken from the data types of the first written chunk.
+    """
+
+    def __init__(
+        self,
+        n_channels: int,
+        make_buffer: typing.Callable[[int, np.dtype, int], typing.Any],
+    ) -> None:
+        """Initializes the typed buffer.
+
+        Parameters
+        ----------
+        n_channels : int
+            Expected number of channels (rows), updated by the first chunk.
+        make_buffer : callable
+            Factory called as ``make_buffer(n_rows, dtype, group)`` that
+            returns the storage (e.g. `GrowableBuffer` or `RingBuffer`) for
+            one data type group.
+        """
+        self.n_channels = n_channels
+        self._make_buffer = make_buffer
+        self._groups: list = []
+        self._dtypes: list = []
+        # chunk row -> (group, row within the group)
+        self._row_map: list = []
+        self._group_rows: list = []
+
+    @property
+    def groups(self) -> list:
+        """Storage buffers, one per data type."""
+        return self._groups
+
+    @property
+    def total(self) -> int:
+        """Number of samples written since creation."""
+        return self._groups[0].total if self._groups else 0
+
+    def __len__(self) -> int:
+        return len(self._groups[0]) if self._groups else 0
+
+    def close(self) -> None:
+        """Closes group buffers that hold files, such as `SpillBuffer`."""
+        for group in self._groups:
+            if hasattr(group, "close"):
+                group.close()
+
+    def row_dtype(self, row: int) -> np.dtype:
+        """Data type a chunk row is stored with."""
+        return self._dtypes[self._row_map[row][0]]
+
+    def _create_layout(self, rows: list) -> None:
+        """Groups chunk rows by data type and creates their buffers."""
+        self.n_channels = len(rows)
+        self._row_map = []
+        for row in rows:
+            dtype = np.asarray(row).dtype
+            if dtype not in self._dtypes:
+                self._dtypes.append(dtype)
+                self._group_rows.append([])
+            group = self._dtypes.index(dtype)
+            self._row_map.append((group, len(self._group_rows[group])))
+            self._group_rows[group].append(len(self._row_map) - 1)
+        self._groups = [
+            self._make_buffer(len(rows), dtype, group)
+            for group, (dtype, rows) in enumerate(zip(self._dtypes, self._group_rows))
+        ]
+
+    def write(self, chunk: typing.Any) -> None:
+        """Writes a chunk of samples.
+
+        Parameters
+        ----------
+        chunk : list or np.ndarray
+            One array per channel, a 2D array with shape (channels, samples)
+            or a structured record with one field per channel.
+        """
+        rows = chunk_rows(chunk)
+        if not self._groups:
+            self._create_layout(rows)
+        if len(self._groups) == 1:
+            self._groups[0].write(rows)
+            return
+        for group, group_rows in enumerate(self._group_rows):
+            block = np.empty(
+                (len(group_rows), len(rows[group_rows[0]])), dtype=self._dtypes[group]
+            )
+            for pos, row in enumerate(group_rows):
+                block[pos] = rows[row]
+            self._groups[group].write(block)
+
+    def latest(
+        self,
+        samples: typing.Optional[int] = None,
+        rows: typing.Optional[list] = None,
+        dtype: typing.Any = None,
+        copy: bool = False,
+    ) -> np.ndarray:
+        """Returns the most recent samples of the given rows.
+
+        When all requested rows share one data type and no conversion is
+        needed, the result comes straight from the group buffer (a view for
+        a contiguous range without row selection). Otherwise the rows are
+        gathered into one new array.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples to return. All stored samples if None.
+        rows : list, optional
+            Chunk rows to return, in the given order. All rows if None.
+        dtype : numpy dtype, optional
+            Type of the result. Defaults to the common type of the rows.
+        copy : bool, optional
+            Never return a view into the storage, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (rows, samples).
+        """
+        return self._gather(
+            lambda group, copy: group.latest(samples, copy=copy), rows, dtype, copy
+        )
+
+    def range(
+        self,
+        start: int,
+        stop: int,
+        rows: typing.Optional[list] = None,
+        dtype: typing.Any = None,
+        copy: bool = False,
+    ) -> np.ndarray:
+        """Returns the samples of the given rows between two positions.
+
+        Only the requested span is sliced out of every group buffer, so the
+        cost depends on the window and not on how much newer data follows.
+
+        Parameters
+        ----------
+        start : int
+            Position of the first sample, counting all samples written.
+        stop : int
+            Position after the last sample.
+        rows : list, optional
+            Chunk rows to return, in the given order. All rows if None.
+        dtype : numpy dtype, optional
+            Type of the result. Defaults to the common type of the rows.
+        copy : bool, optional
+            Never return a view into the storage, by default False.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (rows, samples).
+        """
+        return self._gather(
+            lambda group, copy: group.range(start, stop, copy=copy), rows, dtype, copy
+        )
+
+    def _gather(
+        self,
+        read: typing.Callable[[typing.Any, bool], np.ndarray],
+        rows: typing.Optional[list],
+        dtype: typing.Any,
+        copy: bool,
+    ) -> np.ndarray:
+        """Reads the same span from the group buffers and selects rows."""
+        if rows is None:
+            rows = list(range(self.n_channels))
+        if not self._groups:
+            return np.zeros((len(rows), 0), dtype=dtype or np.float64)
+        selected = [self._row_map[row] for row in rows]
+        used = sorted({group for group, _ in selected})
+        out_dtype = np.dtype(dtype) if dtype is not None else np.result_type(
+            *[self._dtypes[group] for group in used]
+        )
+        if len(used) == 1 and out_dtype == self._dtypes[used[0]]:
+            group = used[0]
+            positions = [pos for _, pos in selected]
+            if positions == list(range(len(self._group_rows[group]))):
+                return read(self._groups[group], copy)
+            return read(self._groups[group], False)[positions]
+        data = {group: read(self._groups[group], False) for group in used}
+        out = np.empty((len(rows), data[used[0]].shape[1]), dtype=out_dtype)
+        for idx, (group, pos) in enumerate(selected):
+            out[idx] = data[group][pos]
+        return out
@@ -0,0 +1,151 @@
+"""Index mapping device sample numbers and host times to stored positions."""
+
+import bisect
+import math
+import threading
+import time
+import typing
+
+
+class ChunkIndex:
+    """Keeps where every stored chunk starts.
+
+    For every chunk the index records its first stored position, its first
+    device sample number and the host time it was stored at. Positions
+    count stored samples, starting with any zeros stored before the stream,
+    like `GapIndex`. Mapping a sample number or a host time to a position is
+    a binary search over the chunks followed by an offset within the chunk.
+
+    With a `capacity`, e.g. in roll mode, chunks whose samples are all older
+    than the last `capacity` stored samples are dropped, so the index does
+    not grow with the stream. Dropped chunks are skipped with a start
+    offset into the lists, which are compacted once half of them is unused.
+    """
+
+    def __init__(
+        self,
+        sfreq: float,
+        offset: int = 0,
+        step: int = 1,
+        capacity: typing.Optional[int] = None,
+    ) -> None:
+        """Initializes an empty index.
+
+        Parameters
+        ----------
+        sfreq : float
+            Sampling frequency of the stored samples.
+        offset : int, optional
+            Number of samples stored before the stream, by default 0.
+        step : int, optional
+            Increment of the device sample number between stored samples,
+            e.g. the decimation factor, by default 1.
+        capacity : int, optional
+            Number of most recent stored samples to index, by default all.
+        """
+        self.sfreq = sfreq
+        self.step = step
+        self.offset = offset
+        self.capacity = capacity
+        self.total = offset
+        # index of the first retained chunk in the lists
+        self._first = 0
+        self._starts: list = []
+        self._samples: list = []
+        self._times: list = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._starts) - self._first
+
+    def add(
+        self, size: int, first_sample: int, host_time: typing.Optional[float] = None
+    ) -> None:
+        """Adds a stored chunk.
+
+        Parameters
+        ----------
+        size : int
+            Number of samples in the chunk.
+        first_sample : int
+            Device sample number of the first sample of the chunk.
+        host_time : float, optional
+            Host time (`time.time`) of the chunk, by default now, i.e. the
+            time the chunk is stored. With a dispatch queue this is after
+            the queue delay, not when the device delivered the chunk.
+        """
+        if size == 0:
+            return
+        if host_time is None:
+            host_time = time.time()
+        with self._lock:
+            self._starts.append(self.total)
+            self._samples.append(int(first_sample))
+            self._times.append(host_time)
+            self.total += size
+            if self.capacity is not None:
+                self._trim(self.total - self.capacity)
+
+    def _trim(self, oldest: int) -> None:
+        """Drops the chunks ending at or before position `oldest`."""
+        while self._first + 1 < len(self._starts):
+            if self._starts[self._first + 1] > oldest:
+                break
+            self._first += 1
+        if self._first > len(self._starts) // 2:
+            del self._starts[: self._first]
+            del self._samples[: self._first]
+            del self._times[: self._first]
+            self._first = 0
+
+    def _end(self, chunk: int) -> int:
+        """Position after the last sample of a chunk."""
+        if chunk + 1 < len(self._starts):
+            return self._starts[chunk + 1]
+        return self.total
+
+    def position_of_sample(self, sample: int) -> int:
+        """Returns the position of a device sample number.
+
+        Parameters
+        ----------
+        sample : int
+            Device sample number, e.g. an annotation timestamp.
+
+        Returns
+        -------
+        int
+            Position of the first stored sample at or after `sample`.
+        """
+        with self._lock:
+            first = self._first
+            chunk = bisect.bisect_right(self._samples, sample, lo=first) - 1
+            if chunk < first:
+                return self._starts[first] if self._starts else self.total
+            shift = math.ceil((sample - self._samples[chunk]) / self.step)
+            return min(self._starts[chunk] + shift, self._end(chunk))
+
+    def position_of_time(self, host_time: float) -> int:
+        """Returns the position of a host time.
+
+        A chunk is stored just after its last sample, so the sample is
+        located in the first chunk stored at or after `host_time` and
+        counted back from the chunk end at the sampling rate.
+
+        Parameters
+        ----------
+        host_time : float
+            Host time, as returned by `time.time`.
+
+        Returns
+        -------
+        int
+            Position of the sample acquired at `host_time`.
+        """
+        with self._lock:
+            chunk = bisect.bisect_left(self._times, host_time, lo=self._first)
+            if chunk == len(self._times):
+                return self.total
+            end = self._end(chunk)
+            back = round((self._times[chunk] - host_time) * self.sfreq)
+            return max(self._starts[chunk], end - back)
@@ -0,0 +1,258 @@
+"""Shared memory ring buffer for consumers running in other processes.
+
+The writer (usually `EEG.share`) keeps the latest samples in a
+`multiprocessing.shared_memory` block. Readers in other processes attach by
+name and copy windows straight out of shared memory, without pickling
+samples through pipes.
+
+Block layout::
+
+    header   8 x int64   sequence, total samples, channels, capacity,
+                         metadata length, reserved
+    metadata 4096 bytes  JSON with channel names, sampling rate and dtype
+    data                 samples with shape (channels, capacity)
+
+Reads are lock-free. The writer increments the sequence counter before and
+after every write, so it is odd while a write is in progress. A reader
+retries when the counter was odd or changed while it copied data that the
+writer may have overwritten.
+"""
+
+import json
+import sys
+import time
+import typing
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from brainaccess.utils.exceptions import BrainAccessException
+
+_HEADER_FIELDS = 8
+_HEADER_SIZE = _HEADER_FIELDS * 8
+_META_SIZE = 4096
+_SEQ, _TOTAL, _CHANNELS, _CAPACITY, _META_LEN = range(5)
+
+# blocks created by writers in this process
+_created: set = set()
+
+
+def _layout(
+    shm: shared_memory.SharedMemory, n_channels: int, capacity: int, dtype: np.dtype
+) -> tuple:
+    """Returns the header and data arrays of a shared memory block."""
+    header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+    data = np.ndarray(
+        (n_channels, capacity),
+        dtype=dtype,
+        buffer=shm.buf,
+        offset=_HEADER_SIZE + _META_SIZE,
+    )
+    return header, data
+
+
+class SharedRingWriter:
+    """Writes acquired samples into a named shared memory ring buffer."""
+
+    def __init__(
+        self,
+        ch_names: list,
+        sfreq: float,
+        capacity: int,
+        name: typing.Optional[str] = None,
+        dtype: typing.Any = np.float64,
+    ) -> None:
+        """Creates the shared memory block.
+
+        Parameters
+        ----------
+        ch_names : list
+            Channel names, in the row order of written chunks.
+        sfreq : float
+            Sampling frequency.
+        capacity : int
+            Number of samples kept per channel.
+        name : str, optional
+            Name of the shared memory block. Generated if None.
+        dtype : numpy dtype, optional
+            Type samples are stored with, by default float64.
+
+        Raises
+        ------
+        BrainAccessException
+            If the capacity is not positive or the metadata is too large.
+        """
+        if capacity <= 0:
+            raise BrainAccessException("Buffer capacity must be positive")
+        self.dtype = np.dtype(dtype)
+        self.n_channels = len(ch_names)
+        self.capacity = capacity
+        meta = json.dumps(
+            {"ch_names": list(ch_names), "sfreq": sfreq, "dtype": self.dtype.str}
+        ).encode("utf-8")
+        if len(meta) > _META_SIZE:
+            raise BrainAccessException("Too many channels for the shared buffer")
+        data_size = self.n_channels * capacity * self.dtype.itemsize
+        size = _HEADER_SIZE + _META_SIZE + data_size
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _created.add(self._shm.name)
+        self._shm.buf[_HEADER_SIZE:_HEADER_SIZE + len(meta)] = meta
+        self._header, self._data = _layout(
+            self._shm, self.n_channels, capacity, self.dtype
+        )
+        self._header[:] = 0
+        self._header[_CHANNELS] = self.n_channels
+        self._header[_CAPACITY] = capacity
+        self._header[_META_LEN] = len(meta)
+
+    @property
+    def name(self) -> str:
+        """Name readers attach to."""
+        return self._shm.name
+
+    @property
+    def total(self) -> int:
+        """Number of samples written since creation."""
+        return int(self._header[_TOTAL])
+
+    def write(self, chunk: typing.Any) -> None:
+        """Writes a chunk of samples.
+
+        Parameters
+        ----------
+        chunk : np.ndarray
+            Samples with shape (channels, samples).
+        """
+        chunk = np.asarray(chunk)
+        n = chunk.shape[1]
+        if n == 0:
+            return
+        if n > self.capacity:
+            chunk = chunk[:, -self.capacity:]
+        count = chunk.shape[1]
+        total = int(self._header[_TOTAL])
+        # readers locate samples by total % capacity, skipped samples of an
+        # oversized chunk still advance the position
+        index = (total + n - count) % self.capacity
+        self._header[_SEQ] += 1
+        first = min(count, self.capacity - index)
+        self._data[:, index:index + first] = chunk[:, :first]
+        if first < count:
+            self._data[:, :count - first] = chunk[:, first:]
+        self._header[_TOTAL] = total + n
+        self._header[_SEQ] += 1
+
+    def close(self, unlink: bool = True) -> None:
+        """Detaches from the shared memory block.
+
+        Parameters
+        ----------
+        unlink : bool, optional
+            Also remove the block. Attached readers keep their mapping.
+            By default True.
+        """
+        del self._header, self._data
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+            _created.discard(self._shm.name)
+
+
+class SharedRingReader:
+    """Reads samples from a ring buffer created by `SharedRingWriter`."""
+
+    def __init__(self, name: str) -> None:
+        """Attaches to a shared memory block.
+
+        Parameters
+        ----------
+        name : str
+            Name of the block, `SharedRingWriter.name`.
+        """
+        self._shm = shared_memory.SharedMemory(name=name)
+        if sys.platform != "win32" and self._shm.name not in _created:
+            # the writer owns the block, do not unlink it when this process exits
+            resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+        meta_len = int(header[_META_LEN])
+        meta = json.loads(
+            bytes(self._shm.buf[_HEADER_SIZE:_HEADER_SIZE + meta_len]).decode("utf-8")
+        )
+        self.ch_names: list = meta["ch_names"]
+        self.sfreq: float = meta["sfreq"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.n_channels = int(header[_CHANNELS])
+        self.capacity = int(header[_CAPACITY])
+        del header
+        self._header, self._data = _layout(
+            self._shm, self.n_channels, self.capacity, self.dtype
+        )
+
+    @property
+    def total(self) -> int:
+        """Number of samples written since the writer was created."""
+        return int(self._header[_TOTAL])
+
+    def read(
+        self, since: typing.Optional[int] = None, samples: typing.Optional[int] = None
+    ) -> typing.Tuple[np.ndarray, int]:
+        """Copies samples out of the ring buffer.
+
+        Parameters
+        ----------
+        since : int, optional
+            Return only samples written after this total, e.g. the total
+            returned by the previous call. Older samples that were already
+            overwritten are skipped.
+        samples : int, optional
+            Return at most this many of the latest samples.
+
+        Returns
+        -------
+        tuple
+            Array with shape (channels, samples) and the total number of
+            samples written up to its last sample.
+        """
+        while True:
+            seq = int(self._header[_SEQ])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            total = int(self._header[_TOTAL])
+            count = min(total, self.capacity)
+            if since is not None:
+                count = min(count, max(total - since, 0))
+            if samples is not None:
+                count = min(count, samples)
+            end = total % self.capacity
+            start = (end - count) % self.capacity
+            if count == 0:
+                out = np.zeros((self.n_channels, 0), dtype=self.dtype)
+            elif start + count <= self.capacity:
+                out = self._data[:, start:start + count].copy()
+            else:
+                out = np.concatenate(
+                    (self._data[:, start:], self._data[:, :end]), axis=1
+                )
+            if int(self._header[_SEQ]) == seq:
+                return out, total
+
+    def latest(self, samples: typing.Optional[int] = None) -> np.ndarray:
+        """Copies the latest samples out of the ring buffer.
+
+        Parameters
+        ----------
+        samples : int, optional
+            Number of samples. Whole buffer if None.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape (channels, samples).
+        """
+        return self.read(samples=samples)[0]
+
+    def close(self) -> None:
+        """Detaches from the shared memory block."""
+        del self._header, self._data
+        self._shm.close()
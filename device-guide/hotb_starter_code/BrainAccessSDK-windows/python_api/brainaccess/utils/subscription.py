@@ -0,0 +1,119 @@
+"""Subscriptions delivering windows of acquired data to consumers."""
+
+import traceback
+import typing
+
+import numpy as np
+
+from brainaccess.utils.exceptions import BrainAccessException
+
+
+class Subscription:
+    """Consumer of acquired data registered with `EEG.subscribe`.
+
+    The acquisition thread calls the subscription with the size of every
+    stored chunk and a shared reader. Once `hop` new samples have arrived,
+    the latest `window` samples are read and passed to the callback together
+    with the number of samples stored since the previous call. Reads are
+    shared between subscriptions, so consumers asking for the same window
+    and channels receive the same array.
+
+    Hops are chunk-aligned: the callback runs on the chunk that completes a
+    hop, so it usually gets more than `hop` new samples. Calls stay on the
+    ``hop, 2 * hop, ...`` grid, so on average there is one call per hop,
+    but a chunk completing several hops triggers a single call. Consumers
+    that process only new data must use the passed count, not `hop`.
+    """
+
+    def __init__(
+        self,
+        callback: typing.Callable[[np.ndarray, int], None],
+        rows: list,
+        hop: typing.Optional[int] = None,
+        window: typing.Optional[int] = None,
+        on_cancel: typing.Optional[typing.Callable[["Subscription"], None]] = None,
+        channels: typing.Optional[list] = None,
+    ) -> None:
+        """Initializes the subscription.
+
+        Parameters
+        ----------
+        callback : callable
+            Called on the acquisition thread with an array of shape
+            (channels, samples) and the number of samples stored since the
+            previous call, which may exceed the window length.
+        rows : list
+            Chunk rows passed to the callback, in the given order.
+        hop : int, optional
+            Number of new samples between calls. If None, the callback is
+            called for every chunk.
+        window : int, optional
+            Number of samples passed to the callback. Defaults to the
+            samples stored since the previous call, so the data and the
+            count always match. Hops are chunk-aligned, so a fixed window
+            shorter than the longest chunk plus `hop` can miss new samples.
+        on_cancel : callable, optional
+            Called with the subscription when it is cancelled.
+        channels : list, optional
+            Channel names `rows` were resolved from, kept so the rows can be
+            resolved again when the channel layout changes. None stands for
+            all channels.
+
+        Raises
+        ------
+        BrainAccessException
+            If `hop` or `window` is not positive.
+        """
+        if hop is not None and hop <= 0:
+            raise BrainAccessException("Hop must be positive")
+        if window is not None and window <= 0:
+            raise BrainAccessException("Window must be positive")
+        self.callback = callback
+        self.rows = rows
+        self.channels = channels
+        self.hop = hop
+        self.window = window
+        self.active = True
+        self._on_cancel = on_cancel
+        self._since_call = 0
+        self._to_hop = hop
+
+    def __call__(
+        self,
+        chunk_size: int,
+        read: typing.Callable[[int, list], np.ndarray],
+    ) -> None:
+        """Handles a stored chunk, called on the acquisition thread.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of samples just stored.
+        read : callable
+            Returns the latest ``samples`` of the given rows, shared by all
+            subscriptions notified for this chunk.
+        """
+        if not self.active:
+            return
+        self._since_call += chunk_size
+        if self.hop is not None:
+            self._to_hop -= chunk_size
+            if self._to_hop > 0:
+                return
+            # next call on the hop grid, hops completed by this chunk merge
+            self._to_hop = self._to_hop % self.hop or self.hop
+        new_samples, self._since_call = self._since_call, 0
+        samples = self.window if self.window is not None else new_samples
+        try:
+            self.callback(read(samples, self.rows), new_samples)
+        except Exception:
+            # a failing consumer must not stop the others
+            traceback.print_exc()
+
+    def cancel(self) -> None:
+        """Stops calling the callback."""
+        if not self.active:
+            return
+        self.active = False
+        if self._on_cancel is not None:
+            self._on_cancel(self)
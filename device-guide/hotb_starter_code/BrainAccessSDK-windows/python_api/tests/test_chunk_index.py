@@ -0,0 +1,58 @@
+"""Tests of the stored chunk index."""
+
+import pytest
+
+from brainaccess.utils.chunk_index import ChunkIndex
+
+SFREQ = 250
+
+
+@pytest.fixture
+def index():
+    index = ChunkIndex(SFREQ, offset=10)
+    index.add(100, 1000, host_time=1.0)
+    index.add(50, 1100, host_time=2.0)
+    # 50 samples were lost before the last chunk
+    index.add(100, 1200, host_time=3.0)
+    return index
+
+
+@pytest.mark.parametrize(
+    "sample, position",
+    [(999, 10), (1000, 10), (1050, 60), (1120, 130), (1170, 160), (1250, 210)],
+)
+def test_position_of_sample(index, sample, position):
+    assert index.position_of_sample(sample) == position
+
+
+@pytest.mark.parametrize(
+    "host_time, position", [(0.0, 10), (1.9, 135), (2.0, 160), (5.0, 260)]
+)
+def test_position_of_time(index, host_time, position):
+    assert index.position_of_time(host_time) == position
+
+
+def test_decimated_step():
+    index = ChunkIndex(SFREQ, step=4)
+    index.add(10, 0, host_time=1.0)
+    assert index.position_of_sample(5) == 2
+    assert index.position_of_sample(100) == 10
+
+
+def test_empty_chunks_are_skipped():
+    index = ChunkIndex(SFREQ)
+    index.add(0, 0)
+    assert len(index) == 0
+    assert index.position_of_sample(0) == 0
+
+
+def test_capacity_drops_old_chunks():
+    index = ChunkIndex(SFREQ, capacity=100)
+    for chunk in range(1000):
+        index.add(30, chunk * 30, host_time=float(chunk))
+    assert index.total == 30000
+    # the chunks holding the last 100 samples and the partly overwritten one
+    assert len(index) == 4
+    assert len(index._starts) < 10
+    assert index.position_of_sample(0) == 29880
+    assert index.position_of_sample(29950) == 29950
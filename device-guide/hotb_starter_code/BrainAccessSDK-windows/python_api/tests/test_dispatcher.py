@@ -0,0 +1,61 @@
+"""Tests of the queued chunk dispatch between device and worker threads."""
+
+import ctypes
+import threading
+import time
+
+import numpy as np
+
+from brainaccess.core.eeg_manager import _ChunkDispatcher
+
+TYPES = [ctypes.c_double, ctypes.c_uint8]
+
+
+def _chunk(value, size=4):
+    # the native pointers handed over by the device callback
+    rows = [np.full(size, value, np.float64), np.full(size, value, np.uint8)]
+    return rows, [row.ctypes.data for row in rows]
+
+
+def _blocked():
+    """Dispatcher whose callback waits for `release`."""
+    release = threading.Event()
+    seen = []
+
+    def callback(chunk, chunk_size):
+        release.wait(5)
+        seen.append((float(chunk["0"][0]), int(chunk["1"][0]), chunk_size))
+
+    return _ChunkDispatcher(callback, slots=2), release, seen
+
+
+def test_full_ring_drops_newest():
+    dispatcher, release, seen = _blocked()
+    for value in range(6):
+        rows, pointers = _chunk(value)
+        dispatcher.put(pointers, 4, TYPES)
+    release.set()
+    dispatcher.stop()
+    # the first chunk keeps its slot until its callback returns
+    assert seen == [(0.0, 0, 4), (1.0, 1, 4)]
+    stats = dispatcher.stats()
+    assert stats["delivered"] == 2
+    assert stats["dropped"] == 4
+    assert stats["pending"] == 0
+    assert stats["max_pending"] == 2
+
+
+def test_layout_change_waits_for_empty_ring():
+    dispatcher, release, seen = _blocked()
+    rows, pointers = _chunk(1)
+    dispatcher.put(pointers, 4, TYPES)
+    rows, pointers = _chunk(2, size=3)
+    dispatcher.put(pointers, 3, TYPES)
+    assert dispatcher.dropped == 1
+    release.set()
+    while dispatcher.stats()["pending"]:
+        time.sleep(0.01)
+    dispatcher.put(pointers, 3, TYPES)
+    dispatcher.stop()
+    assert seen == [(1.0, 1, 4), (2.0, 2, 3)]
+    assert dispatcher.dropped == 1
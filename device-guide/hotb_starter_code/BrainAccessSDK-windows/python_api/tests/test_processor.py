@@ -0,0 +1,53 @@
+"""Tests of the epoching helpers of the connect processor."""
+
+import numpy as np
+import pytest
+
+from brainaccess.utils.exceptions import BrainAccessException
+
+try:
+    from brainaccess.connect import processor
+except BrainAccessException:
+    pytest.skip("connect library is not available", allow_module_level=True)
+
+SFREQ = 250
+
+
+@pytest.fixture
+def data():
+    return np.arange(2 * 20 * SFREQ, dtype=np.float64).reshape(2, -1)
+
+
+@pytest.mark.parametrize("overlap", [0.0, 0.5, 0.8, 0.9])
+def test_view_matches_copy(data, overlap):
+    copy = processor.cut_into_epochs(data, SFREQ, 1.0, overlap)
+    view = processor.cut_into_epochs(data, SFREQ, 1.0, overlap, view=True)
+    assert np.shares_memory(view, data)
+    assert not view.flags.writeable
+    complete = copy[: len(view)]
+    assert not np.any(copy[len(view):])
+    # the view rounds the step, the copy truncates it
+    drift = (view[:, 0, 0] - complete[:, 0, 0]).astype(int)
+    assert set(np.unique(drift)) <= {0, 1}
+    np.testing.assert_array_equal(view - view[:, :, :1], complete - complete[:, :, :1])
+
+
+def test_view_of_fractional_step_warns(data):
+    with pytest.warns(UserWarning):
+        view = processor.cut_into_epochs(data, SFREQ, 5.0, 0.75, view=True)
+    copy = processor.cut_into_epochs(data, SFREQ, 5.0, 0.75)
+    np.testing.assert_array_equal(view, copy[: len(view)])
+    assert not view.flags.writeable
+
+
+def test_view_of_short_data(data):
+    view = processor.cut_into_epochs(data[:, :100], SFREQ, 1.0, 0.5, view=True)
+    assert view.shape == (0, 2, SFREQ)
+
+
+def test_iter_epochs(data):
+    copy = processor.cut_into_epochs(data, SFREQ, 2.0, 0.5)
+    epochs = list(processor.iter_epochs(data, SFREQ, 2.0, 0.5))
+    np.testing.assert_array_equal(np.stack(epochs), copy[: len(epochs)])
+    assert all(np.shares_memory(epoch, data) for epoch in epochs)
+    assert not epochs[0].flags.writeable
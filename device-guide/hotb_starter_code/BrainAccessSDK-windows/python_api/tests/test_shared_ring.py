@@ -0,0 +1,68 @@
+"""Tests of the shared memory ring buffer."""
+
+import numpy as np
+import pytest
+
+from brainaccess.utils.shared_ring import SharedRingReader, SharedRingWriter
+
+
+@pytest.fixture
+def ring():
+    writer = SharedRingWriter(["a", "b"], 250.0, 10)
+    reader = SharedRingReader(writer.name)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def _chunk(start, stop):
+    samples = np.arange(start, stop, dtype=np.float64)
+    return np.vstack((samples, -samples))
+
+
+def test_metadata(ring):
+    writer, reader = ring
+    assert reader.ch_names == ["a", "b"]
+    assert reader.sfreq == 250.0
+    assert reader.capacity == 10
+    assert reader.dtype == np.float64
+
+
+def test_wrap_around(ring):
+    writer, reader = ring
+    for start in range(0, 23, 3):
+        writer.write(_chunk(start, start + 3))
+    np.testing.assert_array_equal(reader.latest(), _chunk(14, 24))
+    np.testing.assert_array_equal(reader.latest(4), _chunk(20, 24))
+    assert reader.total == 24
+
+
+def test_oversized_chunk(ring):
+    writer, reader = ring
+    writer.write(_chunk(0, 3))
+    writer.write(_chunk(3, 18))
+    np.testing.assert_array_equal(reader.latest(), _chunk(8, 18))
+    writer.write(_chunk(18, 21))
+    np.testing.assert_array_equal(reader.latest(), _chunk(11, 21))
+    assert reader.total == 21
+
+
+def test_read_since(ring):
+    writer, reader = ring
+    writer.write(_chunk(0, 4))
+    data, total = reader.read()
+    writer.write(_chunk(4, 7))
+    new, total = reader.read(since=total)
+    np.testing.assert_array_equal(new, _chunk(4, 7))
+    assert total == 7
+    # samples overwritten before the read are skipped
+    writer.write(_chunk(7, 30))
+    new, total = reader.read(since=total)
+    np.testing.assert_array_equal(new, _chunk(20, 30))
+
+
+def test_empty_read(ring):
+    writer, reader = ring
+    assert reader.latest().shape == (2, 0)
+    writer.write(np.zeros((2, 0)))
+    assert reader.total == 0
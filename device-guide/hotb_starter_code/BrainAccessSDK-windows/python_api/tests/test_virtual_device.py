@@ -0,0 +1,107 @@
+"""Acquisition pipeline checks against the virtual devices, no headset needed."""
+
+import time
+
+import mne
+import numpy as np
+import pytest
+from scipy import signal
+
+from brainaccess.utils.acquisition import EEG
+from brainaccess.utils.streaming import StreamingFilterBank
+from brainaccess.utils.virtual_device import ReplayManager, SyntheticManager
+
+SFREQ = 250
+CAP = {0: "Fp1", 1: "Fp2"}
+
+
+@pytest.fixture
+def replay_file(tmp_path):
+    rng = np.random.default_rng(0)
+    info = mne.create_info(list(CAP.values()), SFREQ, "eeg")
+    raw = mne.io.RawArray(rng.standard_normal((2, 10 * SFREQ)), info, verbose=False)
+    fname = tmp_path / "replay_raw.fif"
+    raw.save(fname, verbose=False)
+    return fname
+
+
+def test_queued_chunks_are_recorded(replay_file, tmp_path):
+    eeg = EEG(dispatch_queue=64)
+    try:
+        eeg.setup(ReplayManager(replay_file, speed=20, chunk_size=13), "v", cap=CAP)
+        eeg.start_recording(tmp_path / "recording_raw.fif")
+        eeg.start_acquisition()
+        time.sleep(1.0)
+        eeg.stop_acquisition()
+        fname = eeg.stop_recording()
+        stored = eeg.get_mne().get_data(picks=["Fp1", "Fp2"])
+    finally:
+        eeg.close()
+    recorded = mne.io.read_raw(fname, verbose=False)
+    assert stored.shape[1] > 0
+    assert recorded.n_times == stored.shape[1]
+    np.testing.assert_allclose(recorded.get_data(picks=["Fp1", "Fp2"]), stored)
+
+
+def test_subscribed_filter_bank_matches_offline_filter():
+    eeg = EEG(dispatch_queue=64)
+    bank = StreamingFilterBank.design(SFREQ, 2, 60 * SFREQ, band=(1, 40), notch=50)
+    counts = []
+    try:
+        eeg.setup(SyntheticManager(speed=20, chunk_size=130, seed=0), "v", cap=CAP)
+
+        def on_window(window, new_samples):
+            counts.append(new_samples)
+            bank.process(window, new_samples)
+
+        eeg.subscribe(
+            on_window, hop_samples=125, window_samples=500, channels=["Fp1", "Fp2"]
+        )
+        eeg.start_acquisition()
+        time.sleep(1.0)
+        eeg.stop_acquisition()
+        stored = eeg.get_mne().get_data(picks=["Fp1", "Fp2"])
+    finally:
+        eeg.close()
+    # hops are chunk-aligned, every stored sample is reported exactly once
+    assert len(counts) > 0
+    assert sum(counts) == bank.total == stored.shape[1]
+    zi = signal.sosfilt_zi(bank.sos)[:, None, :] * stored[None, :, :1]
+    expected = signal.sosfilt(bank.sos, stored, zi=zi)[0]
+    np.testing.assert_allclose(bank.latest(), expected, atol=1e-9)
+
+
+def test_stop_after_replay_ran_out(replay_file):
+    eeg = EEG()
+    mgr = ReplayManager(replay_file, speed=None)
+    try:
+        eeg.setup(mgr, "v", cap=CAP)
+        eeg.start_acquisition()
+        deadline = time.time() + 10
+        while mgr.is_streaming() and time.time() < deadline:
+            time.sleep(0.05)
+        assert not mgr.is_streaming()
+        eeg.stop_acquisition()
+    finally:
+        eeg.close()
+
+
+def test_annotations_follow_the_converted_span():
+    eeg = EEG()
+    try:
+        eeg.setup(SyntheticManager(speed=20, chunk_size=25, seed=0), "v", cap=CAP)
+        eeg.start_acquisition()
+        time.sleep(0.3)
+        eeg.annotate("mark")
+        time.sleep(0.3)
+        eeg.stop_acquisition()
+        full = eeg.get_mne()
+        tail = eeg.get_mne(samples=full.n_times - 10)
+        again = eeg.get_mne()
+    finally:
+        eeg.close()
+    assert list(full.annotations.description) == ["mark"]
+    np.testing.assert_allclose(
+        full.annotations.onset - tail.annotations.onset, 10 / SFREQ
+    )
+    np.testing.assert_allclose(again.annotations.onset, full.annotations.onset)